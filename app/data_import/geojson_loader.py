@@ -1,6 +1,6 @@
 """GeoJSON loader for no-fly zones and spatial data."""
 import json
-from typing import List, Optional
+from typing import List, Optional, TextIO
 from pathlib import Path
 from shapely.geometry import shape
 from shapely.geometry.base import BaseGeometry
@@ -82,7 +82,19 @@ def load_waypoints_from_geojson(file_path: str) -> List[Waypoint]:
         List of Waypoint objects
     """
     with open(file_path, 'r', encoding='utf-8') as f:
-        geojson_data = json.load(f)
+        return read_waypoints_geojson(f)
+
+
+def read_waypoints_geojson(stream: TextIO) -> List[Waypoint]:
+    """Load waypoints from an open GeoJSON text stream (Point features).
+    
+    Args:
+        stream: Text stream holding a Feature or FeatureCollection
+    
+    Returns:
+        List of Waypoint objects
+    """
+    geojson_data = json.load(stream)
     
     waypoints = []
     
@@ -1,10 +1,13 @@
 """Main importer interface."""
-from typing import List, Optional
+import io
+from typing import BinaryIO, List, Optional
 from pathlib import Path
 from app.domain.waypoint import Waypoint
 from app.domain.constraints import NoFlyZone
-from app.data_import.csv_loader import load_waypoints_from_csv, save_waypoints_to_csv
-from app.data_import.geojson_loader import load_no_fly_zones_from_geojson, load_waypoints_from_geojson
+from app.data_import.csv_loader import load_waypoints_from_csv, read_waypoints_csv, save_waypoints_to_csv
+from app.data_import.geojson_loader import (
+    load_no_fly_zones_from_geojson, load_waypoints_from_geojson, read_waypoints_geojson
+)
 
 
 class DataImporter:
@@ -30,6 +33,34 @@ class DataImporter:
         else:
             raise ValueError(f"Unsupported file format: {suffix}. Supported: .csv, .geojson, .json")
     
+    @staticmethod
+    def import_waypoints_stream(file_obj: BinaryIO, suffix: str) -> List[Waypoint]:
+        """Import waypoints from an open binary file object (e.g. an upload).
+        
+        Parses straight from the stream, so uploads need no temporary file copy.
+        
+        Args:
+            file_obj: Binary file object positioned at the start of the data
+            suffix: File extension selecting the format ('.csv', '.geojson' or '.json')
+        
+        Returns:
+            List of Waypoint objects
+        """
+        suffix = suffix.lower()
+        if suffix == '.csv':
+            reader = read_waypoints_csv
+        elif suffix in ['.geojson', '.json']:
+            reader = read_waypoints_geojson
+        else:
+            raise ValueError(f"Unsupported file format: {suffix}. Supported: .csv, .geojson, .json")
+        
+        stream = io.TextIOWrapper(file_obj, encoding='utf-8', newline='')
+        try:
+            return reader(stream)
+        finally:
+            # Leave the caller's file object open
+            stream.detach()
+    
     @staticmethod
     def import_no_fly_zones(file_path: str,
                            min_altitude: float = 0.0,
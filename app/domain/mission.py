@@ -1,5 +1,6 @@
 """Mission domain model."""
 from dataclasses import dataclass, field
+from itertools import count
 from typing import List, Optional, Dict
 from datetime import datetime
 from .drone import Drone
@@ -7,6 +8,11 @@ from .waypoint import Waypoint
 from .route import Route
 from .constraints import MissionConstraints
 
+# Source of Mission._version stamps. Shared across missions, so a stamp identifies one
+# mission state without hashing its contents
+_VERSIONS = count(1)
+_MISSING = object()
+
 
 @dataclass
 class Mission:
@@ -23,6 +29,22 @@ class Mission:
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     
+    # Bookkeeping fields whose assignment does not count as a change
+    _UNVERSIONED = frozenset({"created_at", "updated_at"})
+    
+    def __setattr__(self, name: str, value):
+        """Assign a field, bumping _version when a mission field actually changes."""
+        if not name.startswith("_") and name not in self._UNVERSIONED:
+            old = self.__dict__.get(name, _MISSING)
+            if old is not value and (old is _MISSING or old != value):
+                object.__setattr__(self, "_version", next(_VERSIONS))
+        object.__setattr__(self, name, value)
+    
+    def mark_modified(self):
+        """Record an in-place change that bypassed field assignment (e.g. a no-fly zone edit)."""
+        self._version = next(_VERSIONS)
+        self.updated_at = datetime.now()
+    
     def __post_init__(self):
         """Initialize timestamps."""
         if self.created_at is None:
@@ -35,12 +57,17 @@ class Mission:
     def add_drone(self, drone: Drone):
         """Add a drone to the mission."""
         self.drones.append(drone)
-        self.updated_at = datetime.now()
+        self.mark_modified()
     
     def add_target_point(self, waypoint: Waypoint):
         """Add a target point to the mission."""
         self.target_points.append(waypoint)
-        self.updated_at = datetime.now()
+        self.mark_modified()
+    
+    def extend_target_points(self, waypoints: List[Waypoint]):
+        """Add several target points to the mission in one step."""
+        self.target_points.extend(waypoints)
+        self.mark_modified()
     
     def set_depot(self, waypoint: Waypoint):
         """Set the depot/start point."""
@@ -58,7 +85,7 @@ class Mission:
         """Add a route for a specific drone."""
         route.drone_name = drone_name
         self.routes[drone_name] = route
-        self.updated_at = datetime.now()
+        self.mark_modified()
     
     def get_route(self, drone_name: str) -> Optional[Route]:
         """Get route for a specific drone."""
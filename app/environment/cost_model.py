@@ -1,11 +1,12 @@
 """Cost model for navigation graph edges."""
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
 from app.domain.drone import Drone
 from app.domain.constraints import MissionConstraints
 from app.weather.weather_provider import WeatherConditions
 from app.weather.weather_manager import WeatherManager
 from shapely.geometry import LineString, Point
 import math
+import numpy as np
 
 
 class CostModel:
@@ -27,6 +28,10 @@ class CostModel:
         self.weather_data = weather_data or {}
         self.weather_manager = weather_manager
         
+        # No-fly zone bounding boxes for is_valid_edge, rebuilt when the zone list changes
+        self._zone_bounds_zones: tuple = ()
+        self._zone_bounds_list: List[tuple] = []
+        
         # Update weather_data from weather_manager if available
         if weather_manager:
             self.weather_data = weather_manager.get_all_weather_data()
@@ -63,6 +68,14 @@ class CostModel:
         Returns:
             Cost value (lower is better)
         """
+        # Weather at the segment midpoint drives the wind effects
+        weather = self._get_weather_for_point((lat1 + lat2) / 2.0, (lon1 + lon2) / 2.0, (alt1 + alt2) / 2.0)
+        return self._cost_with_weather(lat1, lon1, alt1, lat2, lon2, alt2, current_speed, weather)
+    
+    def _cost_with_weather(self, lat1: float, lon1: float, alt1: float,
+                           lat2: float, lon2: float, alt2: float,
+                           current_speed: float, weather: Optional[WeatherConditions]) -> float:
+        """calculate_cost with the midpoint weather already looked up."""
         distance = self.calculate_distance(lat1, lon1, alt1, lat2, lon2, alt2)
         horizontal_distance = self._haversine_distance(lat1, lon1, lat2, lon2)
         
@@ -118,12 +131,6 @@ class CostModel:
         energy_multiplier = 1.0
         effective_max_speed = self.drone.max_speed
         
-        # Try to get weather for both points (use midpoint if available)
-        mid_lat = (lat1 + lat2) / 2.0
-        mid_lon = (lon1 + lon2) / 2.0
-        avg_altitude = (alt1 + alt2) / 2.0
-        
-        weather = self._get_weather_for_point(mid_lat, mid_lon, avg_altitude)
         if weather:
             # Calculate effective wind (headwind/tailwind)
             effective_wind = weather.get_effective_wind_speed(heading, avg_altitude)
@@ -199,6 +206,150 @@ class CostModel:
         
         return cost
     
+    def calculate_costs_bulk(self, lat1: np.ndarray, lon1: np.ndarray, alt1: np.ndarray,
+                             lat2: np.ndarray, lon2: np.ndarray, alt2: np.ndarray) -> np.ndarray:
+        """Vectorized calculate_cost (current_speed=0) for many edges at once.
+        
+        Same formula as calculate_cost, evaluated with NumPy over edge arrays. Weather is
+        looked up once per weather grid cell instead of once per edge.
+        
+        Args:
+            lat1, lon1, alt1: Start point coordinate arrays
+            lat2, lon2, alt2: End point coordinate arrays
+        
+        Returns:
+            Cost per edge
+        """
+        lat1, lon1, alt1, lat2, lon2, alt2 = (
+            np.asarray(a, dtype=np.float64) for a in (lat1, lon1, alt1, lat2, lon2, alt2)
+        )
+        drone = self.drone
+        max_speed = drone.max_speed
+        
+        horizontal_distance = self._haversine_distance_bulk(lat1, lon1, lat2, lon2)
+        altitude_change = alt2 - alt1
+        altitude_change_abs = np.abs(altitude_change)
+        distance = (horizontal_distance ** 2 + altitude_change_abs ** 2) ** 0.5
+        cost = distance.copy()
+        
+        # Dubins Airplane climb/descent constraints
+        avg_speed = max_speed * 0.7
+        time_horizontal = horizontal_distance / avg_speed if avg_speed > 0 else np.zeros_like(cost)
+        moving = time_horizontal > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            required_climb_rate = np.where(moving, altitude_change_abs / time_horizontal, 0.0)
+        climb_penalty = np.where(required_climb_rate > drone.climb_rate,
+                                 10000 * (required_climb_rate / drone.climb_rate - 1),
+                                 altitude_change_abs * 2.0)
+        descent_penalty = np.where(required_climb_rate > drone.descent_rate,
+                                   10000 * (required_climb_rate / drone.descent_rate - 1),
+                                   altitude_change_abs * 1.2)
+        cost += np.where(moving & (altitude_change > 0), climb_penalty,
+                         np.where(moving & (altitude_change < 0), descent_penalty, 0.0))
+        
+        # Turn radius penalty for very short segments
+        min_turn_distance = drone.turn_radius * math.pi / 2
+        cost += np.where((horizontal_distance > 0) & (horizontal_distance < min_turn_distance),
+                         (min_turn_distance - horizontal_distance) * 0.1, 0.0)
+        
+        # Weather effects, with one lookup per weather cell
+        heading = self._calculate_heading_bulk(lat1, lon1, lat2, lon2)
+        mid_lat = (lat1 + lat2) / 2.0
+        mid_lon = (lon1 + lon2) / 2.0
+        avg_altitude = (alt1 + alt2) / 2.0
+        
+        effective_max_speed = np.full_like(cost, max_speed)
+        energy_multiplier = np.ones_like(cost)
+        weather_penalty = np.zeros_like(cost)
+        for weather, edges in self._weather_groups_bulk(mid_lat, mid_lon, avg_altitude):
+            effective_wind = self._effective_wind_bulk(weather, heading[edges], avg_altitude[edges])
+            effective_max_speed[edges] = np.maximum(0.1 * max_speed,
+                                                    np.minimum(max_speed * 1.2, max_speed - effective_wind * 0.5))
+            energy_multiplier[edges] = 1.0 + (effective_wind / max(max_speed, 1.0) * 0.3)
+            penalty = np.where(effective_wind > 5.0, effective_wind * 10.0, 0.0)
+            if weather.precipitation > 0:
+                penalty += weather.precipitation * 50.0
+            if weather.cloud_cover > 80:
+                penalty += (weather.cloud_cover - 80) * 2.0
+            weather_penalty[edges] = penalty
+        
+        # Time with inertia, starting from rest
+        acceleration = max_speed / 5.0
+        deceleration = max_speed / 5.0
+        accel_time = np.maximum(0, effective_max_speed / acceleration)
+        accel_distance = 0.5 * acceleration * accel_time ** 2
+        decel_time = effective_max_speed / deceleration
+        decel_distance = effective_max_speed * decel_time - 0.5 * deceleration * decel_time ** 2
+        cruise_distance = np.maximum(0, horizontal_distance - accel_distance - decel_distance)
+        cruise_time = cruise_distance / effective_max_speed
+        total_time = np.where(horizontal_distance > 0, accel_time + cruise_time + decel_time, 0.0)
+        cost += total_time * 10.0
+        
+        # Energy cost (Drone.estimate_energy_consumption, vectorized)
+        vertical_time = np.where(altitude_change != 0, altitude_change_abs / drone.climb_rate, 0.0)
+        flight_time = np.maximum(horizontal_distance / max_speed, vertical_time)
+        base_energy_cost = (drone.power_consumption * flight_time) / 3600
+        speed_factor = (effective_max_speed / max_speed) ** 2
+        speed_energy_multiplier = 1.0 + 0.5 * (speed_factor - 1.0)
+        adjusted_energy_cost = base_energy_cost * energy_multiplier * speed_energy_multiplier
+        cost += (adjusted_energy_cost / 100.0) * distance * 0.1
+        
+        cost += weather_penalty
+        return cost
+    
+    def _weather_groups_bulk(self, latitudes: np.ndarray, longitudes: np.ndarray,
+                             altitudes: np.ndarray) -> List[tuple[WeatherConditions, np.ndarray]]:
+        """Group points by weather grid cell and resolve each cell's weather once.
+        
+        Returns:
+            (weather, point indices) for every cell that has weather
+        """
+        if not self.weather_manager:
+            # No grid to group by: resolve per point
+            groups = []
+            for i, (lat, lon, alt) in enumerate(zip(latitudes.tolist(), longitudes.tolist(), altitudes.tolist())):
+                weather = self._get_weather_for_point(lat, lon, alt)
+                if weather:
+                    groups.append((weather, np.array([i])))
+            return groups
+        
+        lat_grid, lon_grid = self.weather_manager.round_to_grid_bulk(latitudes, longitudes)
+        _, first, inverse = np.unique(np.column_stack((lat_grid, lon_grid)), axis=0,
+                                      return_index=True, return_inverse=True)
+        inverse = inverse.ravel()
+        groups = []
+        for cell, i in enumerate(first.tolist()):
+            weather = self._get_weather_for_point(latitudes[i], longitudes[i], altitudes[i])
+            if weather:
+                groups.append((weather, np.flatnonzero(inverse == cell)))
+        return groups
+    
+    @staticmethod
+    def _effective_wind_bulk(weather: WeatherConditions, heading: np.ndarray, altitude: np.ndarray) -> np.ndarray:
+        """Vectorized WeatherConditions.get_effective_wind_speed."""
+        alpha = 0.15
+        if weather.wind_speed_80m:
+            ref_speed = np.where(altitude >= 80, weather.wind_speed_80m, weather.wind_speed_10m)
+            ref_alt = np.where(altitude >= 80, 80.0, 10.0)
+        else:
+            ref_speed = weather.wind_speed_10m
+            ref_alt = 10.0
+        with np.errstate(invalid='ignore'):
+            wind_speed = np.where(altitude <= 10, weather.wind_speed_10m,
+                                  ref_speed * ((altitude / ref_alt) ** alpha))
+        angle_diff = np.abs(heading - weather.wind_direction_10m)
+        angle_diff = np.where(angle_diff > 180, 360 - angle_diff, angle_diff)
+        return wind_speed * np.cos(np.radians(angle_diff))
+    
+    def weather_version(self) -> int:
+        """Version of the weather behind edge validity and costs.
+        
+        Moves whenever the weather manager's cache is written (set_weather or a fetch
+        during planning), which can change results without the graph changing. Without
+        a weather manager the weather is fixed at construction and this stays 0.
+        """
+        return self.weather_manager._version if self.weather_manager else 0
+    
     def _get_weather_for_point(self, latitude: float, longitude: float, altitude: float = 0.0) -> Optional[WeatherConditions]:
         """Get weather conditions for a point (find nearest available or fetch if too far).
         
@@ -245,6 +396,17 @@ class CostModel:
         # (We don't want to fetch here if weather_manager exists, as it should handle it)
         return None
     
+    @staticmethod
+    def _calculate_heading_bulk(lat1: np.ndarray, lon1: np.ndarray,
+                                lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+        """Vectorized _calculate_heading."""
+        lat1_rad = np.radians(lat1)
+        lat2_rad = np.radians(lat2)
+        delta_lon = np.radians(lon2 - lon1)
+        y = np.sin(delta_lon) * np.cos(lat2_rad)
+        x = np.cos(lat1_rad) * np.sin(lat2_rad) - np.sin(lat1_rad) * np.cos(lat2_rad) * np.cos(delta_lon)
+        return (np.degrees(np.arctan2(y, x)) + 360) % 360
+    
     @staticmethod
     def _calculate_heading(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Calculate heading from point 1 to point 2 in degrees (0-360, 0 = North)."""
@@ -277,47 +439,105 @@ class CostModel:
         Returns:
             (is_valid, error_message)
         """
+        is_valid, error, _ = self._check_edge(lat1, lon1, alt1, lat2, lon2, alt2,
+                                              is_start_ground, is_end_ground)
+        return is_valid, error
+    
+    def evaluate_edge(self, lat1: float, lon1: float, alt1: float,
+                      lat2: float, lon2: float, alt2: float,
+                      current_speed: float = 0.0,
+                      is_start_ground: bool = False,
+                      is_end_ground: bool = False) -> Tuple[bool, float]:
+        """Check an edge and compute its cost in one pass.
+        
+        Equivalent to is_valid_edge followed by calculate_cost, but the midpoint weather
+        is looked up once for both, and no cost is computed for invalid edges.
+        
+        Args:
+            lat1, lon1, alt1: Start point coordinates
+            lat2, lon2, alt2: End point coordinates
+            current_speed: Current speed at start point (m/s), for inertia calculation
+            is_start_ground: If True, start point is depot/finish (skip min altitude check)
+            is_end_ground: If True, end point is depot/finish (skip min altitude check)
+        
+        Returns:
+            (is_valid, cost), with cost math.inf when the edge is invalid
+        """
+        is_valid, _, weather = self._check_edge(lat1, lon1, alt1, lat2, lon2, alt2,
+                                                is_start_ground, is_end_ground)
+        if not is_valid:
+            return False, math.inf
+        return True, self._cost_with_weather(lat1, lon1, alt1, lat2, lon2, alt2, current_speed, weather)
+    
+    def _check_edge(self, lat1: float, lon1: float, alt1: float,
+                    lat2: float, lon2: float, alt2: float,
+                    is_start_ground: bool, is_end_ground: bool
+                    ) -> Tuple[bool, Optional[str], Optional[WeatherConditions]]:
+        """is_valid_edge that also returns the midpoint weather it looked up (None if it did not get that far)."""
         # Check start point
         is_valid, error = self.constraints.check_point(lat1, lon1, alt1, is_ground_point=is_start_ground)
         if not is_valid:
-            return False, f"Start point: {error}"
+            return False, f"Start point: {error}", None
         
         # Check end point
         is_valid, error = self.constraints.check_point(lat2, lon2, alt2, is_ground_point=is_end_ground)
         if not is_valid:
-            return False, f"End point: {error}"
+            return False, f"End point: {error}", None
         
         # Check weather conditions if available
         mid_lat = (lat1 + lat2) / 2.0
         mid_lon = (lon1 + lon2) / 2.0
         avg_altitude = (alt1 + alt2) / 2.0
         
-        weather = self._get_weather_for_point(mid_lat, mid_lon)
+        weather = self._get_weather_for_point(mid_lat, mid_lon, avg_altitude)
         if weather:
             is_safe, error_msg = weather.is_safe_for_flight()
             if not is_safe:
-                return False, f"Weather conditions: {error_msg}"
+                return False, f"Weather conditions: {error_msg}", weather
         
         # Check if line segment intersects no-fly zones
-        # Use 2D LineString for intersection check (Shapely doesn't support 3D LineString intersection with 2D geometry)
-        line_2d = LineString([
-            (lon1, lat1),
-            (lon2, lat2)
-        ])
-        
-        for zone in self.constraints.no_fly_zones:
-            # Check if 2D line intersects zone geometry
+        # Only zones whose altitude range and bounding box overlap the segment's can
+        # intersect it, so the Shapely test runs just for those candidates
+        min_alt = min(alt1, alt2)
+        max_alt = max(alt1, alt2)
+        min_lon, max_lon = min(lon1, lon2), max(lon1, lon2)
+        min_lat, max_lat = min(lat1, lat2), max(lat1, lat2)
+        line_2d = None
+        
+        for zone, (zone_min_lon, zone_min_lat, zone_max_lon, zone_max_lat) in zip(
+                self.constraints.no_fly_zones, self._zone_bounds()):
+            if not (zone.min_altitude <= max_alt and zone.max_altitude >= min_alt):
+                continue
+            if (zone_min_lon > max_lon or zone_max_lon < min_lon or
+                    zone_min_lat > max_lat or zone_max_lat < min_lat):
+                continue
+            
+            # Use 2D LineString for intersection check (Shapely doesn't support 3D LineString intersection with 2D geometry)
+            if line_2d is None:
+                line_2d = LineString([
+                    (lon1, lat1),
+                    (lon2, lat2)
+                ])
             if zone.geometry.intersects(line_2d):
-                # Check altitude range along the line
-                # The line segment intersects the zone if altitude ranges overlap
-                min_alt = min(alt1, alt2)
-                max_alt = max(alt1, alt2)
-                
-                if (zone.min_altitude <= max_alt and zone.max_altitude >= min_alt):
-                    zone_name = zone.name or "unnamed"
-                    return False, f"Edge intersects no-fly zone: {zone_name}"
-        
-        return True, None
+                zone_name = zone.name or "unnamed"
+                return False, f"Edge intersects no-fly zone: {zone_name}", weather
+        
+        return True, None, weather
+    
+    def _zone_bounds(self) -> List[tuple]:
+        """Get (min_lon, min_lat, max_lon, max_lat) of each no-fly zone, in zone order.
+        
+        The cached boxes are rebuilt whenever the list no longer holds the same zone
+        objects in the same order, so in-place edits (pop, insert, item assignment) and
+        list replacement are both picked up. The cache keeps the zones it was built from,
+        so their identities cannot be reused by new objects.
+        """
+        zones = self.constraints.no_fly_zones
+        cached = self._zone_bounds_zones
+        if len(cached) != len(zones) or any(a is not b for a, b in zip(cached, zones)):
+            self._zone_bounds_list = [zone.geometry.bounds for zone in zones]
+            self._zone_bounds_zones = tuple(zones)
+        return self._zone_bounds_list
     
     @staticmethod
     def _haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -335,4 +555,16 @@ class CostModel:
         c = 2 * atan2(sqrt(a), sqrt(1 - a))
         
         return R * c
-
+    
+    @staticmethod
+    def _haversine_distance_bulk(lat1: np.ndarray, lon1: np.ndarray,
+                                 lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+        """Vectorized _haversine_distance."""
+        R = 6371000  # Earth radius in meters
+        lat1_rad = np.radians(lat1)
+        lat2_rad = np.radians(lat2)
+        delta_lat = np.radians(lat2 - lat1)
+        delta_lon = np.radians(lon2 - lon1)
+        a = np.sin(delta_lat / 2) ** 2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(delta_lon / 2) ** 2
+        c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+        return R * c
@@ -1,5 +1,6 @@
 """Builder for navigation graphs."""
 from typing import List, Tuple, Optional, Dict
+import functools
 import numpy as np
 from app.domain.waypoint import Waypoint
 from app.domain.constraints import MissionConstraints
@@ -9,10 +10,17 @@ from app.domain.drone import Drone
 from app.weather.weather_provider import WeatherConditions
 from app.weather.weather_manager import WeatherManager
 
+# (node_keys, lats, lons, alts, edge_pairs) of a grid graph, see build_grid_skeleton
+GridSkeleton = Tuple[Tuple[str, ...], Tuple[float, ...], Tuple[float, ...], Tuple[float, ...],
+                     Tuple[Tuple[int, int], ...]]
+
 
 class GraphBuilder:
     """Builder for creating navigation graphs."""
     
+    # KD-tree candidates re-ranked exactly by find_nearest_node
+    NEAREST_NODE_CANDIDATES = 8
+    
     def __init__(self, drone: Drone, constraints: Optional[MissionConstraints] = None,
                  weather_data: Optional[Dict[tuple[float, float], WeatherConditions]] = None,
                  weather_manager: Optional[WeatherManager] = None):
@@ -59,8 +67,54 @@ class GraphBuilder:
         Returns:
             NavigationGraph instance
         """
+        node_keys, lats, lons, alts, edge_pairs = self.build_grid_skeleton(
+            center_lat, center_lon, width, height, resolution,
+            min_altitude, max_altitude, altitude_levels
+        )
+        
         graph = NavigationGraph(cost_model=self.cost_model)
+        graph.add_nodes_bulk(node_keys, lats, lons, alts)
+        
+        # Validity and cost depend on the drone, constraints and weather, so they are
+        # evaluated per builder on top of the shared skeleton
+        is_valid_edge = self.cost_model.is_valid_edge
+        valid_pairs = [
+            (s, t) for s, t in edge_pairs
+            if is_valid_edge(lats[s], lons[s], alts[s], lats[t], lons[t], alts[t])[0]
+        ]
+        
+        # All edge weights in one vectorized pass
+        positions = np.column_stack((lats, lons, alts))
+        sources, targets = np.array(valid_pairs, dtype=np.intp).reshape(-1, 2).T
+        costs = self.cost_model.calculate_costs_bulk(*positions[sources].T, *positions[targets].T)
+        graph.add_edges_bulk(
+            (node_keys[s], node_keys[t], cost)
+            for (s, t), cost in zip(valid_pairs, costs.tolist())
+        )
         
+        return graph
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=8)
+    def build_grid_skeleton(center_lat: float,
+                            center_lon: float,
+                            width: float,
+                            height: float,
+                            resolution: float = 100.0,
+                            min_altitude: float = 0.0,
+                            max_altitude: float = 100.0,
+                            altitude_levels: int = 5) -> GridSkeleton:
+        """Build the drone-independent geometry of a 3D grid graph.
+        
+        Results are cached and shared by all builders, so they are immutable tuples.
+        
+        Args:
+            Same as build_grid_graph
+        
+        Returns:
+            (node_keys, lats, lons, alts, edge_pairs) with edge_pairs as (source, target)
+            node indices, each undirected edge once
+        """
         # Calculate grid dimensions
         lat_per_meter = 1.0 / 111320.0  # Approximate
         lon_per_meter = 1.0 / (111320.0 * np.cos(np.radians(center_lat)))
@@ -70,48 +124,39 @@ class GraphBuilder:
         
         altitude_step = (max_altitude - min_altitude) / max(altitude_levels - 1, 1)
         
-        # Create nodes
-        node_id = 0
-        for i in range(rows):
-            for j in range(cols):
-                for k in range(altitude_levels):
-                    # Calculate position
-                    lat_offset = (i - rows / 2) * resolution * lat_per_meter
-                    lon_offset = (j - cols / 2) * resolution * lon_per_meter
-                    altitude = min_altitude + k * altitude_step
-                    
-                    lat = center_lat + lat_offset
-                    lon = center_lon + lon_offset
-                    
-                    node_key = f"n_{i}_{j}_{k}"
-                    graph.add_node(node_key, lat, lon, altitude)
-                    node_id += 1
-        
-        # Create edges (connect neighbors in 3D space)
-        for i in range(rows):
-            for j in range(cols):
-                for k in range(altitude_levels):
-                    node_key = f"n_{i}_{j}_{k}"
-                    
-                    # Horizontal neighbors
-                    if j < cols - 1:
-                        neighbor_key = f"n_{i}_{j+1}_{k}"
-                        self._add_edge_if_valid(graph, node_key, neighbor_key)
-                    
-                    if i < rows - 1:
-                        neighbor_key = f"n_{i+1}_{j}_{k}"
-                        self._add_edge_if_valid(graph, node_key, neighbor_key)
-                    
-                    # Vertical neighbors (altitude changes)
-                    if k < altitude_levels - 1:
-                        neighbor_key = f"n_{i}_{j}_{k+1}"
-                        self._add_edge_if_valid(graph, node_key, neighbor_key)
-                    
-                    if k > 0:
-                        neighbor_key = f"n_{i}_{j}_{k-1}"
-                        self._add_edge_if_valid(graph, node_key, neighbor_key)
+        # Node grid indices in (row, col, level) order, flattened row-major
+        I, J, K = np.meshgrid(np.arange(rows), np.arange(cols), np.arange(altitude_levels), indexing='ij')
+        I, J, K = I.ravel(), J.ravel(), K.ravel()
         
-        return graph
+        # Calculate positions for all nodes at once
+        lats = center_lat + (I - rows / 2) * resolution * lat_per_meter
+        lons = center_lon + (J - cols / 2) * resolution * lon_per_meter
+        alts = min_altitude + K * altitude_step
+        
+        node_keys = tuple(f"n_{i}_{j}_{k}" for i, j, k in zip(I.tolist(), J.tolist(), K.tolist()))
+        
+        # Candidate edges by offset arithmetic on the flat index: east, north and up
+        # (each undirected pair once; the node's edges are added in that order)
+        flat = np.arange(I.size).reshape(rows, cols, altitude_levels)
+        level_stride = 1
+        col_stride = altitude_levels
+        row_stride = cols * altitude_levels
+        candidates = np.full((I.size, 3), -1, dtype=np.int64)
+        candidates[:, 0] = np.where(J < cols - 1, flat.ravel() + col_stride, -1)
+        candidates[:, 1] = np.where(I < rows - 1, flat.ravel() + row_stride, -1)
+        candidates[:, 2] = np.where(K < altitude_levels - 1, flat.ravel() + level_stride, -1)
+        sources = np.repeat(flat.ravel(), 3)
+        targets = candidates.ravel()
+        mask = targets >= 0
+        sources, targets = sources[mask], targets[mask]
+        
+        # Vertical edges are costed top-down, matching the weight the upper node used
+        # to overwrite when both directions were added
+        vertical = targets - sources == level_stride
+        sources, targets = np.where(vertical, targets, sources), np.where(vertical, sources, targets)
+        edge_pairs = tuple(zip(sources.tolist(), targets.tolist()))
+        
+        return node_keys, tuple(lats.tolist()), tuple(lons.tolist()), tuple(alts.tolist()), edge_pairs
     
     def build_waypoint_graph(self, waypoints: List[Waypoint], 
                             connect_all: bool = False,
@@ -139,40 +184,36 @@ class GraphBuilder:
                 waypoint_type=wp.waypoint_type
             )
         
+        # Pairwise ground distances in one vectorized pass; kept on the graph so
+        # waypoint ordering can reuse them instead of recomputing the Haversine terms
+        lats = np.array([wp.latitude for wp in waypoints], dtype=np.float64)
+        lons = np.array([wp.longitude for wp in waypoints], dtype=np.float64)
+        alts = np.array([wp.altitude for wp in waypoints], dtype=np.float64)
+        horizontal = NavigationGraph.haversine_matrix(lats, lons)
+        distances = np.sqrt(horizontal ** 2 + (alts[None, :] - alts[:, None]) ** 2).tolist()
+        
         # Connect waypoints
-        for i, wp1 in enumerate(waypoints):
+        for i in range(len(waypoints)):
             node1_id = f"wp_{i}"
-            for j, wp2 in enumerate(waypoints):
+            row = distances[i]
+            for j in range(len(waypoints)):
                 if i == j:
                     continue
                 
                 node2_id = f"wp_{j}"
                 
                 # Check distance constraint
-                if max_distance is not None:
-                    distance = self.cost_model.calculate_distance(
-                        wp1.latitude, wp1.longitude, wp1.altitude,
-                        wp2.latitude, wp2.longitude, wp2.altitude
-                    )
-                    if distance > max_distance:
-                        continue
+                if max_distance is not None and row[j] > max_distance:
+                    continue
                 
-                # Add edge if valid
-                if connect_all or self._should_connect(wp1, wp2):
+                # Add edge if valid (otherwise connect only within the drone's max range)
+                if connect_all or row[j] <= self.drone.max_range:
                     self._add_edge_if_valid(graph, node1_id, node2_id)
         
+        # Adding edges dropped the graph's cache; node order matches waypoints
+        graph.cached('horizontal_distances', lambda: horizontal)
         return graph
     
-    def _should_connect(self, wp1: Waypoint, wp2: Waypoint) -> bool:
-        """Determine if two waypoints should be connected.
-        Simple heuristic: connect if within reasonable distance."""
-        distance = self.cost_model.calculate_distance(
-            wp1.latitude, wp1.longitude, wp1.altitude,
-            wp2.latitude, wp2.longitude, wp2.altitude
-        )
-        # Connect if within drone's max range
-        return distance <= self.drone.max_range
-    
     def _add_edge_if_valid(self, graph: NavigationGraph, node1: str, node2: str,
                           is_node1_ground: bool = False, is_node2_ground: bool = False):
         """Add edge to graph if it's valid.
@@ -204,11 +245,25 @@ class GraphBuilder:
     
     def find_nearest_node(self, graph: NavigationGraph, 
                          latitude: float, longitude: float, altitude: float) -> Optional[str]:
-        """Find nearest node in graph to given coordinates."""
+        """Find nearest node in graph to given coordinates.
+        
+        A KD-tree cached on the graph narrows the search to a few candidates, which
+        are then ranked by the exact cost model distance.
+        """
+        node_ids = graph.node_ids()
+        if not node_ids:
+            return None
+        
+        k = min(self.NEAREST_NODE_CANDIDATES, len(node_ids))
+        query = graph.spatial_points([longitude], [latitude], [altitude])[0]
+        _, candidates = graph.spatial_index().query(query, k=k)
+        
         min_distance = float('inf')
         nearest_node = None
         
-        for node_id in graph.nodes():
+        # Scan candidates in index order so ties resolve to the first node, as a full scan would
+        for i in sorted(np.atleast_1d(candidates).tolist()):
+            node_id = node_ids[i]
             pos = graph.get_node_position(node_id)
             distance = self.cost_model.calculate_distance(
                 latitude, longitude, altitude,
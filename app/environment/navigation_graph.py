@@ -1,10 +1,17 @@
 """Navigation graph for pathfinding."""
-from typing import Dict, List, Tuple, Optional, Set
+from typing import Callable, Dict, Iterable, List, Tuple, Optional, Set, Sequence
+import math
 import networkx as nx
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
 from shapely.geometry import Point, LineString
 from app.domain.waypoint import Waypoint
 from app.domain.constraints import MissionConstraints
 
+EARTH_RADIUS_M = 6371000.0  # Same radius as CostModel's haversine distance
+
 
 class NavigationGraph:
     """Navigation graph for pathfinding algorithms."""
@@ -18,6 +25,32 @@ class NavigationGraph:
         """
         self.graph = graph if graph is not None else nx.Graph()
         self.cost_model = cost_model  # Store CostModel for algorithms that need it
+        
+        # Integer-indexed views of the graph (node order, CSR adjacency, positions).
+        # Built lazily and dropped whenever the graph is mutated through this class.
+        self._version = 0
+        self._array_cache: Dict[str, object] = {}
+    
+    def invalidate(self):
+        """Drop cached array views after the underlying graph has changed."""
+        self._version += 1
+        self._array_cache = {}
+    
+    def cached(self, key: str, build: Callable[[], object]) -> object:
+        """Get a derived structure, building it once per graph version.
+        
+        Args:
+            key: Cache key
+            build: Zero-argument factory called on a cache miss
+        
+        Returns:
+            Cached value, dropped by invalidate()
+        """
+        value = self._array_cache.get(key)
+        if value is None:
+            value = build()
+            self._array_cache[key] = value
+        return value
     
     def add_node(self, node_id: str, latitude: float, longitude: float, altitude: float,
                  waypoint_type: str = "target"):
@@ -38,6 +71,7 @@ class NavigationGraph:
             waypoint_type=waypoint_type,
             pos=(longitude, latitude, altitude)  # For 3D visualization
         )
+        self.invalidate()
     
     def add_edge(self, node1: str, node2: str, weight: float, **attributes):
         """Add an edge between two nodes.
@@ -49,6 +83,36 @@ class NavigationGraph:
             **attributes: Additional edge attributes
         """
         self.graph.add_edge(node1, node2, weight=weight, **attributes)
+        self.invalidate()
+    
+    def add_nodes_bulk(self, node_ids: Sequence[str], latitudes: Sequence[float],
+                       longitudes: Sequence[float], altitudes: Sequence[float],
+                       waypoint_type: str = "target"):
+        """Add many nodes at once (same attributes as add_node, one cache invalidation).
+        
+        Args:
+            node_ids: Unique node identifiers
+            latitudes: Latitude per node
+            longitudes: Longitude per node
+            altitudes: Altitude per node in meters
+            waypoint_type: Type shared by all nodes
+        """
+        self.graph.add_nodes_from(
+            (node_id, {
+                'latitude': lat,
+                'longitude': lon,
+                'altitude': alt,
+                'waypoint_type': waypoint_type,
+                'pos': (lon, lat, alt)
+            })
+            for node_id, lat, lon, alt in zip(node_ids, latitudes, longitudes, altitudes)
+        )
+        self.invalidate()
+    
+    def add_edges_bulk(self, edges: Iterable[Tuple[str, str, float]]):
+        """Add many (node1, node2, weight) edges at once with one cache invalidation."""
+        self.graph.add_weighted_edges_from(edges)
+        self.invalidate()
     
     def get_node_position(self, node_id: str) -> Tuple[float, float, float]:
         """Get node position (lon, lat, alt)."""
@@ -65,6 +129,36 @@ class NavigationGraph:
             waypoint_type=node.get('waypoint_type', 'target')
         )
     
+    def get_node_waypoints_bulk(self, node_ids: Sequence[str]) -> List[Waypoint]:
+        """Get waypoints for many nodes at once.
+        
+        Node attributes are read from a table built once per graph version, so
+        no per-node graph lookups happen here. A new Waypoint is created for every
+        entry because callers mutate waypoint type/altitude in place.
+        """
+        fields = self._array_cache.get('waypoint_fields')
+        if fields is None:
+            nodes = self.graph.nodes
+            fields = {
+                node_id: (data['latitude'], data['longitude'], data['altitude'],
+                          data.get('waypoint_type', 'target'))
+                for node_id, data in nodes.items()
+            }
+            self._array_cache['waypoint_fields'] = fields
+        return [
+            Waypoint(latitude=lat, longitude=lon, altitude=alt, waypoint_type=wp_type)
+            for lat, lon, alt, wp_type in map(fields.__getitem__, node_ids)
+        ]
+    
+    def get_node_coordinates_bulk(self, node_ids: Sequence[str]) -> np.ndarray:
+        """Get (latitude, longitude, altitude) rows for many nodes as an (N, 3) float64 array.
+        
+        Gathers from the cached position array, so no Waypoint objects are created.
+        """
+        index = self.node_index()
+        rows = np.fromiter(map(index.__getitem__, node_ids), dtype=np.intp, count=len(node_ids))
+        return self.positions_array()[rows][:, [1, 0, 2]]
+    
     def get_neighbors(self, node_id: str) -> List[str]:
         """Get neighbor node IDs."""
         return list(self.graph.neighbors(node_id))
@@ -101,6 +195,52 @@ class NavigationGraph:
         # Fallback to cached weight (calculated with current_speed=0.0)
         return self.graph[node1][node2].get('weight', 1.0)
     
+    def get_edge_weight_checked(self, node1: str, node2: str, current_speed: float = 0.0) -> float:
+        """Get edge weight, or infinity if the edge is currently invalid.
+        
+        Fuses the cost model validity check (no-fly zones, altitude, weather) with
+        the weight query so both share one position lookup.
+        
+        Args:
+            node1: First node ID
+            node2: Second node ID
+            current_speed: Current speed at node1 (m/s) for inertia calculation
+            
+        Returns:
+            Edge weight (cost), or math.inf if the edge is missing or invalid
+        """
+        adj = self.graph.adj
+        edge = adj[node1].get(node2) if node1 in adj else None
+        if edge is None:
+            return math.inf
+        
+        cost_model = self.cost_model
+        if not cost_model:
+            return edge.get('weight', 1.0)
+        
+        nodes = self.graph.nodes
+        pos1 = nodes[node1].get('pos', (0.0, 0.0, 0.0))
+        pos2 = nodes[node2].get('pos', (0.0, 0.0, 0.0))
+        if current_speed > 0:
+            # Dynamic cost with current speed (accounts for inertia); the cost model checks
+            # the edge and prices it in one pass, returning infinity when it is invalid
+            _, cost = cost_model.evaluate_edge(
+                pos1[1], pos1[0], pos1[2],  # lat, lon, alt
+                pos2[1], pos2[0], pos2[2],
+                current_speed
+            )
+            return cost
+        
+        is_valid, _ = cost_model.is_valid_edge(
+            pos1[1], pos1[0], pos1[2],  # lat, lon, alt
+            pos2[1], pos2[0], pos2[2],
+            is_start_ground=False,
+            is_end_ground=False
+        )
+        if not is_valid:
+            return math.inf
+        return edge.get('weight', 1.0)
+    
     def has_node(self, node_id: str) -> bool:
         """Check if node exists."""
         return self.graph.has_node(node_id)
@@ -124,4 +264,160 @@ class NavigationGraph:
     def number_of_edges(self) -> int:
         """Get number of edges."""
         return self.graph.number_of_edges()
-
+    
+    def node_ids(self) -> List[str]:
+        """Get node IDs in integer-index order (index i -> node_ids()[i])."""
+        ids = self._array_cache.get('node_ids')
+        if ids is None:
+            ids = list(self.graph.nodes())
+            self._array_cache['node_ids'] = ids
+        return ids
+    
+    def node_index(self) -> Dict[str, int]:
+        """Get mapping from node ID to its integer index."""
+        index = self._array_cache.get('node_index')
+        if index is None:
+            index = {node_id: i for i, node_id in enumerate(self.node_ids())}
+            self._array_cache['node_index'] = index
+        return index
+    
+    def positions_array(self) -> np.ndarray:
+        """Get node positions as an (N, 3) float64 array of (lon, lat, alt) in index order."""
+        positions = self._array_cache.get('positions')
+        if positions is None:
+            nodes = self.graph.nodes
+            positions = np.array(
+                [nodes[node_id].get('pos', (0.0, 0.0, 0.0)) for node_id in self.node_ids()],
+                dtype=np.float64
+            ).reshape(-1, 3)
+            self._array_cache['positions'] = positions
+        return positions
+    
+    def position_columns(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Get node positions as separate contiguous (lon, lat, alt) float64 arrays.
+        
+        Structure-of-arrays layout for kernels that read one coordinate across many
+        nodes; index i matches node_ids()[i].
+        """
+        return self.cached('position_columns', lambda: tuple(
+            np.ascontiguousarray(column) for column in self.positions_array().T
+        ))
+    
+    def cos_latitudes(self) -> np.ndarray:
+        """Get |cos(latitude)| per node, the longitude-to-meters scale factor, in index order."""
+        return self.cached('cos_latitudes', lambda: np.abs(np.cos(np.radians(self.position_columns()[1]))))
+    
+    def horizontal_distances(self) -> np.ndarray:
+        """Get pairwise Haversine ground distances in meters as an (N, N) array, in index order."""
+        def build():
+            lon, lat, _ = self.position_columns()
+            return self.haversine_matrix(lat, lon)
+        return self.cached('horizontal_distances', build)
+    
+    @staticmethod
+    def haversine_matrix(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        """Pairwise Haversine distance in meters: [i, j] is the distance from point i to point j."""
+        lat_rad = np.radians(lat)
+        delta_lat = np.radians(lat[None, :] - lat[:, None])
+        delta_lon = np.radians(lon[None, :] - lon[:, None])
+        
+        a = np.sin(delta_lat / 2) ** 2 + np.cos(lat_rad)[:, None] * np.cos(lat_rad)[None, :] * np.sin(delta_lon / 2) ** 2
+        c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+        
+        return EARTH_RADIUS_M * c
+    
+    def spatial_index(self) -> cKDTree:
+        """Get a KD-tree over node positions for nearest-node queries.
+        
+        Points are (x, y, z, alt) in meters, with (x, y, z) on a sphere of the
+        haversine Earth radius, so tree distances are chord-length approximations of the
+        haversine + altitude distance; query candidates should be re-ranked exactly.
+        """
+        return self.cached('spatial_index', lambda: cKDTree(
+            self.spatial_points(*self.position_columns())
+        ))
+    
+    @staticmethod
+    def spatial_points(lon: np.ndarray, lat: np.ndarray, alt: np.ndarray) -> np.ndarray:
+        """Map (lon, lat, alt) to the (x, y, z, alt) space of spatial_index()."""
+        lat_rad = np.radians(lat)
+        lon_rad = np.radians(lon)
+        cos_lat = np.cos(lat_rad)
+        return np.column_stack((
+            EARTH_RADIUS_M * cos_lat * np.cos(lon_rad),
+            EARTH_RADIUS_M * cos_lat * np.sin(lon_rad),
+            EARTH_RADIUS_M * np.sin(lat_rad),
+            alt
+        ))
+    
+    def coordinate_lists(self) -> Tuple[List[float], List[float], List[float], List[float]]:
+        """Get (lon, lat, alt, cos_lat) per node as Python lists, in index order.
+        
+        For searches that stay in the interpreter, where list indexing is faster than
+        numpy element access.
+        """
+        return self.cached('coordinate_lists', lambda: tuple(
+            column.tolist() for column in (*self.position_columns(), self.cos_latitudes())
+        ))
+    
+    def to_csr(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Get adjacency in CSR form using the cached (static) edge weights.
+        
+        Returns:
+            (indptr, indices, weights): neighbors of node i are
+            indices[indptr[i]:indptr[i + 1]] with matching weights.
+        """
+        csr = self._array_cache.get('csr')
+        if csr is None:
+            index = self.node_index()
+            adj = self.graph.adj
+            indptr = np.zeros(len(index) + 1, dtype=np.int32)
+            indices = []
+            weights = []
+            for i, node_id in enumerate(self.node_ids()):
+                for neighbor, data in adj[node_id].items():
+                    indices.append(index[neighbor])
+                    weights.append(data.get('weight', 1.0))
+                indptr[i + 1] = len(indices)
+            csr = (
+                indptr,
+                np.asarray(indices, dtype=np.int32),
+                np.asarray(weights, dtype=np.float64)
+            )
+            self._array_cache['csr'] = csr
+        return csr
+    
+    def csr_lists(self) -> Tuple[List[int], List[int], List[float]]:
+        """Get to_csr() as plain Python lists (indptr, indices, weights).
+        
+        For searches that stay in the interpreter and need static edge weights
+        alongside neighbor indices.
+        """
+        return self.cached('csr_lists', lambda: tuple(array.tolist() for array in self.to_csr()))
+    
+    def component_labels(self) -> List[int]:
+        """Get the connected component label of each node, in index order.
+        
+        Two nodes can only be joined by a path if their labels are equal, so searches
+        can reject disconnected start/goal pairs without exploring the graph.
+        """
+        def build():
+            indptr, indices, weights = self.to_csr()
+            n = len(indptr) - 1
+            adjacency = csr_matrix((np.ones_like(weights), indices, indptr), shape=(n, n))
+            _, labels = connected_components(adjacency, directed=False)
+            return labels.tolist()
+        return self.cached('component_labels', build)
+    
+    def neighbor_index_lists(self) -> List[List[int]]:
+        """Get adjacency as plain lists of neighbor indices (same order as get_neighbors).
+        
+        Cheaper than numpy element access for searches that stay in Python.
+        """
+        neighbors = self._array_cache.get('neighbor_lists')
+        if neighbors is None:
+            index = self.node_index()
+            adj = self.graph.adj
+            neighbors = [[index[neighbor] for neighbor in adj[node_id]] for node_id in self.node_ids()]
+            self._array_cache['neighbor_lists'] = neighbors
+        return neighbors
@@ -29,4 +29,15 @@ class JSONExporter:
         """
         with open(file_path, 'w', encoding='utf-8') as f:
             json.dump(route.to_dict(), f, indent=2, ensure_ascii=False)
-
+    
+    @staticmethod
+    def dumps(route: Route) -> bytes:
+        """Serialize route to JSON (UTF-8), matching export_route's file contents.
+        
+        Args:
+            route: Route to export
+        
+        Returns:
+            JSON document
+        """
+        return json.dumps(route.to_dict(), indent=2, ensure_ascii=False).encode('utf-8')
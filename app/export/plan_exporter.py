@@ -98,14 +98,35 @@ class PlanExporter:
     def export_route(route: Route, file_path: str, drone: Optional[Drone] = None, mission: Optional[Mission] = None):
         """Export a single route to .plan file.
         
-        Format: INDEX, CURRENT_WP, COORD_FRAME, COMMAND, PARAM1, PARAM2, PARAM3, PARAM4, PARAM5/X, PARAM6/Y, PARAM7/Z, AUTOCONTINUE
-        
         Args:
             route: Route to export
             file_path: Output file path
             drone: Drone object (optional, for max_speed and other parameters)
             mission: Mission object (optional, to find drone if not provided)
         """
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(PlanExporter._format_route(route, drone, mission))
+    
+    @staticmethod
+    def dumps(route: Route, drone: Optional[Drone] = None, mission: Optional[Mission] = None) -> bytes:
+        """Serialize a single route to .plan file contents (UTF-8), without touching disk.
+        
+        Args:
+            route: Route to export
+            drone: Drone object (optional, for max_speed and other parameters)
+            mission: Mission object (optional, to find drone if not provided)
+        
+        Returns:
+            .plan file contents
+        """
+        return PlanExporter._format_route(route, drone, mission).encode('utf-8')
+    
+    @staticmethod
+    def _format_route(route: Route, drone: Optional[Drone], mission: Optional[Mission]) -> str:
+        """Build the .plan text for a route.
+        
+        Format: INDEX, CURRENT_WP, COORD_FRAME, COMMAND, PARAM1, PARAM2, PARAM3, PARAM4, PARAM5/X, PARAM6/Y, PARAM7/Z, AUTOCONTINUE
+        """
         # Try to get drone if not provided
         if drone is None and mission is not None and route.drone_name:
             drone = next((d for d in mission.drones if d.name == route.drone_name), None)
@@ -238,9 +259,7 @@ class PlanExporter:
             waypoint_index += 1
             previous_speed = speed
         
-        # Write to file
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(lines))
+        return '\n'.join(lines)
     
     @staticmethod
     def export_mission(mission: Mission, output_dir: str):
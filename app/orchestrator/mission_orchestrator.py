@@ -7,6 +7,10 @@ from app.planning.route_planner import RoutePlanner
 from app.validation.constraint_checker import ConstraintChecker
 from app.weather.weather_provider import WeatherConditions
 from app.environment.navigation_graph import NavigationGraph
+from app.planning.a_star import AStar
+from app.planning.theta_star import ThetaStar
+from app.planning.d_star import DStar
+from app.planning._jit import NUMBA_AVAILABLE
 
 
 class MissionOrchestrator:
@@ -161,32 +165,21 @@ class MissionOrchestrator:
                     )
                     
                     # Plan route using pathfinding algorithm
-                    # Use same weather manager from main planner for consistency
-                    temp_planner = RoutePlanner(
-                        temp_mission, 
-                        weather_data=self.weather_data,
-                        use_weather=self.use_weather,
-                        weather_timestamp=self.weather_timestamp
-                    )
-                    # Share weather manager to maintain cache
-                    if hasattr(self.planner, 'weather_manager') and self.planner.weather_manager:
-                        temp_planner.weather_manager = self.planner.weather_manager
-                    
-                    route = temp_planner.plan_single_drone_route(
+                    # The main planner plans the drone's share directly, so its weather
+                    # manager (and pre-fetched weather) and graph cache are reused
+                    route = self.planner.plan_single_drone_route(
                         drone,
                         algorithm=algorithm,
-                        optimization_metric=optimization_metric
+                        optimization_metric=optimization_metric,
+                        mission=temp_mission
                     )
                     
-                    # Update weather_data from temp_planner
+                    # Update weather_data from the planner's weather manager
                     if self.weather_data is None:
                         self.weather_data = {}
-                    if hasattr(temp_planner, 'weather_manager') and temp_planner.weather_manager:
-                        weather_update = temp_planner.weather_manager.get_all_weather_data()
-                        if weather_update:
-                            self.weather_data.update(weather_update)
-                    elif hasattr(temp_planner, 'weather_data') and temp_planner.weather_data:
-                        self.weather_data.update(temp_planner.weather_data)
+                    weather_update = self.planner.weather_manager.get_all_weather_data()
+                    if weather_update:
+                        self.weather_data.update(weather_update)
                     
                     if route:
                         routes[drone.name] = route
@@ -309,4 +302,55 @@ class MissionOrchestrator:
             self.mission.add_route(drone_name, route)
         
         return route
-
+    
+    def update_weather(self, weather_data: Dict[tuple[float, float], WeatherConditions]) -> Dict[str, Route]:
+        """Apply refreshed weather and incrementally replan the routes planned with D*.
+        
+        Args:
+            weather_data: Dictionary mapping (lat, lon) to new WeatherConditions
+        
+        Returns:
+            Replanned routes by drone name (drones whose route is now blocked keep
+            their old route and are left out)
+        """
+        routes = {}
+        for drone_name, route in self.planner.update_weather(weather_data).items():
+            if route is None:
+                continue
+            drone = next(d for d in self.mission.drones if d.name == drone_name)
+            validation_result = self.checker.validate_route(route, drone, self.mission.constraints)
+            route.validation_result = validation_result.to_dict() if hasattr(validation_result, 'to_dict') else validation_result
+            self.mission.add_route(drone_name, route)
+            routes[drone_name] = route
+        
+        self.weather_data = self.planner.weather_manager.get_all_weather_data()
+        return routes
+    
+    @staticmethod
+    def warmup_jit() -> bool:
+        """Compile the Numba planning kernels ahead of the first real mission.
+        
+        Runs A* (bidirectional CSR kernel), Theta* and D* (including a replan) on a
+        3x3 grid so every kernel is compiled for the array types real graphs use.
+        
+        Returns:
+            True if the kernels are JIT-compiled, False when numba is unavailable
+        """
+        if not NUMBA_AVAILABLE:
+            return False
+        
+        graph = NavigationGraph()
+        for i in range(9):
+            graph.add_node(f"n{i}", 50.0 + 0.001 * (i // 3), 30.0 + 0.001 * (i % 3), 50.0)
+        for i in range(9):
+            if i % 3 < 2:
+                graph.add_edge(f"n{i}", f"n{i + 1}", 72.0)
+            if i < 6:
+                graph.add_edge(f"n{i}", f"n{i + 3}", 111.0)
+        
+        AStar(graph).find_path("n0", "n8")
+        ThetaStar(graph).find_path("n0", "n8")
+        d_star = DStar(graph)
+        d_star.find_path("n0", "n8")
+        d_star.replan([("n0", "n1", 500.0)])
+        return True
@@ -0,0 +1,203 @@
+"""Numba kernel for A* over an integer-indexed CSR graph."""
+import numpy as np
+from app.planning._jit import njit, prange
+
+
+@njit(cache=True)
+def heap_push(keys, nodes, size, key, node):
+    """Push (key, node) onto a binary min-heap stored in parallel arrays.
+    
+    Returns:
+        New heap size
+    """
+    i = size
+    keys[i] = key
+    nodes[i] = node
+    while i > 0:
+        parent = (i - 1) >> 1
+        if keys[parent] <= keys[i]:
+            break
+        keys[parent], keys[i] = keys[i], keys[parent]
+        nodes[parent], nodes[i] = nodes[i], nodes[parent]
+        i = parent
+    return size + 1
+
+
+@njit(cache=True)
+def heap_pop(keys, nodes, size):
+    """Pop the minimum entry from a binary min-heap stored in parallel arrays.
+    
+    Returns:
+        (key, node, new_size)
+    """
+    key = keys[0]
+    node = nodes[0]
+    size -= 1
+    keys[0] = keys[size]
+    nodes[0] = nodes[size]
+    i = 0
+    while True:
+        left = 2 * i + 1
+        if left >= size:
+            break
+        child = left
+        if left + 1 < size and keys[left + 1] < keys[left]:
+            child = left + 1
+        if keys[i] <= keys[child]:
+            break
+        keys[child], keys[i] = keys[i], keys[child]
+        nodes[child], nodes[i] = nodes[i], nodes[child]
+        i = child
+    return key, node, size
+
+
+@njit(cache=True)
+def _distance(lon, lat, alt, coslat, i, j):
+    """Equirectangular 3D distance in meters between nodes i and j."""
+    lat_m = (lat[j] - lat[i]) * 111320.0
+    lon_m = (lon[j] - lon[i]) * 111320.0 * coslat[i]
+    alt_m = alt[j] - alt[i]
+    return np.sqrt(lat_m * lat_m + lon_m * lon_m + alt_m * alt_m)
+
+
+@njit(cache=True)
+def _reconstruct(came_from, node, out, pos):
+    """Write the came_from chain ending at node into out[pos - len:pos], start first.
+    
+    Returns:
+        Index of the first written element
+    """
+    while node != -1:
+        pos -= 1
+        out[pos] = node
+        node = came_from[node]
+    return pos
+
+
+@njit(cache=True, parallel=True, nogil=True)
+def _average_potential(lon, lat, alt, coslat, start_idx, goal_idx):
+    """Compute p(v) = (h(v, goal) - h(v, start)) / 2 for every node, in parallel.
+    
+    Each entry is independent, so the O(N) sweep is split across threads; the
+    search itself stays sequential because every heap update depends on the last.
+    """
+    n = lon.shape[0]
+    potential = np.empty(n, dtype=np.float64)
+    for v in prange(n):
+        potential[v] = 0.5 * (_distance(lon, lat, alt, coslat, v, goal_idx) -
+                              _distance(lon, lat, alt, coslat, v, start_idx))
+    return potential
+
+
+@njit(cache=True, nogil=True)
+def bidirectional_astar_core(indptr, indices, weights, lon, lat, alt, coslat, start_idx, goal_idx):
+    """Run bidirectional A* on an undirected CSR graph with static edge weights.
+    
+    Both searches use the average potential p(v) = (h(v, goal) - h(v, start)) / 2
+    (negated for the reverse search), so they explore the same reduced-cost graph
+    and can stop as soon as top_forward + top_reverse >= best meeting cost.
+    
+    Args:
+        indptr, indices, weights: CSR adjacency (see NavigationGraph.to_csr)
+        lon, lat, alt: (N,) node coordinates (see NavigationGraph.position_columns)
+        coslat: (N,) cosine of each node's latitude
+        start_idx: Start node index
+        goal_idx: Goal node index
+    
+    Returns:
+        int32 array of node indices from start to goal (empty if no path)
+    """
+    n = indptr.shape[0] - 1
+    if start_idx == goal_idx:
+        path = np.empty(1, dtype=np.int32)
+        path[0] = start_idx
+        return path
+    
+    potential = _average_potential(lon, lat, alt, coslat, start_idx, goal_idx)
+    
+    g_f = np.full(n, np.inf)
+    g_r = np.full(n, np.inf)
+    came_from_f = np.full(n, -1, dtype=np.int32)
+    came_from_r = np.full(n, -1, dtype=np.int32)
+    closed_f = np.zeros(n, dtype=np.uint8)
+    closed_r = np.zeros(n, dtype=np.uint8)
+    
+    capacity = indices.shape[0] + 1
+    keys_f = np.empty(capacity, dtype=np.float64)
+    nodes_f = np.empty(capacity, dtype=np.int32)
+    keys_r = np.empty(capacity, dtype=np.float64)
+    nodes_r = np.empty(capacity, dtype=np.int32)
+    
+    g_f[start_idx] = 0.0
+    g_r[goal_idx] = 0.0
+    size_f = heap_push(keys_f, nodes_f, 0, potential[start_idx], start_idx)
+    size_r = heap_push(keys_r, nodes_r, 0, -potential[goal_idx], goal_idx)
+    
+    best = np.inf
+    meet = -1
+    
+    while size_f > 0 and size_r > 0:
+        if keys_f[0] + keys_r[0] >= best:
+            break
+        
+        forward = keys_f[0] <= keys_r[0]
+        if forward:
+            _, u, size_f = heap_pop(keys_f, nodes_f, size_f)
+            if closed_f[u]:
+                continue
+            closed_f[u] = 1
+        else:
+            _, u, size_r = heap_pop(keys_r, nodes_r, size_r)
+            if closed_r[u]:
+                continue
+            closed_r[u] = 1
+        
+        for e in range(indptr[u], indptr[u + 1]):
+            v = indices[e]
+            if forward:
+                if closed_f[v]:
+                    continue
+                tentative_g = g_f[u] + weights[e]
+                if tentative_g < g_f[v]:
+                    g_f[v] = tentative_g
+                    came_from_f[v] = u
+                    size_f = heap_push(keys_f, nodes_f, size_f, tentative_g + potential[v], v)
+                    if tentative_g + g_r[v] < best:
+                        best = tentative_g + g_r[v]
+                        meet = v
+            else:
+                if closed_r[v]:
+                    continue
+                tentative_g = g_r[u] + weights[e]
+                if tentative_g < g_r[v]:
+                    g_r[v] = tentative_g
+                    came_from_r[v] = u
+                    size_r = heap_push(keys_r, nodes_r, size_r, tentative_g - potential[v], v)
+                    if tentative_g + g_f[v] < best:
+                        best = tentative_g + g_f[v]
+                        meet = v
+    
+    if meet == -1:
+        return np.empty(0, dtype=np.int32)
+    
+    # Forward half: start..meet, reverse half: meet..goal (skip meet itself)
+    forward_len = 0
+    node = meet
+    while node != -1:
+        forward_len += 1
+        node = came_from_f[node]
+    reverse_len = 0
+    node = came_from_r[meet]
+    while node != -1:
+        reverse_len += 1
+        node = came_from_r[node]
+    
+    path = np.empty(forward_len + reverse_len, dtype=np.int32)
+    _reconstruct(came_from_f, meet, path, forward_len)
+    node = came_from_r[meet]
+    k = forward_len
+    while node != -1:
+        path[k] = node
+        k += 1
+        node = came_from_r[node]
+    return path
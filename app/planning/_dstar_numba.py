@@ -0,0 +1,194 @@
+"""Numba kernels for D* over an integer-indexed CSR graph.
+
+Search state lives in flat arrays owned by the caller so it survives between
+the initial search and later replans:
+
+    g, rhs: (N,) float32 path cost estimates (kernels also accept float64)
+    heap_k1, heap_k2: (N,) float64 keys of the open heap entries
+    heap_seq: (N,) int64 insertion sequence numbers (break key ties)
+    heap_node: (N,) int32 node index of each heap slot
+    heap_pos: (N,) int32 heap slot of each node, -1 when not open
+    meta: (2,) int64 [heap size, next sequence number]
+"""
+import numpy as np
+from app.planning._jit import njit
+from app.planning._astar_numba import _distance
+
+
+@njit(cache=True)
+def _less(heap_k1, heap_k2, heap_seq, a, b):
+    """Compare heap slots a and b by (k1, k2, seq)."""
+    if heap_k1[a] != heap_k1[b]:
+        return heap_k1[a] < heap_k1[b]
+    if heap_k2[a] != heap_k2[b]:
+        return heap_k2[a] < heap_k2[b]
+    return heap_seq[a] < heap_seq[b]
+
+
+@njit(cache=True)
+def _swap(heap_k1, heap_k2, heap_seq, heap_node, heap_pos, a, b):
+    """Swap heap slots a and b, keeping heap_pos in sync."""
+    heap_k1[a], heap_k1[b] = heap_k1[b], heap_k1[a]
+    heap_k2[a], heap_k2[b] = heap_k2[b], heap_k2[a]
+    heap_seq[a], heap_seq[b] = heap_seq[b], heap_seq[a]
+    heap_node[a], heap_node[b] = heap_node[b], heap_node[a]
+    heap_pos[heap_node[a]] = a
+    heap_pos[heap_node[b]] = b
+
+
+@njit(cache=True)
+def _sift(heap_k1, heap_k2, heap_seq, heap_node, heap_pos, size, i):
+    """Restore heap order around slot i after its key changed (either direction)."""
+    while i > 0:
+        parent = (i - 1) >> 1
+        if not _less(heap_k1, heap_k2, heap_seq, i, parent):
+            break
+        _swap(heap_k1, heap_k2, heap_seq, heap_node, heap_pos, i, parent)
+        i = parent
+    while True:
+        child = 2 * i + 1
+        if child >= size:
+            break
+        if child + 1 < size and _less(heap_k1, heap_k2, heap_seq, child + 1, child):
+            child += 1
+        if not _less(heap_k1, heap_k2, heap_seq, child, i):
+            break
+        _swap(heap_k1, heap_k2, heap_seq, heap_node, heap_pos, i, child)
+        i = child
+
+
+@njit(cache=True)
+def heap_insert(heap_k1, heap_k2, heap_seq, heap_node, heap_pos, meta, node, k1, k2):
+    """Insert node with key (k1, k2), or move it to that key if already open."""
+    size = meta[0]
+    i = heap_pos[node]
+    if i == -1:
+        i = size
+        heap_node[i] = node
+        heap_pos[node] = i
+        meta[0] = size + 1
+    heap_k1[i] = k1
+    heap_k2[i] = k2
+    heap_seq[i] = meta[1]
+    meta[1] += 1
+    _sift(heap_k1, heap_k2, heap_seq, heap_node, heap_pos, meta[0], i)
+
+
+@njit(cache=True)
+def heap_remove(heap_k1, heap_k2, heap_seq, heap_node, heap_pos, meta, node):
+    """Remove node from the open heap if present."""
+    i = heap_pos[node]
+    if i == -1:
+        return
+    last = meta[0] - 1
+    if i != last:
+        _swap(heap_k1, heap_k2, heap_seq, heap_node, heap_pos, i, last)
+    heap_pos[node] = -1
+    meta[0] = last
+    if i != last:
+        _sift(heap_k1, heap_k2, heap_seq, heap_node, heap_pos, last, i)
+
+
+@njit(cache=True)
+def _calculate_key(g, rhs, lon, lat, alt, coslat, start_idx, km, node):
+    """D* key (min(g, rhs) + h(start, node) + km, min(g, rhs))."""
+    k2 = min(g[node], rhs[node])
+    return k2 + _distance(lon, lat, alt, coslat, start_idx, node) + km, k2
+
+
+@njit(cache=True)
+def dstar_update_vertex(indptr, indices, weights, lon, lat, alt, coslat,
+                        g, rhs, heap_k1, heap_k2, heap_seq, heap_node, heap_pos, meta,
+                        start_idx, goal_idx, km, node):
+    """Recompute rhs of node from its neighbors and fix its open-heap entry."""
+    if node != goal_idx:
+        min_rhs = rhs.dtype.type(np.inf)
+        for e in range(indptr[node], indptr[node + 1]):
+            # Branch-free min so LLVM can emit a select instead of a jump
+            min_rhs = min(min_rhs, g[indices[e]] + weights[e])
+        rhs[node] = min_rhs
+
+    heap_remove(heap_k1, heap_k2, heap_seq, heap_node, heap_pos, meta, node)
+    if g[node] != rhs[node]:
+        k1, k2 = _calculate_key(g, rhs, lon, lat, alt, coslat, start_idx, km, node)
+        heap_insert(heap_k1, heap_k2, heap_seq, heap_node, heap_pos, meta, node, k1, k2)
+
+
+@njit(cache=True)
+def dstar_compute(indptr, indices, weights, lon, lat, alt, coslat,
+                  g, rhs, heap_k1, heap_k2, heap_seq, heap_node, heap_pos, meta,
+                  start_idx, goal_idx, km):
+    """Expand the open heap until the start node is consistent (D* Lite main loop)."""
+    # h(start, start) is zero, so the start key is (min(g, rhs) + km, min(g, rhs)); when
+    # the start is consistent that is just its g
+    while meta[0] > 0:
+        k_old1 = heap_k1[0]
+        k_old2 = heap_k2[0]
+        g_start = g[start_idx]
+        if rhs[start_idx] == g_start:
+            ks1 = g_start + km
+            if not (k_old1 < ks1 or (k_old1 == ks1 and k_old2 < g_start)):
+                break
+
+        u = heap_node[0]
+        heap_remove(heap_k1, heap_k2, heap_seq, heap_node, heap_pos, meta, u)
+        k_new1, k_new2 = _calculate_key(g, rhs, lon, lat, alt, coslat, start_idx, km, u)
+
+        if k_old1 < k_new1 or (k_old1 == k_new1 and k_old2 < k_new2):
+            heap_insert(heap_k1, heap_k2, heap_seq, heap_node, heap_pos, meta, u, k_new1, k_new2)
+        elif g[u] > rhs[u]:
+            g[u] = rhs[u]
+            for e in range(indptr[u], indptr[u + 1]):
+                dstar_update_vertex(indptr, indices, weights, lon, lat, alt, coslat,
+                                    g, rhs, heap_k1, heap_k2, heap_seq, heap_node, heap_pos, meta,
+                                    start_idx, goal_idx, km, indices[e])
+        else:
+            g[u] = np.inf
+            dstar_update_vertex(indptr, indices, weights, lon, lat, alt, coslat,
+                                g, rhs, heap_k1, heap_k2, heap_seq, heap_node, heap_pos, meta,
+                                start_idx, goal_idx, km, u)
+            for e in range(indptr[u], indptr[u + 1]):
+                dstar_update_vertex(indptr, indices, weights, lon, lat, alt, coslat,
+                                    g, rhs, heap_k1, heap_k2, heap_seq, heap_node, heap_pos, meta,
+                                    start_idx, goal_idx, km, indices[e])
+
+
+@njit(cache=True)
+def dstar_reconstruct(indptr, indices, weights, g, start_idx, goal_idx):
+    """Follow the cheapest g + edge weight neighbor from start to goal.
+
+    Returns:
+        int32 array of node indices from start to goal (empty if no path)
+    """
+    n = indptr.shape[0] - 1
+    if g[start_idx] == np.inf:
+        return np.empty(0, dtype=np.int32)
+
+    path = np.empty(n, dtype=np.int32)
+    visited = np.zeros(n, dtype=np.uint8)
+    path[0] = start_idx
+    visited[start_idx] = 1
+    length = 1
+    current = start_idx
+
+    while current != goal_idx:
+        best_neighbor = -1
+        best_cost = np.inf
+        for e in range(indptr[current], indptr[current + 1]):
+            neighbor = indices[e]
+            if visited[neighbor]:
+                continue
+            total_cost = g[neighbor] + weights[e]
+            if total_cost < best_cost:
+                best_cost = total_cost
+                best_neighbor = neighbor
+
+        if best_neighbor == -1:
+            return np.empty(0, dtype=np.int32)
+
+        path[length] = best_neighbor
+        length += 1
+        visited[best_neighbor] = 1
+        current = best_neighbor
+
+    return path[:length].copy()
@@ -0,0 +1,20 @@
+"""Optional Numba JIT support for numeric planning kernels."""
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    # numba not installed, kernels run as plain Python
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit (supports bare and parametrized use)."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+        return decorator
+
+    # Without numba, parallel loops are ordinary loops
+    prange = range
@@ -0,0 +1,83 @@
+"""Numba kernel for Theta* over an integer-indexed CSR graph."""
+import numpy as np
+from app.planning._jit import njit
+from app.planning._astar_numba import heap_push, heap_pop, _distance
+
+# Line-of-sight range in meters (matches ThetaStar._line_of_sight without a cost model)
+MAX_LINE_OF_SIGHT_M = 5000.0
+
+
+@njit(cache=True, nogil=True)
+def thetastar_core(indptr, indices, weights, lon, lat, alt, coslat, h_scale, start_idx, goal_idx):
+    """Run Theta* on a CSR graph with static edge weights.
+    
+    Without a cost model there are no no-fly zone checks, so line-of-sight reduces to
+    the distance limit and a shortcut through the parent costs its straight-line length.
+    
+    Args:
+        indptr, indices, weights: CSR adjacency (see NavigationGraph.to_csr)
+        lon, lat, alt: (N,) node coordinates (see NavigationGraph.position_columns)
+        coslat: (N,) cosine of each node's latitude
+        h_scale: Factor applied to the heuristic (relaxation weight times the tie-break scale)
+        start_idx: Start node index
+        goal_idx: Goal node index
+    
+    Returns:
+        int32 array of node indices from start to goal (empty if no path)
+    """
+    n = indptr.shape[0] - 1
+    g_score = np.full(n, np.inf)
+    came_from = np.full(n, -1, dtype=np.int32)
+    closed = np.zeros(n, dtype=np.uint8)
+    
+    # Every relaxation pushes at most once per directed edge, plus the start entry
+    capacity = indices.shape[0] + 1
+    heap_keys = np.empty(capacity, dtype=np.float64)
+    heap_nodes = np.empty(capacity, dtype=np.int32)
+    size = 0
+    
+    g_score[start_idx] = 0.0
+    size = heap_push(heap_keys, heap_nodes, size, 0.0, start_idx)
+    
+    while size > 0:
+        _, current, size = heap_pop(heap_keys, heap_nodes, size)
+        if closed[current]:
+            continue
+        closed[current] = 1
+        
+        if current == goal_idx:
+            length = 0
+            node = current
+            while node != -1:
+                length += 1
+                node = came_from[node]
+            path = np.empty(length, dtype=np.int32)
+            node = current
+            for k in range(length - 1, -1, -1):
+                path[k] = node
+                node = came_from[node]
+            return path
+        
+        parent = came_from[current]
+        g_current = g_score[current]
+        for e in range(indptr[current], indptr[current + 1]):
+            neighbor = indices[e]
+            if closed[neighbor]:
+                continue
+            
+            # Shortcut through the parent when it can see the neighbor, else take the edge
+            via = current
+            tentative_g = g_current + weights[e]
+            if parent != -1:
+                direct = _distance(lon, lat, alt, coslat, parent, neighbor)
+                if direct < MAX_LINE_OF_SIGHT_M:
+                    via = parent
+                    tentative_g = g_score[parent] + direct
+            
+            if tentative_g < g_score[neighbor]:
+                g_score[neighbor] = tentative_g
+                came_from[neighbor] = via
+                f = tentative_g + h_scale * _distance(lon, lat, alt, coslat, neighbor, goal_idx)
+                size = heap_push(heap_keys, heap_nodes, size, f, neighbor)
+    
+    return np.empty(0, dtype=np.int32)
@@ -1,14 +1,24 @@
 """A* pathfinding algorithm implementation."""
-from typing import List, Optional, Dict, Tuple
+from typing import Callable, List, Optional, Tuple
 import heapq
+from functools import partial
+from itertools import repeat
 import math
+import numpy as np
 from app.environment.navigation_graph import NavigationGraph
 from app.domain.waypoint import Waypoint
+from app.planning._jit import NUMBA_AVAILABLE
+from app.planning._astar_numba import bidirectional_astar_core
+
+# (lon, lat, alt, cos_lat) columns indexed by graph node index
+PositionLists = Tuple[List[float], List[float], List[float], List[float]]
 
 
 class AStar:
     """A* pathfinding algorithm."""
     
+    __slots__ = ('graph',)
+    
     def __init__(self, graph: NavigationGraph):
         """Initialize A* with navigation graph.
         
@@ -17,115 +27,194 @@ class AStar:
         """
         self.graph = graph
     
-    def find_path(self, start_node: str, goal_node: str) -> Optional[List[str]]:
+    def find_path(self, start_node: str, goal_node: str, out_list: Optional[List[str]] = None,
+                  skip_first: bool = False) -> Optional[List[str]]:
         """Find path from start to goal using A* algorithm.
         
         Args:
             start_node: Start node ID
             goal_node: Goal node ID
+            out_list: List to append the path to (a new list if None)
+            skip_first: Don't append the start node (already at the end of out_list)
         
         Returns:
-            List of node IDs representing the path, or None if no path found
+            List of node IDs representing the path (out_list if given), or None if no path found
         """
         if not self.graph.has_node(start_node) or not self.graph.has_node(goal_node):
             return None
         
-        # Priority queue: (f_score, node)
+        # Static edge weights (no cost model): run the compiled bidirectional CSR kernel.
+        # Inertia-dependent costs depend on travel direction, so cost-model graphs stay
+        # on the forward-only Python search below.
+        if NUMBA_AVAILABLE and not getattr(self.graph, 'cost_model', None):
+            return self._run_csr_kernel(bidirectional_astar_core, start_node, goal_node, out_list, skip_first)
+        
+        came_from = self._search(start_node, goal_node)
+        if came_from is None:
+            return None
+        return self._reconstruct_path(came_from, goal_node, out_list, skip_first)
+    
+    def _search(self, start_node: str, goal_node: str) -> Optional[List[int]]:
+        """Run A* from start until the goal is closed or the open set is exhausted.
+        
+        Search state is kept in flat lists indexed by the graph's integer node index
+        so membership tests and score updates avoid string hashing.
+        
+        Args:
+            start_node: Start node ID
+            goal_node: Goal node ID
+        
+        Returns:
+            came_from list of parent indices (-1 at the start), or None if the goal is unreachable
+        """
+        node_ids = self.graph.node_ids()
+        index = self.graph.node_index()
+        neighbor_lists = self.graph.neighbor_index_lists()
+        n = len(node_ids)
+        
+        start_idx = index[start_node]
+        goal_idx = index[goal_node]
+        
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        
+        # Priority queue: (f_score, node index)
         open_set = []
-        heapq.heappush(open_set, (0, start_node))
+        heappush(open_set, (0, start_idx))
         
-        # Maps node -> came_from node
-        came_from: Dict[str, Optional[str]] = {start_node: None}
+        # came_from: -1 for the start and for unvisited nodes
+        came_from = [-1] * n
         
         # g_score: cost from start to node
-        g_score: Dict[str, float] = {start_node: 0.0}
+        g_score = [math.inf] * n
+        g_score[start_idx] = 0.0
         
-        # f_score: g_score + heuristic
-        f_score: Dict[str, float] = {start_node: self._heuristic(start_node, goal_node)}
+        # Track speed at each node for inertia calculation (start from rest)
+        node_speed = [0.0] * n
         
-        # Track speed at each node for inertia calculation
-        node_speed: Dict[str, float] = {start_node: 0.0}  # Start from rest
+        closed = bytearray(n)
         
-        closed_set: set = set()
+        # Loop invariants: cost model and drone kinematics don't change during the search
+        cost_model = getattr(self.graph, 'cost_model', None)
+        columns = self.graph.coordinate_lists()
+        get_edge_weight_checked = self.graph.get_edge_weight_checked
+        heuristic_idx = self._heuristic_idx
+        distance_idx = self._distance_idx
+        max_speed = cost_model.drone.max_speed if cost_model else 0.0
+        acceleration = max_speed / 5.0  # Reach max speed in 5 seconds
         
         while open_set:
             # Get node with lowest f_score
-            current_f, current = heapq.heappop(open_set)
+            current_f, current_idx = heappop(open_set)
             
-            if current in closed_set:
+            if closed[current_idx]:
                 continue
             
-            closed_set.add(current)
+            closed[current_idx] = 1
+            current = node_ids[current_idx]
             
             # Check if we reached the goal
-            if current == goal_node:
-                # Reconstruct path
-                path = []
-                node = current
-                while node is not None:
-                    path.append(node)
-                    node = came_from[node]
-                path.reverse()
-                return path
+            if current_idx == goal_idx:
+                return came_from
+            
+            g_current = g_score[current_idx]
+            current_speed_at_node = node_speed[current_idx]
             
             # Explore neighbors
-            for neighbor in self.graph.get_neighbors(current):
-                if neighbor in closed_set:
+            for neighbor_idx in neighbor_lists[current_idx]:
+                if closed[neighbor_idx]:
                     continue
+                neighbor = node_ids[neighbor_idx]
                 
-                # Additional safety check: verify edge is still valid (includes no-fly zone check)
-                # This ensures we don't use edges that might have been invalidated
-                if hasattr(self.graph, 'cost_model') and self.graph.cost_model:
-                    pos1 = self.graph.get_node_position(current)
-                    pos2 = self.graph.get_node_position(neighbor)
-                    is_valid, _ = self.graph.cost_model.is_valid_edge(
-                        pos1[1], pos1[0], pos1[2],  # lat, lon, alt
-                        pos2[1], pos2[0], pos2[2],
-                        is_start_ground=False,
-                        is_end_ground=False
-                    )
-                    if not is_valid:
-                        continue  # Skip this edge if it's invalid (e.g., intersects no-fly zone)
-                
-                # Calculate tentative g_score with current speed for inertia
-                current_speed_at_node = node_speed.get(current, 0.0)
-                edge_weight = self.graph.get_edge_weight(current, neighbor, current_speed=current_speed_at_node)
-                tentative_g = g_score[current] + edge_weight
-                
-                # Estimate speed at neighbor node (for next edge calculation)
-                # Speed increases as we travel, up to max_speed
-                if hasattr(self.graph, 'cost_model') and self.graph.cost_model:
-                    pos1 = self.graph.get_node_position(current)
-                    pos2 = self.graph.get_node_position(neighbor)
-                    distance = self._euclidean_distance_3d(pos1, pos2)
-                    
-                    # Estimate final speed: accelerate from current_speed, but don't exceed max_speed
-                    # Simplified: assume we reach effective speed based on distance
-                    max_speed = self.graph.cost_model.drone.max_speed
-                    acceleration = max_speed / 5.0  # Reach max speed in 5 seconds
-                    time_to_travel = distance / max_speed if max_speed > 0 else 0
-                    
-                    # Estimate speed after traveling this edge
-                    if time_to_travel > 0:
-                        # Accelerate from current_speed
-                        speed_gain = min(acceleration * time_to_travel, max_speed - current_speed_at_node)
-                        estimated_speed = min(max_speed, current_speed_at_node + speed_gain)
-                    else:
-                        estimated_speed = current_speed_at_node
-                else:
-                    estimated_speed = 0.0
+                # Weight with current speed for inertia; infinite if the edge is no longer
+                # valid (e.g., intersects a no-fly zone)
+                edge_weight = get_edge_weight_checked(current, neighbor, current_speed_at_node)
+                if edge_weight == math.inf:
+                    continue
+                tentative_g = g_current + edge_weight
                 
                 # If this path to neighbor is better
-                if neighbor not in g_score or tentative_g < g_score[neighbor]:
-                    came_from[neighbor] = current
-                    g_score[neighbor] = tentative_g
-                    f_score[neighbor] = tentative_g + self._heuristic(neighbor, goal_node)
-                    node_speed[neighbor] = estimated_speed  # Store estimated speed for this node
-                    heapq.heappush(open_set, (f_score[neighbor], neighbor))
-        
-        # No path found
+                if tentative_g < g_score[neighbor_idx]:
+                    # Estimate speed at neighbor node (for next edge calculation)
+                    # Speed increases as we travel, up to max_speed
+                    if not cost_model:
+                        estimated_speed = 0.0
+                    elif current_speed_at_node >= max_speed:
+                        # Already at max speed, nothing left to gain
+                        estimated_speed = current_speed_at_node
+                    else:
+                        distance = distance_idx(current_idx, neighbor_idx, columns)
+                        # Simplified: accelerate from current_speed over the edge travel time
+                        time_to_travel = distance / max_speed
+                        if time_to_travel > 0:
+                            speed_gain = min(acceleration * time_to_travel, max_speed - current_speed_at_node)
+                            estimated_speed = min(max_speed, current_speed_at_node + speed_gain)
+                        else:
+                            estimated_speed = current_speed_at_node
+                    
+                    came_from[neighbor_idx] = current_idx
+                    g_score[neighbor_idx] = tentative_g
+                    node_speed[neighbor_idx] = estimated_speed  # Store estimated speed for this node
+                    f_score = tentative_g + heuristic_idx(neighbor_idx, goal_idx, columns)
+                    heappush(open_set, (f_score, neighbor_idx))
+        
         return None
     
+    def _reconstruct_path(self, came_from: List[int], goal_node: str, out_list: Optional[List[str]] = None,
+                          skip_first: bool = False) -> List[str]:
+        """Walk came_from back from goal to start, appending the forward path to out_list.
+        
+        The path length is counted first so node IDs are written straight into their
+        final slots, without building and reversing a temporary list.
+        """
+        if out_list is None:
+            out_list = []
+        node_ids = self.graph.node_ids()
+        goal_idx = self.graph.node_index()[goal_node]
+        
+        length = 0
+        node = goal_idx
+        while node != -1:
+            length += 1
+            node = came_from[node]
+        if skip_first:
+            length -= 1
+        
+        base = len(out_list)
+        out_list.extend(repeat(None, length))
+        node = goal_idx
+        for pos in range(base + length - 1, base - 1, -1):
+            out_list[pos] = node_ids[node]
+            node = came_from[node]
+        return out_list
+    
+    def _run_csr_kernel(self, kernel, start_node: str, goal_node: str, out_list: Optional[List[str]] = None,
+                        skip_first: bool = False) -> Optional[List[str]]:
+        """Run a CSR path kernel and append its node indices, mapped to node IDs, to out_list."""
+        index = self.graph.node_index()
+        bound = self.graph.cached(f'kernel:{kernel.__name__}', partial(self._bind_kernel, kernel))
+        
+        path_idx = bound(index[start_node], index[goal_node])
+        if len(path_idx) == 0:
+            return None
+        
+        if out_list is None:
+            out_list = []
+        node_ids = self.graph.node_ids()
+        out_list.extend(map(node_ids.__getitem__, path_idx[1 if skip_first else 0:].tolist()))
+        return out_list
+    
+    def _bind_kernel(self, kernel) -> Callable[[int, int], np.ndarray]:
+        """Pre-bind a CSR kernel to this graph's arrays so repeat calls only pass endpoints.
+        
+        Cached on the graph until it changes; repeated searches on a stable graph skip
+        re-reading the CSR and coordinate arrays.
+        """
+        indptr, indices, weights = self.graph.to_csr()
+        lon, lat, alt = self.graph.position_columns()
+        coslat = self.graph.cos_latitudes()
+        return partial(kernel, indptr, indices, weights, lon, lat, alt, coslat)
+    
     def find_path_to_waypoints(self, start_node: str, waypoint_nodes: List[str]) -> Optional[List[str]]:
         """Find path visiting multiple waypoints in order.
         
@@ -139,20 +228,15 @@ class AStar:
         if not waypoint_nodes:
             return [start_node]
         
-        full_path = []
+        full_path: List[str] = []
         current = start_node
         
         for waypoint in waypoint_nodes:
-            segment = self.find_path(current, waypoint)
-            if segment is None:
+            # Segments are written straight into full_path; after the first one the
+            # segment start is already the last node in the path
+            if self.find_path(current, waypoint, out_list=full_path, skip_first=bool(full_path)) is None:
                 return None
             
-            # Add segment (avoid duplicating the current node)
-            if full_path:
-                full_path.extend(segment[1:])  # Skip first node (already in path)
-            else:
-                full_path.extend(segment)
-            
             current = waypoint
         
         return full_path
@@ -166,7 +250,7 @@ class AStar:
         Returns:
             List of Waypoint objects
         """
-        return [self.graph.get_node_waypoint(node_id) for node_id in path_nodes]
+        return self.graph.get_node_waypoints_bulk(path_nodes)
     
     def _heuristic(self, node1: str, node2: str) -> float:
         """Heuristic function (Euclidean distance in 3D space).
@@ -178,37 +262,30 @@ class AStar:
         Returns:
             Estimated distance between nodes
         """
-        pos1 = self.graph.get_node_position(node1)
-        pos2 = self.graph.get_node_position(node2)
+        index = self.graph.node_index()
+        return self._heuristic_idx(index[node1], index[node2], self.graph.coordinate_lists())
+    
+    @staticmethod
+    def _heuristic_idx(i: int, j: int, columns: PositionLists) -> float:
+        """Heuristic between node indices i and j over (lon, lat, alt) columns."""
+        lon, lat, alt, coslat = columns
         
         # 3D Euclidean distance
-        dx = pos1[0] - pos2[0]  # longitude
-        dy = pos1[1] - pos2[1]  # latitude
-        dz = pos1[2] - pos2[2]  # altitude
+        dx = lon[i] - lon[j]
+        dy = lat[i] - lat[j]
+        dz = alt[i] - alt[j]
         
-        # Convert lat/lon to meters (approximate)
+        # Convert lat/lon to meters (equirectangular, precomputed cos(lat))
         lat_m = dy * 111320.0
-        lon_m = dx * 111320.0 * abs(pos1[1])  # Approximate, should use cos(lat)
+        lon_m = dx * 111320.0 * coslat[i]
         
         return (lat_m ** 2 + lon_m ** 2 + dz ** 2) ** 0.5
     
-    def _euclidean_distance_3d(self, pos1: Tuple[float, float, float], pos2: Tuple[float, float, float]) -> float:
-        """Calculate 3D Euclidean distance between two positions.
-        
-        Args:
-            pos1: (lon, lat, alt) tuple
-            pos2: (lon, lat, alt) tuple
-        
-        Returns:
-            Distance in meters
-        """
-        # Convert lat/lon to meters
-        lat1, lon1, alt1 = pos1[1], pos1[0], pos1[2]
-        lat2, lon2, alt2 = pos2[1], pos2[0], pos2[2]
-        
-        lat_m = (lat2 - lat1) * 111320.0
-        lon_m = (lon2 - lon1) * 111320.0 * abs(math.cos(math.radians(lat1)))
-        alt_m = alt2 - alt1
-        
+    @staticmethod
+    def _distance_idx(i: int, j: int, columns: PositionLists) -> float:
+        """3D distance in meters between node indices i and j (cos(lat) from NavigationGraph.cos_latitudes)."""
+        lon, lat, alt, coslat = columns
+        lat_m = (lat[j] - lat[i]) * 111320.0
+        lon_m = (lon[j] - lon[i]) * 111320.0 * coslat[i]
+        alt_m = alt[j] - alt[i]
         return math.sqrt(lat_m ** 2 + lon_m ** 2 + alt_m ** 2)
-
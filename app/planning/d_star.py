@@ -1,13 +1,26 @@
 """D* pathfinding algorithm implementation - dynamic replanning."""
-from typing import List, Optional, Dict, Tuple, Set
-import heapq
+from typing import List, Optional, Tuple, Set
+from itertools import count, islice
 import math
+import numpy as np
 from app.environment.navigation_graph import NavigationGraph
 from app.domain.waypoint import Waypoint
+from app.planning._jit import NUMBA_AVAILABLE
+from app.planning._dstar_numba import dstar_compute, dstar_reconstruct, dstar_update_vertex
 
 
 class DStar:
-    """D* pathfinding algorithm - supports dynamic replanning."""
+    """D* pathfinding algorithm - supports dynamic replanning.
+    
+    The compiled kernel keeps g, rhs and edge weights in float32 (~7 significant
+    digits): path costs on mission-scale graphs stay far below 2**24 m, so only
+    near-ties closer than ~1e-7 relative can resolve differently than in float64.
+    Node positions (heuristic input) and km stay float64, since float32 degrees
+    would only resolve positions to about a meter.
+    """
+    
+    __slots__ = ('graph', 'states', 'g_score', 'rhs', 'open_list', 'heap_pos', '_seq', 'km', 'last_start',
+                 '_h_start', 'start_node', 'goal_node', '_start_idx', '_goal_idx', '_csr_state')
     
     # Node states
     NEW = 0
@@ -21,11 +34,21 @@ class DStar:
             graph: NavigationGraph instance
         """
         self.graph = graph
-        self.states: Dict[str, int] = {}  # Node state
-        self.g_score: Dict[str, float] = {}  # Cost from start
-        self.rhs: Dict[str, float] = {}  # Right-hand side (one-step lookahead)
-        self.open_list: List[Tuple[float, float, str]] = []  # Priority queue: (key, node)
+        # Search state is dense and indexed by the graph's integer node index
+        # (graph.node_index()); node IDs only appear at the public API boundary
+        self.states = bytearray()  # Node state (NEW/OPEN/CLOSED) per node index
+        self.g_score: List[float] = []  # Cost from start
+        self.rhs: List[float] = []  # Right-hand side (one-step lookahead)
+        # Indexed binary heap: (key1, key2, seq, node_idx); seq breaks key ties.
+        # heap_pos holds each open node's heap index (-1 if not open) for O(log n) updates
+        self.open_list: List[Tuple[float, float, int, int]] = []
+        self.heap_pos: List[int] = []
+        self._seq = count()
         self.km: float = 0.0  # Key modifier for dynamic updates
+        self.last_start: Optional[str] = None  # Start node when km was last updated
+        self._h_start: List[float] = []  # heuristic(start_node, node) per node index
+        # Array state of the compiled kernel (see _dstar_numba); None for the Python search
+        self._csr_state: Optional[Tuple[np.ndarray, ...]] = None
     
     def find_path(self, start_node: str, goal_node: str) -> Optional[List[str]]:
         """Find initial path from start to goal using D*.
@@ -42,16 +65,28 @@ class DStar:
         
         self.start_node = start_node
         self.goal_node = goal_node
-        
-        # Initialize
-        for node_id in self.graph.nodes():
-            self.g_score[node_id] = float('inf')
-            self.rhs[node_id] = float('inf')
-            self.states[node_id] = self.NEW
+        self.last_start = start_node
+        self.km = 0.0
+        self.open_list = []
+        self._csr_state = None
+        
+        # Static edge weights (no cost model): run the compiled CSR kernel
+        if NUMBA_AVAILABLE and not getattr(self.graph, 'cost_model', None):
+            return self._find_path_csr()
+        
+        index = self.graph.node_index()
+        n = len(index)
+        self._start_idx = index[start_node]
+        self._goal_idx = index[goal_node]
+        self.g_score = [math.inf] * n
+        self.rhs = [math.inf] * n
+        self.states = bytearray(n)  # All NEW
+        self.heap_pos = [-1] * n
+        self._h_start = self._start_heuristics(start_node)
         
         # Initialize goal
-        self.rhs[goal_node] = 0.0
-        self._insert(goal_node, self._calculate_key(goal_node))
+        self.rhs[self._goal_idx] = 0.0
+        self._insert(self._goal_idx, self._calculate_key(self._goal_idx))
         
         # Compute initial path
         self._compute_shortest_path()
@@ -59,24 +94,42 @@ class DStar:
         # Reconstruct path from start to goal
         return self._reconstruct_path(start_node, goal_node)
     
-    def replan(self, changed_edges: List[Tuple[str, str, float]]) -> Optional[List[str]]:
-        """Replan path after edge costs have changed.
+    def replan(self, changed_edges: List[Tuple[str, str, float]],
+               new_start: Optional[str] = None) -> Optional[List[str]]:
+        """Replan path after edge costs have changed and/or the drone has moved.
+        
+        Moving the start adds the heuristic distance travelled to km instead of
+        re-keying the open list, so existing g/rhs values stay valid and only the
+        neighborhoods of changed edges are re-expanded.
         
         Args:
             changed_edges: List of (node1, node2, new_cost) tuples
+            new_start: Current drone node, if it has moved since the last search
         
         Returns:
             Updated path, or None if no path exists
         """
+        if new_start is not None and new_start != self.start_node:
+            self.km += self._heuristic(self.last_start, new_start)
+            self.start_node = new_start
+            self.last_start = new_start
+            if self._csr_state is None:
+                self._start_idx = self.graph.node_index()[new_start]
+                self._h_start = self._start_heuristics(new_start)
+        
+        if self._csr_state is not None:
+            return self._replan_csr(changed_edges)
+        
         # Update edge costs
         for node1, node2, new_cost in changed_edges:
             # Update graph edge
             if self.graph.has_edge(node1, node2):
-                self.graph[node1][node2]['weight'] = new_cost
+                self.graph.add_edge(node1, node2, new_cost)
             
-            # Update affected nodes
-            self._update_vertex(node1)
-            self._update_vertex(node2)
+            # Update affected nodes (node order is stable across edge weight changes)
+            index = self.graph.node_index()
+            self._update_vertex(index[node1])
+            self._update_vertex(index[node2])
         
         # Recompute path
         self._compute_shortest_path()
@@ -84,147 +137,259 @@ class DStar:
         # Reconstruct path
         return self._reconstruct_path(self.start_node, self.goal_node)
     
+    def _find_path_csr(self) -> Optional[List[str]]:
+        """Run the initial search with the Numba D* kernel over the graph's CSR arrays.
+        
+        Only valid for static edge weights; the search state is kept in arrays so
+        replan() can continue from it.
+        """
+        n = len(self.graph.node_ids())
+        self._csr_state = (
+            np.full(n, np.inf, dtype=np.float32),  # g
+            np.full(n, np.inf, dtype=np.float32),  # rhs
+            np.empty(n, dtype=np.float64),  # heap_k1
+            np.empty(n, dtype=np.float64),  # heap_k2
+            np.empty(n, dtype=np.int64),  # heap_seq
+            np.empty(n, dtype=np.int32),  # heap_node
+            np.full(n, -1, dtype=np.int32),  # heap_pos
+            np.zeros(2, dtype=np.int64),  # meta: heap size, next seq
+        )
+        index = self.graph.node_index()
+        goal_idx = index[self.goal_node]
+        self._csr_state[1][goal_idx] = 0.0
+        self._csr_update_vertex(goal_idx)
+        return self._run_csr()
+    
+    def _replan_csr(self, changed_edges: List[Tuple[str, str, float]]) -> Optional[List[str]]:
+        """Apply edge cost changes to the kernel state and continue the search."""
+        changed_nodes = []
+        for node1, node2, new_cost in changed_edges:
+            if self.graph.has_edge(node1, node2):
+                self.graph.add_edge(node1, node2, new_cost)
+            changed_nodes.extend((node1, node2))
+        
+        # Node order is stable across edge weight changes, so state indices stay valid
+        index = self.graph.node_index()
+        for node in changed_nodes:
+            self._csr_update_vertex(index[node])
+        return self._run_csr()
+    
+    def _csr_arrays(self) -> Tuple[np.ndarray, ...]:
+        """Get (indptr, indices, weights, lon, lat, alt, coslat) for the kernels (float32 weights)."""
+        indptr, indices, weights = self.graph.to_csr()
+        weights32 = self.graph.cached('csr_weights_f32', lambda: weights.astype(np.float32))
+        return (indptr, indices, weights32, *self.graph.position_columns(), self.graph.cos_latitudes())
+    
+    def _csr_update_vertex(self, node_idx: int):
+        """Run the kernel vertex update for one node index."""
+        index = self.graph.node_index()
+        dstar_update_vertex(*self._csr_arrays(), *self._csr_state,
+                            index[self.start_node], index[self.goal_node], self.km, node_idx)
+    
+    def _run_csr(self) -> Optional[List[str]]:
+        """Run the kernel main loop and reconstruct the path as node IDs."""
+        index = self.graph.node_index()
+        start_idx = index[self.start_node]
+        goal_idx = index[self.goal_node]
+        arrays = self._csr_arrays()
+        dstar_compute(*arrays, *self._csr_state, start_idx, goal_idx, self.km)
+        
+        indptr, indices, weights = arrays[:3]
+        path_idx = dstar_reconstruct(indptr, indices, weights, self._csr_state[0], start_idx, goal_idx)
+        if len(path_idx) == 0:
+            return None
+        node_ids = self.graph.node_ids()
+        return [node_ids[i] for i in path_idx]
+    
     def _compute_shortest_path(self):
         """Compute shortest path using D* algorithm."""
-        while self.open_list and (self._top_key() < self._calculate_key(self.start_node) or 
-                                  self.rhs[self.start_node] != self.g_score[self.start_node]):
-            k_old = self._top_key()
+        # Local aliases: this loop and _update_vertex are the D* hot path
+        g_score = self.g_score
+        rhs = self.rhs
+        states = self.states
+        start_idx = self._start_idx
+        node_ids = self.graph.node_ids()
+        neighbor_lists = self.graph.neighbor_index_lists()
+        get_edge_weight_checked = self.graph.get_edge_weight_checked
+        update_vertex = self._update_vertex
+        calculate_key = self._calculate_key
+        top_key = self._top_key
+        inf = math.inf
+        
+        open_list = self.open_list
+        # h(start, start) + km is fixed for the whole loop, so the start key only needs
+        # the start's current g (when consistent, min(g, rhs) == g)
+        start_offset = self._h_start[start_idx] + self.km
+        
+        while open_list:
+            k_old = top_key()
+            g_start = g_score[start_idx]
+            if rhs[start_idx] == g_start and not k_old < (g_start + start_offset, g_start):
+                break
             u = self._pop()
             
-            k_new = self._calculate_key(u)
+            k_new = calculate_key(u)
             
             if k_old < k_new:
                 self._insert(u, k_new)
-            elif self.g_score[u] > self.rhs[u]:
-                self.g_score[u] = self.rhs[u]
-                self.states[u] = self.CLOSED
+            elif g_score[u] > rhs[u]:
+                g_score[u] = rhs[u]
+                states[u] = self.CLOSED
                 
                 # Update neighbors
-                for neighbor in self.graph.get_neighbors(u):
-                    # Additional safety check: verify edge is still valid (includes no-fly zone check)
-                    if hasattr(self.graph, 'cost_model') and self.graph.cost_model:
-                        pos1 = self.graph.get_node_position(u)
-                        pos2 = self.graph.get_node_position(neighbor)
-                        is_valid, _ = self.graph.cost_model.is_valid_edge(
-                            pos1[1], pos1[0], pos1[2],  # lat, lon, alt
-                            pos2[1], pos2[0], pos2[2],
-                            is_start_ground=False,
-                            is_end_ground=False
-                        )
-                        if not is_valid:
-                            continue  # Skip this edge if it's invalid (e.g., intersects no-fly zone)
-                    self._update_vertex(neighbor)
+                u_id = node_ids[u]
+                for neighbor in neighbor_lists[u]:
+                    # Additional safety check: skip edges that are no longer valid (e.g., no-fly zone)
+                    if get_edge_weight_checked(u_id, node_ids[neighbor]) == inf:
+                        continue
+                    update_vertex(neighbor)
             else:
-                self.g_score[u] = float('inf')
-                self._update_vertex(u)
-                for neighbor in self.graph.get_neighbors(u):
-                    # Additional safety check: verify edge is still valid (includes no-fly zone check)
-                    if hasattr(self.graph, 'cost_model') and self.graph.cost_model:
-                        pos1 = self.graph.get_node_position(u)
-                        pos2 = self.graph.get_node_position(neighbor)
-                        is_valid, _ = self.graph.cost_model.is_valid_edge(
-                            pos1[1], pos1[0], pos1[2],  # lat, lon, alt
-                            pos2[1], pos2[0], pos2[2],
-                            is_start_ground=False,
-                            is_end_ground=False
-                        )
-                        if not is_valid:
-                            continue  # Skip this edge if it's invalid (e.g., intersects no-fly zone)
-                    self._update_vertex(neighbor)
+                g_score[u] = inf
+                update_vertex(u)
+                u_id = node_ids[u]
+                for neighbor in neighbor_lists[u]:
+                    # Additional safety check: skip edges that are no longer valid (e.g., no-fly zone)
+                    if get_edge_weight_checked(u_id, node_ids[neighbor]) == inf:
+                        continue
+                    update_vertex(neighbor)
     
-    def _update_vertex(self, node: str):
+    def _update_vertex(self, node: int):
         """Update vertex in D* algorithm."""
-        if node != self.goal_node:
-            # Calculate minimum rhs from neighbors
-            min_rhs = float('inf')
-            for neighbor in self.graph.get_neighbors(node):
-                # Additional safety check: verify edge is still valid (includes no-fly zone check)
-                if hasattr(self.graph, 'cost_model') and self.graph.cost_model:
-                    pos1 = self.graph.get_node_position(neighbor)
-                    pos2 = self.graph.get_node_position(node)
-                    is_valid, _ = self.graph.cost_model.is_valid_edge(
-                        pos1[1], pos1[0], pos1[2],  # lat, lon, alt
-                        pos2[1], pos2[0], pos2[2],
-                        is_start_ground=False,
-                        is_end_ground=False
-                    )
-                    if not is_valid:
-                        continue  # Skip this edge if it's invalid (e.g., intersects no-fly zone)
-                
-                # Estimate current speed at neighbor for inertia calculation
-                # In D*, we estimate speed based on distance from start
-                estimated_speed = 0.0
-                if hasattr(self.graph, 'cost_model') and self.graph.cost_model:
-                    # Estimate speed based on g_score (cost from start)
-                    # Higher g_score means more distance traveled, likely higher speed
-                    max_speed = self.graph.cost_model.drone.max_speed
-                    if self.g_score.get(neighbor, float('inf')) < float('inf'):
-                        # Rough estimate: if we've traveled far, we're likely at higher speed
-                        # This is a simplified heuristic
-                        estimated_speed = min(max_speed, max_speed * 0.7)  # Assume 70% of max speed
-                
-                cost = self.graph.get_edge_weight(neighbor, node, current_speed=estimated_speed)
-                candidate_rhs = self.g_score[neighbor] + cost
-                if candidate_rhs < min_rhs:
-                    min_rhs = candidate_rhs
-            self.rhs[node] = min_rhs
+        g_score = self.g_score
+        inf = math.inf
+        if node != self._goal_idx:
+            # Estimate speed at neighbors for inertia calculation. In D*, we estimate speed
+            # based on g_score (cost from start): a reached neighbor is assumed to be at
+            # 70% of max speed
+            cost_model = getattr(self.graph, 'cost_model', None)
+            cruise_speed = cost_model.drone.max_speed * 0.7 if cost_model else 0.0
+            get_edge_weight_checked = self.graph.get_edge_weight_checked
+            node_ids = self.graph.node_ids()
+            node_id = node_ids[node]
+            
+            # Minimum rhs over neighbors in a single reduction. Neighbors with infinite g
+            # can't lower rhs, so their edge cost is never evaluated; invalid edges (e.g.,
+            # through a no-fly zone) cost infinity and drop out of the min on their own
+            reached = [(neighbor, g_neighbor) for neighbor in self.graph.neighbor_index_lists()[node]
+                       if (g_neighbor := g_score[neighbor]) < inf]
+            self.rhs[node] = min(
+                (g_neighbor + get_edge_weight_checked(node_ids[neighbor], node_id, cruise_speed)
+                 for neighbor, g_neighbor in reached),
+                default=inf
+            )
         
         # Update state
-        if self.states.get(node, self.NEW) == self.OPEN:
+        if self.states[node] == self.OPEN:
             self._remove(node)
         
-        if self.g_score[node] != self.rhs[node]:
+        if g_score[node] != self.rhs[node]:
             self._insert(node, self._calculate_key(node))
             self.states[node] = self.OPEN
     
-    def _calculate_key(self, node: str) -> Tuple[float, float]:
+    def _calculate_key(self, node: int) -> Tuple[float, float]:
         """Calculate key for priority queue.
         
         Args:
-            node: Node ID
+            node: Node index
         
         Returns:
             (key1, key2) tuple
         """
-        g = self.g_score.get(node, float('inf'))
-        rhs = self.rhs.get(node, float('inf'))
+        g = self.g_score[node]
+        rhs = self.rhs[node]
         
-        key1 = min(g, rhs) + self._heuristic(self.start_node, node) + self.km
+        key1 = min(g, rhs) + self._h_start[node] + self.km
         key2 = min(g, rhs)
         
         return (key1, key2)
     
-    def _insert(self, node: str, key: Tuple[float, float]):
-        """Insert node into open list."""
-        self._remove(node)  # Remove if already present
-        heapq.heappush(self.open_list, (key[0], key[1], node))
+    def _insert(self, node: int, key: Tuple[float, float]):
+        """Insert node into open list, or move it to the new key if already open."""
+        entry = (key[0], key[1], next(self._seq), node)
+        i = self.heap_pos[node]
+        if i == -1:
+            self.open_list.append(entry)
+            self.heap_pos[node] = len(self.open_list) - 1
+            self._sift_up(len(self.open_list) - 1)
+        else:
+            self.open_list[i] = entry
+            self._sift_up(i)
+            self._sift_down(self.heap_pos[node])
         self.states[node] = self.OPEN
     
-    def _remove(self, node: str):
-        """Remove node from open list."""
-        self.open_list = [(k1, k2, n) for k1, k2, n in self.open_list if n != node]
-        heapq.heapify(self.open_list)
+    def _remove(self, node: int):
+        """Remove node from open list (O(log n) via its heap position)."""
+        i = self.heap_pos[node]
+        if i == -1:
+            return
+        self.heap_pos[node] = -1
+        open_list = self.open_list
+        last = open_list.pop()
+        if i < len(open_list):
+            # Fill the hole with the former last entry and restore heap order around it
+            open_list[i] = last
+            self.heap_pos[last[3]] = i
+            self._sift_up(i)
+            self._sift_down(self.heap_pos[last[3]])
+        self.states[node] = self.CLOSED
+    
+    def _sift_up(self, i: int):
+        """Move the entry at heap index i towards the root while it is smaller than its parent."""
+        open_list = self.open_list
+        heap_pos = self.heap_pos
+        entry = open_list[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            parent_entry = open_list[parent]
+            if entry >= parent_entry:
+                break
+            open_list[i] = parent_entry
+            heap_pos[parent_entry[3]] = i
+            i = parent
+        open_list[i] = entry
+        heap_pos[entry[3]] = i
+    
+    def _sift_down(self, i: int):
+        """Move the entry at heap index i towards the leaves while a child is smaller."""
+        open_list = self.open_list
+        heap_pos = self.heap_pos
+        size = len(open_list)
+        entry = open_list[i]
+        while True:
+            child = 2 * i + 1
+            if child >= size:
+                break
+            if child + 1 < size and open_list[child + 1] < open_list[child]:
+                child += 1
+            child_entry = open_list[child]
+            if entry <= child_entry:
+                break
+            open_list[i] = child_entry
+            heap_pos[child_entry[3]] = i
+            i = child
+        open_list[i] = entry
+        heap_pos[entry[3]] = i
     
-    def _pop(self) -> str:
-        """Pop node with minimum key from open list."""
-        while self.open_list:
-            k1, k2, node = heapq.heappop(self.open_list)
-            if self.states.get(node) == self.OPEN:
-                return node
-        return None
+    def _pop(self) -> Optional[int]:
+        """Pop node with minimum key from open list (None if it is empty)."""
+        open_list = self.open_list
+        if not open_list:
+            return None
+        # Root removal: the former last entry moves to the root and can only sift down
+        _, _, _, node = open_list[0]
+        last = open_list.pop()
+        if open_list:
+            open_list[0] = last
+            self._sift_down(0)
+        self.heap_pos[node] = -1
+        self.states[node] = self.CLOSED
+        return node
     
     def _top_key(self) -> Tuple[float, float]:
         """Get top key from open list."""
         if not self.open_list:
             return (float('inf'), float('inf'))
-        
-        # Rebuild heap to get actual top
-        temp = [(k1, k2, n) for k1, k2, n in self.open_list if self.states.get(n) == self.OPEN]
-        if not temp:
-            return (float('inf'), float('inf'))
-        
-        temp.sort()
-        return (temp[0][0], temp[0][1])
+        return self.open_list[0][:2]
     
     def _reconstruct_path(self, start: str, goal: str) -> Optional[List[str]]:
         """Reconstruct path from start to goal.
@@ -236,10 +401,15 @@ class DStar:
         Returns:
             List of node IDs, or None if no path
         """
-        if self.g_score.get(start, float('inf')) == float('inf'):
+        index = self.graph.node_index()
+        node_ids = self.graph.node_ids()
+        neighbor_lists = self.graph.neighbor_index_lists()
+        g_score = self.g_score
+        if g_score[index[start]] == math.inf:
             return None
         
         path = [start]
+        visited: Set[str] = {start}  # O(1) cycle check alongside the ordered path
         current = start
         
         while current != goal:
@@ -247,34 +417,25 @@ class DStar:
             best_neighbor = None
             best_cost = float('inf')
             
-            for neighbor in self.graph.get_neighbors(current):
-                if neighbor in path:  # Avoid cycles
+            for neighbor_idx in neighbor_lists[index[current]]:
+                neighbor = node_ids[neighbor_idx]
+                if neighbor in visited:  # Avoid cycles
                     continue
                 
-                # Additional safety check: verify edge is still valid (includes no-fly zone check)
-                if hasattr(self.graph, 'cost_model') and self.graph.cost_model:
-                    pos1 = self.graph.get_node_position(current)
-                    pos2 = self.graph.get_node_position(neighbor)
-                    is_valid, _ = self.graph.cost_model.is_valid_edge(
-                        pos1[1], pos1[0], pos1[2],  # lat, lon, alt
-                        pos2[1], pos2[0], pos2[2],
-                        is_start_ground=False,
-                        is_end_ground=False
-                    )
-                    if not is_valid:
-                        continue  # Skip this edge if it's invalid (e.g., intersects no-fly zone)
-                
                 # Estimate current speed at current node for inertia calculation
                 estimated_speed = 0.0
                 if hasattr(self.graph, 'cost_model') and self.graph.cost_model:
                     # Estimate speed based on g_score (cost from start)
                     max_speed = self.graph.cost_model.drone.max_speed
-                    if self.g_score.get(current, float('inf')) < float('inf'):
+                    if g_score[index[current]] < float('inf'):
                         # Rough estimate: assume we're at 70% of max speed after traveling
                         estimated_speed = min(max_speed, max_speed * 0.7)
                 
-                cost = self.graph.get_edge_weight(current, neighbor, current_speed=estimated_speed)
-                total_cost = self.g_score.get(neighbor, float('inf')) + cost
+                # Infinite cost if the edge is no longer valid (e.g., intersects no-fly zone)
+                cost = self.graph.get_edge_weight_checked(current, neighbor, estimated_speed)
+                if cost == math.inf:
+                    continue
+                total_cost = g_score[neighbor_idx] + cost
                 
                 if total_cost < best_cost:
                     best_cost = total_cost
@@ -284,10 +445,33 @@ class DStar:
                 return None  # No path found
             
             path.append(best_neighbor)
+            visited.add(best_neighbor)
             current = best_neighbor
         
         return path
     
+    def _start_heuristics(self, ref_node: str) -> List[float]:
+        """Heuristic from ref_node to every node, computed in one vectorized pass.
+        
+        The start only changes on replan, so the keys of all nodes share one table
+        instead of evaluating a scalar distance per _calculate_key call. Positions are
+        projected with ref_node's cos(latitude), matching _heuristic(ref_node, node).
+        
+        Args:
+            ref_node: Node ID the distances are measured from
+        
+        Returns:
+            Distances in meters, in node index order
+        """
+        lon, lat, alt = self.graph.position_columns()
+        i = self.graph.node_index()[ref_node]
+        x = lon * (111320.0 * self.graph.cos_latitudes()[i])
+        y = lat * 111320.0
+        dx = x - x[i]
+        dy = y - y[i]
+        dz = alt - alt[i]
+        return np.sqrt(dx * dx + dy * dy + dz * dz).tolist()
+    
     def _heuristic(self, node1: str, node2: str) -> float:
         """Heuristic function (Euclidean distance).
         
@@ -298,16 +482,14 @@ class DStar:
         Returns:
             Estimated distance
         """
-        pos1 = self.graph.get_node_position(node1)
-        pos2 = self.graph.get_node_position(node2)
+        index = self.graph.node_index()
+        i, j = index[node1], index[node2]
+        lon, lat, alt, coslat = self.graph.coordinate_lists()
         
-        # Convert to meters
-        lat1, lon1, alt1 = pos1[1], pos1[0], pos1[2]
-        lat2, lon2, alt2 = pos2[1], pos2[0], pos2[2]
-        
-        lat_m = (lat2 - lat1) * 111320.0
-        lon_m = (lon2 - lon1) * 111320.0 * abs(math.cos(math.radians(lat1)))
-        alt_m = alt2 - alt1
+        # Convert to meters (equirectangular, precomputed cos(lat))
+        lat_m = (lat[j] - lat[i]) * 111320.0
+        lon_m = (lon[j] - lon[i]) * 111320.0 * coslat[i]
+        alt_m = alt[j] - alt[i]
         
         return math.sqrt(lat_m ** 2 + lon_m ** 2 + alt_m ** 2)
     
@@ -334,7 +516,7 @@ class DStar:
             
             # Add segment (avoid duplicating the current node)
             if full_path:
-                full_path.extend(segment[1:])  # Skip first node (already in path)
+                full_path.extend(islice(segment, 1, None))  # Skip first node (already in path)
             else:
                 full_path.extend(segment)
             
@@ -344,5 +526,11 @@ class DStar:
     
     def path_to_waypoints(self, path_nodes: List[str]) -> List[Waypoint]:
         """Convert path node IDs to Waypoint objects."""
-        return [self.graph.get_node_waypoint(node_id) for node_id in path_nodes]
-
+        return self.graph.get_node_waypoints_bulk(path_nodes)
+    
+    def path_to_waypoint_array(self, path_nodes: List[str]) -> np.ndarray:
+        """Convert path node IDs to an (N, 3) array of (latitude, longitude, altitude).
+        
+        For callers that only need coordinates; skips Waypoint construction.
+        """
+        return self.graph.get_node_coordinates_bulk(path_nodes)
@@ -1,10 +1,14 @@
 """Route planner for single and multi-drone missions."""
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
+from dataclasses import astuple, replace
 from datetime import datetime
+from itertools import islice
+import numpy as np
 from app.domain.mission import Mission
 from app.domain.route import Route
 from app.domain.drone import Drone
 from app.domain.waypoint import Waypoint
+from app.domain.constraints import MissionConstraints
 from app.environment.graph_builder import GraphBuilder
 from app.environment.navigation_graph import NavigationGraph
 from app.planning.a_star import AStar
@@ -17,10 +21,14 @@ from app.weather.weather_manager import WeatherManager
 class RoutePlanner:
     """Planner for generating routes."""
     
+    # Largest target count ordered exactly (Held-Karp); above it greedy + 2-opt is used
+    HELD_KARP_MAX_TARGETS = 12
+    
     def __init__(self, mission: Mission, 
                  weather_data: Optional[Dict[tuple[float, float], WeatherConditions]] = None,
                  use_weather: bool = True,
-                 weather_timestamp: Optional[datetime] = None):
+                 weather_timestamp: Optional[datetime] = None,
+                 graph_cache: Optional[Dict[tuple, NavigationGraph]] = None):
         """Initialize route planner with mission.
         
         Args:
@@ -28,6 +36,7 @@ class RoutePlanner:
             weather_data: Dictionary mapping (lat, lon) to WeatherConditions (optional, used as initial cache)
             use_weather: Whether to fetch and use weather data during route planning
             weather_timestamp: Timestamp for weather data (default: current time)
+            graph_cache: Navigation graphs from another planner to reuse (optional, shared)
         """
         self.mission = mission
         self.use_weather = use_weather
@@ -47,66 +56,77 @@ class RoutePlanner:
         # Keep weather_data for backward compatibility (now uses weather_manager)
         self.weather_data = self.weather_manager.get_all_weather_data()
         self.current_graph: Optional[NavigationGraph] = None  # Store graph for visualization
+        # Waypoint graphs keyed by everything that goes into building them (see _graph_key)
+        self.graph_cache: Dict[tuple, NavigationGraph] = graph_cache if graph_cache is not None else {}
+        # Per drone: (drone, planned mission, one D* search per route leg), kept alive so
+        # weather changes can be replanned incrementally (see update_weather)
+        self._dstar_routes: Dict[str, Tuple[Drone, Mission, List[DStar]]] = {}
     
     def plan_single_drone_route(self, drone: Drone, 
                                algorithm: str = "astar",
-                               optimization_metric: str = "distance") -> Optional[Route]:
+                               optimization_metric: str = "distance",
+                               graph: Optional[NavigationGraph] = None,
+                               mission: Optional[Mission] = None,
+                               heuristic_weight: float = 1.0) -> Optional[Route]:
         """Plan route for a single drone.
         
         Args:
             drone: Drone to plan route for
             algorithm: Pathfinding algorithm to use ("astar", "thetastar", "dstar")
             optimization_metric: Optimization metric ("distance", "energy", "time")
+            graph: Prebuilt waypoint graph for this mission and drone (optional; built
+                or taken from the graph cache otherwise)
+            mission: Mission to plan instead of self.mission, e.g. one drone's share of
+                the targets (optional; planned with this planner's weather and graphs)
+            heuristic_weight: Theta* bounded-relaxation factor (>= 1); above 1 trades path
+                optimality (within that factor) for fewer expansions
         
         Returns:
             Route object, or None if planning fails
         """
-        if not self.mission.target_points:
+        if mission is None:
+            mission = self.mission
+        if not mission.target_points:
             return None
         
-        # Build navigation graph with weather manager for dynamic weather fetching
-        # Pass weather_manager to GraphBuilder so it can fetch weather during graph building
-        graph_builder = GraphBuilder(
-            drone, 
-            self.mission.constraints, 
-            self.weather_manager.get_all_weather_data(),  # Initial weather cache
-            weather_manager=self.weather_manager  # For dynamic fetching
-        )
-        
         # Determine finish point early (before building graph)
+        finish_type = mission.finish_point_type
         finish_point = None
         finish_node = None
         
-        if self.mission.finish_point_type == "depot" and self.mission.depot:
-            finish_point = self.mission.depot
-        elif self.mission.finish_point_type == "custom" and self.mission.finish_point:
-            finish_point = self.mission.finish_point
-        elif self.mission.constraints and self.mission.constraints.require_return_to_depot and self.mission.depot:
+        if finish_type == "depot" and mission.depot:
+            finish_point = mission.depot
+        elif finish_type == "custom" and mission.finish_point:
+            finish_point = mission.finish_point
+        elif mission.constraints and mission.constraints.require_return_to_depot and mission.depot:
             # Fallback to old behavior
-            finish_point = self.mission.depot
+            finish_point = mission.depot
         
         # Build waypoint graph
-        all_waypoints = [self.mission.depot] if self.mission.depot else []
-        all_waypoints.extend(self.mission.target_points)
-        
-        # Add custom finish point to waypoints if needed
-        if finish_point and finish_point not in all_waypoints:
-            all_waypoints.append(finish_point)
+        all_waypoints = [mission.depot] if mission.depot else []
+        all_waypoints.extend(mission.target_points)
         
-        graph = graph_builder.build_waypoint_graph(
-            all_waypoints,
-            connect_all=True,
-            max_distance=drone.max_range
-        )
+        # Add custom finish point to waypoints if needed. The finish is usually the depot
+        # object itself, found by identity at index 0 without comparing waypoint fields;
+        # an equal copy (e.g. a custom finish placed on a target) still reuses that node
+        finish_idx = None
+        if finish_point:
+            finish_idx = next((i for i, wp in enumerate(all_waypoints) if wp is finish_point), None)
+            if finish_idx is None:
+                finish_idx = next((i for i, wp in enumerate(all_waypoints) if wp == finish_point), None)
+            if finish_idx is None:
+                finish_idx = len(all_waypoints)
+                all_waypoints.append(finish_point)
+        
+        if graph is None:
+            graph = self.build_graph(drone, all_waypoints, mission.constraints)
         self.current_graph = graph  # Store for visualization
         
-        start_node = "wp_0" if self.mission.depot else "wp_0"
-        target_nodes = [f"wp_{i+1}" for i in range(len(self.mission.target_points))]
+        start_node = "wp_0" if mission.depot else "wp_0"
+        target_nodes = [f"wp_{i+1}" for i in range(len(mission.target_points))]
         
         # Determine finish node for waypoint graph
-        if finish_point:
-            # Find finish point index in all_waypoints
-            finish_idx = all_waypoints.index(finish_point)
+        if finish_idx is not None:
             finish_node = f"wp_{finish_idx}"
         
         if not start_node or not target_nodes:
@@ -114,9 +134,9 @@ class RoutePlanner:
         
         # Select pathfinding algorithm
         if algorithm == "thetastar":
-            pathfinder = ThetaStar(graph)
+            pathfinder = ThetaStar(graph, heuristic_weight=heuristic_weight)
         elif algorithm == "dstar":
-            pathfinder = DStar(graph)
+            pathfinder = None  # One DStar per route leg, created with the legs below
         else:  # default to astar
             pathfinder = AStar(graph)
         
@@ -127,7 +147,7 @@ class RoutePlanner:
             )
         
         # Handle finish point based on type
-        if self.mission.finish_point_type == "last_target":
+        if finish_type == "last_target":
             # The last target in the optimized order will be the finish
             # No need to add additional finish node - route ends at last target
             pass
@@ -135,147 +155,287 @@ class RoutePlanner:
             # Add finish node to the end (for "depot" or "custom")
             target_nodes.append(finish_node)
         
-        # Find path visiting all targets in optimized order
-        path_nodes = pathfinder.find_path_to_waypoints(start_node, target_nodes)
+        # Find path visiting all targets in optimized order; an earlier D* route of this
+        # drone is superseded either way
+        self._dstar_routes.pop(drone.name, None)
+        if algorithm == "dstar":
+            # Each leg keeps its own search state, so every leg can be replanned later
+            legs = [DStar(graph) for _ in target_nodes]
+            path_nodes = self._join_legs([leg.find_path(leg_start, leg_goal) for leg, leg_start, leg_goal
+                                          in zip(legs, [start_node] + target_nodes, target_nodes)])
+            if path_nodes:
+                self._dstar_routes[drone.name] = (drone, mission, legs)
+            pathfinder = legs[0]
+        else:
+            path_nodes = pathfinder.find_path_to_waypoints(start_node, target_nodes)
         
         if not path_nodes:
             return None
         
+        return self._build_route(pathfinder, path_nodes, drone, mission)
+    
+    def _build_route(self, pathfinder, path_nodes: List[str], drone: Drone, mission: Mission) -> Route:
+        """Turn a planned node path into a Route with landing tags and metrics.
+        
+        Args:
+            pathfinder: Pathfinder that planned the path (converts nodes to waypoints)
+            path_nodes: Node path from start to finish
+            drone: Drone flying the route
+            mission: Mission the path was planned for
+        
+        Returns:
+            Route object
+        """
         # Convert to route
         waypoints = pathfinder.path_to_waypoints(path_nodes)
         
         # Ensure first waypoint (depot) has correct type
-        if waypoints and self.mission.depot:
+        if waypoints and mission.depot:
             waypoints[0].waypoint_type = "depot"
         
         # Handle landing approach for finish point (for all finish types)
         if waypoints:
-            # Find last target point (before finish) - needed for both landing modes
-            last_target_idx = None
-            for i in range(len(waypoints) - 1, -1, -1):
-                if waypoints[i].waypoint_type == "target":
-                    last_target_idx = i
-                    break
+            self._apply_landing(
+                waypoints, drone,
+                mission.landing_mode,
+                mission.finish_point_type,
+                mission.depot,
+                mission.finish_point
+            )
+        
+        route = Route(waypoints=waypoints, drone_name=drone.name)
+        route.calculate_metrics(drone, self.weather_data)
+        
+        return route
+    
+    @staticmethod
+    def _join_legs(leg_paths: List[Optional[List[str]]]) -> Optional[List[str]]:
+        """Join consecutive leg paths into one node path (None if any leg has no path).
+        
+        Each leg starts where the previous one ends, so that shared node is kept once.
+        """
+        if any(path is None for path in leg_paths):
+            return None
+        path_nodes = list(leg_paths[0])
+        for path in leg_paths[1:]:
+            path_nodes.extend(islice(path, 1, None))
+        return path_nodes
+    
+    @staticmethod
+    def _apply_landing(waypoints: List[Waypoint], drone: Drone, landing_mode: str, finish_type: str,
+                       depot: Optional[Waypoint], finish_point: Optional[Waypoint]):
+        """Tag the landing part of a route in place, adding the vertical-landing approach point.
+        
+        Everything after the last target is retagged in one pass over the route tail.
+        
+        Args:
+            waypoints: Route waypoints, start to finish (modified in place)
+            drone: Drone flying the route
+            landing_mode: "vertical" or "gradual"
+            finish_type: Mission finish point type ("depot", "custom", "last_target")
+            depot: Mission depot (optional)
+            finish_point: Mission custom finish point (optional)
+        """
+        min_altitude = drone.min_altitude
+        
+        # Find last target point (before finish) - needed for both landing modes
+        last_target_idx = None
+        for i in range(len(waypoints) - 1, -1, -1):
+            if waypoints[i].waypoint_type == "target":
+                last_target_idx = i
+                break
+        
+        if finish_type == "last_target":
+            # For last_target, the last target IS the finish point
+            if last_target_idx is None:
+                return
+            
+            if landing_mode == "vertical":
+                # Vertical landing: fly to last target at min flight altitude, then land vertically
+                last_target = waypoints[last_target_idx]
+                # Use the higher of last target altitude or min flight altitude
+                approach_altitude = max(min_altitude, last_target.altitude)
+                
+                # Keep intermediate waypoints from the last target on at approach altitude
+                # so they don't gradually descend
+                if last_target_idx > 0:
+                    for wp in waypoints[last_target_idx:]:
+                        if wp.waypoint_type not in ("depot", "target"):
+                            wp.altitude = approach_altitude
+                            wp.waypoint_type = "landing_segment"
+                
+                # Approach point above the last target at min flight altitude, then the
+                # last target itself (on the ground) is the finish
+                waypoints.insert(last_target_idx, Waypoint(
+                    latitude=last_target.latitude,
+                    longitude=last_target.longitude,
+                    altitude=min_altitude,
+                    waypoint_type="landing_approach"
+                ))
+                waypoints[-1].waypoint_type = "finish"
+            elif landing_mode == "gradual":
+                # Gradual landing: descend from previous target to last target (may go below min alt)
+                if last_target_idx > 0:
+                    for wp in waypoints[last_target_idx:]:
+                        if wp.waypoint_type not in ("depot", "target"):
+                            wp.waypoint_type = "landing_segment"
+                waypoints[-1].waypoint_type = "finish"
+            return
+        
+        # For "depot" or "custom" finish types
+        if finish_type == "depot":
+            waypoints[-1].waypoint_type = "depot"
+        elif finish_type == "custom" and finish_point:
+            waypoints[-1].waypoint_type = "finish"
+        
+        if last_target_idx is None:
+            return
+        
+        if landing_mode == "vertical":
+            # Vertical landing: fly to finish at min flight altitude, then land vertically
+            approach_altitude = max(min_altitude, waypoints[last_target_idx].altitude)
             
-            # Handle landing mode
-            landing_mode = getattr(self.mission, 'landing_mode', 'vertical')
+            # Waypoints between last target and finish keep approach altitude (no gradual descent)
+            for wp in waypoints[last_target_idx + 1:]:
+                if wp.waypoint_type not in ("depot", "finish"):
+                    wp.altitude = approach_altitude
+                    wp.waypoint_type = "landing_segment"
             
-            if self.mission.finish_point_type == "last_target":
-                # For last_target, the last target IS the finish point
-                if waypoints and last_target_idx is not None:
-                    # Mark the last target as finish
-                    waypoints[last_target_idx].waypoint_type = "target"  # Keep as target, but will be treated as finish
-                    
-                    # Handle landing mode for last_target finish
-                    if landing_mode == "vertical":
-                        # Vertical landing: fly to last target at min flight altitude, then land vertically
-                        last_target = waypoints[last_target_idx]
-                        # Get the last target altitude (we'll maintain this or use min altitude)
-                        last_target_alt = last_target.altitude
-                        # Use the higher of last target altitude or min flight altitude
-                        approach_altitude = max(drone.min_altitude, last_target_alt)
-                        
-                        # Set all intermediate waypoints between previous target and last target to approach altitude
-                        # This ensures they don't gradually descend
-                        if last_target_idx > 0:
-                            for i in range(last_target_idx, len(waypoints)):
-                                if waypoints[i].waypoint_type not in ["depot", "target"]:
-                                    # Set altitude to approach altitude (maintain flight altitude)
-                                    waypoints[i].altitude = approach_altitude
-                                    waypoints[i].waypoint_type = "landing_segment"
-                        
-                        # Add waypoint at last target location but at min flight altitude
-                        target_at_min_alt = Waypoint(
-                            latitude=last_target.latitude,
-                            longitude=last_target.longitude,
-                            altitude=drone.min_altitude,
-                            waypoint_type="landing_approach"
-                        )
-                        # Insert before last target
-                        waypoints.insert(last_target_idx, target_at_min_alt)
-                        # Final target point is on ground (at its original altitude)
-                        waypoints[-1].waypoint_type = "finish"
-                    elif landing_mode == "gradual":
-                        # Gradual landing: descend from previous target to last target (may go below min alt)
-                        # Mark waypoints between previous target and last target as landing_segment
-                        if last_target_idx > 0:
-                            for i in range(last_target_idx, len(waypoints)):
-                                if waypoints[i].waypoint_type not in ["depot", "target"]:
-                                    waypoints[i].waypoint_type = "landing_segment"
-                        # Mark last target as finish
-                        waypoints[-1].waypoint_type = "finish"
-            else:
-                # For "depot" or "custom" finish types
-                if self.mission.finish_point_type == "depot":
+            # Approach point above the finish at min flight altitude, before the final point
+            finish_location = finish_point if finish_point else depot
+            if finish_location:
+                waypoints.insert(-1, Waypoint(
+                    latitude=finish_location.latitude,
+                    longitude=finish_location.longitude,
+                    altitude=min_altitude,
+                    waypoint_type="landing_approach"
+                ))
+                # Final point is on ground
+                if finish_type == "depot":
                     waypoints[-1].waypoint_type = "depot"
-                elif self.mission.finish_point_type == "custom" and self.mission.finish_point:
+                    waypoints[-1].altitude = depot.altitude
+                elif finish_type == "custom":
                     waypoints[-1].waypoint_type = "finish"
-                
-                if landing_mode == "vertical":
-                    # Vertical landing: fly to finish at min flight altitude, then land vertically
-                    if last_target_idx is not None:
-                        # For vertical landing, we need to:
-                        # 1. Set all intermediate waypoints between last target and finish to min flight altitude
-                        # 2. Add landing_approach waypoint at min altitude
-                        # 3. Add final finish point on ground
-                        
-                        # Get the last target altitude (we'll maintain this or use min altitude)
-                        last_target_alt = waypoints[last_target_idx].altitude
-                        # Use the higher of last target altitude or min flight altitude
-                        approach_altitude = max(drone.min_altitude, last_target_alt)
-                        
-                        # Set all intermediate waypoints between last target and finish to approach altitude
-                        # This ensures they don't gradually descend
-                        for i in range(last_target_idx + 1, len(waypoints)):
-                            if waypoints[i].waypoint_type not in ["depot", "finish"]:
-                                # Set altitude to approach altitude (maintain flight altitude)
-                                waypoints[i].altitude = approach_altitude
-                                waypoints[i].waypoint_type = "landing_segment"
-                        
-                        # Add waypoint at finish location but at min flight altitude
-                        finish_location = self.mission.finish_point if self.mission.finish_point else self.mission.depot
-                        if finish_location:
-                            finish_at_min_alt = Waypoint(
-                                latitude=finish_location.latitude,
-                                longitude=finish_location.longitude,
-                                altitude=drone.min_altitude,
-                                waypoint_type="landing_approach"
-                            )
-                            # Insert before final finish point
-                            waypoints.insert(-1, finish_at_min_alt)
-                            # Final point is on ground
-                            if self.mission.finish_point_type == "depot":
-                                waypoints[-1].waypoint_type = "depot"
-                                waypoints[-1].altitude = self.mission.depot.altitude
-                            elif self.mission.finish_point_type == "custom":
-                                waypoints[-1].waypoint_type = "finish"
-                                waypoints[-1].altitude = self.mission.finish_point.altitude
-                            
-                            # After inserting landing_approach, ensure all waypoints between last target and landing_approach
-                            # maintain approach altitude (not descending)
-                            for i in range(last_target_idx + 1, len(waypoints) - 2):  # -2 to exclude landing_approach and finish
-                                if waypoints[i].waypoint_type not in ["depot", "finish", "landing_approach"]:
-                                    waypoints[i].altitude = approach_altitude
-                                    waypoints[i].waypoint_type = "landing_segment"
-                elif landing_mode == "gradual":
-                    # Gradual landing: descend from last target to finish (may go below min alt)
-                    if last_target_idx is not None:
-                        # Mark ALL waypoints between last target and finish as landing segment
-                        # This includes intermediate waypoints added by algorithms (e.g., Theta*)
-                        for i in range(last_target_idx + 1, len(waypoints) - 1):
-                            # Mark all waypoints (including intermediate) as landing_segment
-                            waypoints[i].waypoint_type = "landing_segment"
-                        
-                        # Ensure finish point has correct type
-                        if self.mission.finish_point_type == "depot":
-                            waypoints[-1].waypoint_type = "depot"
-                        elif self.mission.finish_point_type == "custom" and self.mission.finish_point:
-                            waypoints[-1].waypoint_type = "finish"
+                    waypoints[-1].altitude = finish_point.altitude
+        elif landing_mode == "gradual":
+            # Gradual landing: descend from last target to finish (may go below min alt); every
+            # waypoint in between, including ones added by algorithms (e.g., Theta*), is landing
+            for wp in waypoints[last_target_idx + 1:-1]:
+                wp.waypoint_type = "landing_segment"
+    
+    def update_weather(self, changed_cells: Dict[tuple[float, float], WeatherConditions]) -> Dict[str, Optional[Route]]:
+        """Apply new weather for some grid cells and replan the kept D* routes incrementally.
         
-        route = Route(waypoints=waypoints, drone_name=drone.name)
-        route.calculate_metrics(drone, self.weather_data)
+        A changed cell also reaches edges outside it (the cost model falls back to the
+        nearest cached cell), so every edge of a kept graph is re-checked and re-priced
+        with the cost model. Only edges whose weight changed are passed to DStar.replan
+        of every leg, with math.inf for edges the new weather makes invalid, so only
+        their neighborhoods are re-expanded. Edges dropped when the graph was built are
+        not restored.
         
-        return route
+        Args:
+            changed_cells: (lat, lon) location, usually a weather grid cell (as produced
+                by WeatherManager._round_to_grid), mapped to its new conditions
+        
+        Returns:
+            Dictionary mapping each drone last planned with D* to its rebuilt route, or
+            None if some leg of it is now blocked
+        """
+        self.weather_manager.set_weather(changed_cells)
+        self.weather_data = self.weather_manager.get_all_weather_data()
+        
+        # Graphs priced with this planner's weather are stale now, and the kept D* graphs
+        # are patched below, so build_graph must not hand any of them out again
+        stale_keys = [key for key, graph in self.graph_cache.items()
+                      if getattr(graph.cost_model, 'weather_manager', None) is self.weather_manager]
+        for key in stale_keys:
+            del self.graph_cache[key]
+        
+        # Diff each graph once, before any leg's replan writes the new weights into it
+        # (legs of one route, and drones with the same graph key, share a graph)
+        changed_edges = {}
+        for _, _, legs in self._dstar_routes.values():
+            graph = legs[0].graph
+            if id(graph) not in changed_edges:
+                changed_edges[id(graph)] = self._changed_edge_costs(graph)
+        
+        replanned = {}
+        for drone_name, (drone, mission, legs) in self._dstar_routes.items():
+            # Every leg gets the changes, even after a blocked one, to stay in sync with the graph
+            path_nodes = self._join_legs([leg.replan(changed_edges[id(leg.graph)]) for leg in legs])
+            replanned[drone_name] = self._build_route(legs[0], path_nodes, drone, mission) if path_nodes else None
+        return replanned
+    
+    @staticmethod
+    def _changed_edge_costs(graph: NavigationGraph) -> List[Tuple[str, str, float]]:
+        """Re-price every edge with the graph's cost model; return (node1, node2, cost) for changed ones."""
+        evaluate_edge = graph.cost_model.evaluate_edge
+        index = graph.node_index()
+        changed_edges = []
+        for node1, node2, weight in graph.graph.edges(data='weight'):
+            # GraphBuilder adds each pair in both directions, so the stored weight is
+            # the cost from the later node to the earlier one
+            if index[node1] < index[node2]:
+                node1, node2 = node2, node1
+            lon1, lat1, alt1 = graph.get_node_position(node1)
+            lon2, lat2, alt2 = graph.get_node_position(node2)
+            _, cost = evaluate_edge(lat1, lon1, alt1, lat2, lon2, alt2)
+            if cost != weight:
+                changed_edges.append((node1, node2, cost))
+        return changed_edges
+    
+    def build_graph(self, drone: Drone, waypoints: List[Waypoint],
+                    constraints: Optional[MissionConstraints] = None) -> NavigationGraph:
+        """Build the fully connected waypoint graph for a drone, reusing an earlier build.
+        
+        The O(n^2) edge validation and costing only depends on the inputs in
+        _graph_key, so replans and re-runs with another algorithm get the cached graph.
+        Callers must not modify the returned graph.
+        
+        Args:
+            drone: Drone the edge costs are computed for
+            waypoints: Waypoints in node order (node "wp_i" is waypoints[i])
+            constraints: Constraints of the mission being planned (default: this planner's mission)
+        
+        Returns:
+            NavigationGraph instance
+        """
+        if constraints is None:
+            constraints = self.mission.constraints
+        key = self._graph_key(drone, waypoints, constraints)
+        graph = self.graph_cache.get(key)
+        if graph is None:
+            # Build navigation graph with weather manager for dynamic weather fetching
+            # Pass weather_manager to GraphBuilder so it can fetch weather during graph building
+            graph_builder = GraphBuilder(
+                drone, 
+                constraints, 
+                self.weather_manager.get_all_weather_data(),  # Initial weather cache
+                weather_manager=self.weather_manager  # For dynamic fetching
+            )
+            graph = graph_builder.build_waypoint_graph(
+                waypoints,
+                connect_all=True,
+                max_distance=drone.max_range
+            )
+            self.graph_cache[key] = graph
+        return graph
+    
+    def _graph_key(self, drone: Drone, waypoints: List[Waypoint],
+                   constraints: Optional[MissionConstraints]) -> tuple:
+        """Cache key for build_graph: flight profile, waypoints, constraints and weather settings."""
+        constraints_key = (
+            tuple((zone.geometry.wkb, zone.min_altitude, zone.max_altitude) for zone in constraints.no_fly_zones),
+            constraints.max_altitude,
+            constraints.min_altitude
+        ) if constraints else None
+        return (
+            astuple(replace(drone, name="")),  # Drones with the same profile share graphs
+            tuple((wp.latitude, wp.longitude, wp.altitude, wp.waypoint_type) for wp in waypoints),
+            constraints_key,
+            self.use_weather,
+            self.weather_timestamp
+        )
     
     def plan_multi_drone_routes(self, use_vrp: bool = True) -> dict[str, Route]:
         """Plan routes for multiple drones (simple assignment).
@@ -308,20 +468,24 @@ class RoutePlanner:
                         constraints=self.mission.constraints
                     )
                     
-                    planner = RoutePlanner(temp_mission, self.weather_data)
-                    route = planner.plan_single_drone_route(drone)
+                    route = self.plan_single_drone_route(drone, mission=temp_mission)
                     
                     if route:
                         routes[drone.name] = route
         else:
-            # Simple assignment: divide targets evenly among drones
-            targets_per_drone = len(self.mission.target_points) // len(self.mission.drones)
-            remainder = len(self.mission.target_points) % len(self.mission.drones)
+            # Simple assignment: divide targets evenly among drones. With several drones the
+            # targets are swept around the depot first, so each drone gets a compact sector
+            # instead of whatever happened to be adjacent in input order
+            target_points = self.mission.target_points
+            if len(self.mission.drones) > 1:
+                target_points = self._sweep_order(target_points)
+            targets_per_drone = len(target_points) // len(self.mission.drones)
+            remainder = len(target_points) % len(self.mission.drones)
             
             target_idx = 0
             for drone_idx, drone in enumerate(self.mission.drones):
                 num_targets = targets_per_drone + (1 if drone_idx < remainder else 0)
-                drone_targets = self.mission.target_points[target_idx:target_idx + num_targets]
+                drone_targets = target_points[target_idx:target_idx + num_targets]
                 
                 temp_mission = Mission(
                     name=f"{self.mission.name}_drone_{drone.name}",
@@ -331,8 +495,7 @@ class RoutePlanner:
                     constraints=self.mission.constraints
                 )
                 
-                planner = RoutePlanner(temp_mission, self.weather_data)
-                route = planner.plan_single_drone_route(drone)
+                route = self.plan_single_drone_route(drone, mission=temp_mission)
                 
                 if route:
                     routes[drone.name] = route
@@ -341,12 +504,33 @@ class RoutePlanner:
         
         return routes
     
+    def _sweep_order(self, targets: List[Waypoint]) -> List[Waypoint]:
+        """Order targets by bearing around the depot, nearer first on equal bearing.
+        
+        Args:
+            targets: Target waypoints
+        
+        Returns:
+            New list with the same targets (input order if there is no depot)
+        """
+        depot = self.mission.depot
+        if depot is None or len(targets) < 2:
+            return list(targets)
+        lat = np.array([wp.latitude for wp in targets])
+        lon = np.array([wp.longitude for wp in targets])
+        north = lat - depot.latitude
+        east = (lon - depot.longitude) * np.cos(np.radians(depot.latitude))
+        order = np.lexsort((np.hypot(east, north), np.arctan2(north, east)))
+        return [targets[i] for i in order]
+    
     def _optimize_waypoint_order(self, graph: NavigationGraph, start_node: str,
                                 target_nodes: List[str], drone: Drone,
                                 optimization_metric: str = "distance") -> List[str]:
         """Optimize the order of waypoints using the specified metric.
         
-        Uses a greedy nearest-neighbor approach with the selected optimization metric.
+        Solves the open path problem (start fixed, any end) over the metric's cost
+        matrix: exactly with Held-Karp for up to HELD_KARP_MAX_TARGETS targets,
+        otherwise with greedy nearest-neighbor improved by 2-opt.
         
         Args:
             graph: Navigation graph
@@ -361,86 +545,150 @@ class RoutePlanner:
         if len(target_nodes) <= 1:
             return target_nodes
         
-        # Build cost matrix between all nodes
+        # Build cost matrix between all nodes (index 0 is the start, i + 1 is target_nodes[i]);
+        # ground distances come from the graph's matrix, filled in by build_waypoint_graph
         all_nodes = [start_node] + target_nodes
-        cost_matrix = {}
-        
-        for i, node1 in enumerate(all_nodes):
-            for j, node2 in enumerate(all_nodes):
-                if i != j:
-                    pos1 = graph.get_node_position(node1)
-                    pos2 = graph.get_node_position(node2)
-                    
-                    if optimization_metric == "energy":
-                        # Calculate energy cost
-                        horizontal_dist = self._haversine_distance(
-                            pos1[1], pos1[0], pos2[1], pos2[0]
-                        )
-                        altitude_change = pos2[2] - pos1[2]
-                        cost = drone.estimate_energy_consumption(horizontal_dist, altitude_change)
-                    elif optimization_metric == "time":
-                        # Calculate time cost
-                        distance = self._calculate_distance(
-                            pos1[1], pos1[0], pos1[2],
-                            pos2[1], pos2[0], pos2[2]
-                        )
-                        cost = distance / drone.max_speed
-                    else:  # distance (default)
-                        # Calculate distance cost
-                        cost = self._calculate_distance(
-                            pos1[1], pos1[0], pos1[2],
-                            pos2[1], pos2[0], pos2[2]
-                        )
-                    
-                    cost_matrix[(node1, node2)] = cost
+        index = graph.node_index()
+        rows = np.fromiter(map(index.__getitem__, all_nodes), dtype=np.intp, count=len(all_nodes))
+        cost_matrix = self._cost_matrix(
+            graph.horizontal_distances()[np.ix_(rows, rows)],
+            graph.position_columns()[2][rows],
+            drone, optimization_metric
+        )
         
-        # Greedy nearest-neighbor algorithm
-        visited = set()
-        current = start_node
-        optimized_order = []
+        if len(target_nodes) <= self.HELD_KARP_MAX_TARGETS:
+            order = self._held_karp_order(cost_matrix)
+        else:
+            order = self._two_opt(cost_matrix, self._greedy_order(cost_matrix))
+        return [all_nodes[i] for i in order]
+    
+    @staticmethod
+    def _greedy_order(cost_matrix: np.ndarray) -> List[int]:
+        """Greedy nearest-neighbor visiting order of points 1..N-1 starting from point 0.
         
-        while len(optimized_order) < len(target_nodes):
-            best_node = None
-            best_cost = float('inf')
-            
-            for target in target_nodes:
-                if target not in visited:
-                    cost = cost_matrix.get((current, target), float('inf'))
-                    if cost < best_cost:
-                        best_cost = cost
-                        best_node = target
-            
-            if best_node:
-                optimized_order.append(best_node)
-                visited.add(best_node)
-                current = best_node
-            else:
+        Each step is one masked argmin; ties go to the earliest point.
+        """
+        unvisited = np.ones(len(cost_matrix), dtype=bool)
+        unvisited[0] = False
+        current = 0
+        order = []
+        
+        while len(order) < len(cost_matrix) - 1:
+            row = np.where(unvisited, cost_matrix[current], np.inf)
+            best_idx = int(np.argmin(row))
+            if not row[best_idx] < np.inf:
                 break
+            
+            order.append(best_idx)
+            unvisited[best_idx] = False
+            current = best_idx
+        
+        return order
+    
+    @staticmethod
+    def _held_karp_order(cost_matrix: np.ndarray) -> List[int]:
+        """Cheapest visiting order of points 1..N-1 starting from point 0 (Held-Karp DP).
+        
+        O(2^K * K^2) for K = N - 1 targets; each subset is relaxed in one NumPy step.
+        Works for asymmetric costs.
+        
+        Args:
+            cost_matrix: (N, N) array, [i, j] is the cost from point i to point j
         
-        return optimized_order
+        Returns:
+            Point indices in visiting order
+        """
+        k = len(cost_matrix) - 1
+        costs = cost_matrix[1:, 1:]
+        bits = np.arange(k)
+        # best[mask, j]: cheapest path from the start through the targets in mask, ending at j
+        best = np.full((1 << k, k), np.inf)
+        parent = np.full((1 << k, k), -1, dtype=np.int64)
+        best[1 << bits, bits] = cost_matrix[0, 1:]
+        
+        for mask in range(1, 1 << k):
+            members = bits[(mask >> bits) & 1 == 1]
+            if len(members) < 2:
+                continue
+            # candidates[a, b]: reach members[a] last, coming from members[b]
+            previous = mask ^ (1 << members)
+            candidates = best[previous[:, None], members[None, :]] + costs[np.ix_(members, members)].T
+            choice = np.argmin(candidates, axis=1)
+            best[mask, members] = candidates[np.arange(len(members)), choice]
+            parent[mask, members] = members[choice]
+        
+        # Walk parents back from the cheapest full path
+        mask = (1 << k) - 1
+        last = int(np.argmin(best[mask]))
+        order = []
+        while last != -1:
+            order.append(last + 1)
+            mask, last = mask ^ (1 << last), int(parent[mask, last])
+        return order[::-1]
     
     @staticmethod
-    def _haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-        """Calculate horizontal distance using Haversine formula."""
-        from math import radians, sin, cos, sqrt, atan2
+    def _two_opt(cost_matrix: np.ndarray, order: List[int]) -> List[int]:
+        """Improve an open path from point 0 by 2-opt segment reversals until none helps.
         
-        R = 6371000  # Earth radius in meters
+        Every reversal is scored at once from prefix sums of the forward and reversed
+        leg costs, so asymmetric costs are handled; the best improving move is applied.
         
-        lat1_rad = radians(lat1)
-        lat2_rad = radians(lat2)
-        delta_lat = radians(lat2 - lat1)
-        delta_lon = radians(lon2 - lon1)
+        Args:
+            cost_matrix: (N, N) array, [i, j] is the cost from point i to point j
+            order: Initial visiting order of points (excluding the start)
         
-        a = sin(delta_lat / 2) ** 2 + cos(lat1_rad) * cos(lat2_rad) * sin(delta_lon / 2) ** 2
-        c = 2 * atan2(sqrt(a), sqrt(1 - a))
+        Returns:
+            Improved visiting order
+        """
+        path = np.array([0] + order)
+        n = len(path)
+        if n < 4:
+            return order
+        i, j = np.triu_indices(n, k=1)
+        keep = (i >= 1) & (j > i)
+        i, j = i[keep], j[keep]
+        
+        while True:
+            forward = np.concatenate(([0.0], np.cumsum(cost_matrix[path[:-1], path[1:]])))
+            backward = np.concatenate(([0.0], np.cumsum(cost_matrix[path[1:], path[:-1]])))
+            total = forward[-1]
+            # Reverse path[i..j]: re-enter at path[j], run the segment backwards, exit from path[i]
+            has_next = j < n - 1
+            next_j = path[np.where(has_next, j + 1, j)]
+            candidate = (forward[i - 1]
+                         + cost_matrix[path[i - 1], path[j]]
+                         + (backward[j] - backward[i])
+                         + np.where(has_next, cost_matrix[path[i], next_j] + total - forward[np.minimum(j + 1, n - 1)], 0.0))
+            move = int(np.argmin(candidate))
+            if not candidate[move] < total - 1e-9 * max(total, 1.0):
+                break
+            path[i[move]:j[move] + 1] = path[i[move]:j[move] + 1][::-1].copy()
         
-        return R * c
+        return path[1:].tolist()
     
     @staticmethod
-    def _calculate_distance(lat1: float, lon1: float, alt1: float,
-                           lat2: float, lon2: float, alt2: float) -> float:
-        """Calculate 3D distance between two points."""
-        horizontal_dist = RoutePlanner._haversine_distance(lat1, lon1, lat2, lon2)
-        vertical_dist = abs(alt2 - alt1)
-        return (horizontal_dist ** 2 + vertical_dist ** 2) ** 0.5
-
+    def _cost_matrix(horizontal_dist: np.ndarray, alt: np.ndarray, drone: Drone,
+                     optimization_metric: str) -> np.ndarray:
+        """Pairwise travel costs between points, computed with NumPy broadcasting.
+        
+        Args:
+            horizontal_dist: (N, N) Haversine ground distances in meters
+            alt: (N,) altitude of each point in meters
+            drone: Drone capabilities
+            optimization_metric: "distance", "energy", or "time"
+        
+        Returns:
+            (N, N) array where [i, j] is the cost from point i to point j
+        """
+        altitude_change = alt[None, :] - alt[:, None]
+        
+        if optimization_metric == "energy":
+            # Drone.estimate_energy_consumption over all pairs
+            horizontal_time = horizontal_dist / drone.max_speed if drone.max_speed > 0 else np.zeros_like(horizontal_dist)
+            vertical_time = np.where(altitude_change != 0, np.abs(altitude_change) / drone.climb_rate, 0.0)
+            return (drone.power_consumption * np.maximum(horizontal_time, vertical_time)) / 3600
+        
+        distance = (horizontal_dist ** 2 + np.abs(altitude_change) ** 2) ** 0.5
+        if optimization_metric == "time":
+            return distance / drone.max_speed
+        return distance  # distance (default)
@@ -1,21 +1,39 @@
 """Theta* pathfinding algorithm implementation."""
-from typing import List, Optional, Dict, Tuple, Set
+from typing import Callable, List, Optional, Tuple
 import heapq
 import math
+from functools import partial
+import numpy as np
 from app.environment.navigation_graph import NavigationGraph
 from app.domain.waypoint import Waypoint
+from app.planning.a_star import PositionLists
+from app.planning._jit import NUMBA_AVAILABLE
+from app.planning._thetastar_numba import thetastar_core
+
+# Smoothstep interpolation fractions t * t * (3 - 2 * t) at t = j / (n + 1), j = 1..n, for the
+# 1-5 intermediate waypoints path_to_waypoints places on a long segment
+_SMOOTHSTEP_FRACTIONS = {
+    n: tuple(t * t * (3 - 2 * t) for t in (j / (n + 1) for j in range(1, n + 1)))
+    for n in range(1, 6)
+}
 
 
 class ThetaStar:
     """Theta* pathfinding algorithm - any-angle pathfinding."""
     
-    def __init__(self, graph: NavigationGraph):
+    def __init__(self, graph: NavigationGraph, heuristic_weight: float = 1.0):
         """Initialize Theta* with navigation graph.
         
         Args:
             graph: NavigationGraph instance (should have cost_model for inertia/wind)
+            heuristic_weight: Bounded-relaxation factor epsilon >= 1 in f = g + epsilon * h;
+                values above 1 expand fewer nodes and return paths costing at most
+                epsilon times the optimum
         """
+        if heuristic_weight < 1.0:
+            raise ValueError(f"heuristic_weight must be at least 1, got {heuristic_weight}")
         self.graph = graph
+        self.heuristic_weight = heuristic_weight
         self.cost_model = graph.cost_model  # Get CostModel for direct cost calculation
     
     def find_path(self, start_node: str, goal_node: str) -> Optional[List[str]]:
@@ -33,107 +51,282 @@ class ThetaStar:
         if not self.graph.has_node(start_node) or not self.graph.has_node(goal_node):
             return None
         
-        # Priority queue: (f_score, node)
+        # Shortcuts only join nodes already linked through edges, so nodes in different
+        # components can never be connected; answer that without a search
+        index = self.graph.node_index()
+        components = self.graph.component_labels()
+        if components[index[start_node]] != components[index[goal_node]]:
+            return None
+        
+        # Results are memoized per graph version, weather version and heuristic weight, so
+        # segments shared by several drones (or replans) on the same graph are searched once
+        weather_version = self.cost_model.weather_version() if self.cost_model else 0
+        paths = self._memo(f'thetastar_paths:{self.heuristic_weight!r}', weather_version)
+        key = (start_node, goal_node)
+        if key in paths:
+            path = paths[key]
+            return list(path) if path is not None else None
+        
+        # Static edge weights (no cost model): run the compiled CSR kernel
+        if NUMBA_AVAILABLE and not self.cost_model:
+            path = self._find_path_csr(start_node, goal_node)
+        else:
+            path = self._search(start_node, goal_node)
+        
+        # A search that fetched new weather mixed old and new conditions; don't keep it
+        if not self.cost_model or self.cost_model.weather_version() == weather_version:
+            paths[key] = tuple(path) if path is not None else None
+        return path
+    
+    def _search(self, start_node: str, goal_node: str) -> Optional[List[str]]:
+        """Run the Theta* search in Python (any edge costs, including the cost model's).
+        
+        Args:
+            start_node: Start node ID
+            goal_node: Goal node ID
+        
+        Returns:
+            List of node IDs representing the path, or None if no path found
+        """
+        # Search state lives in flat lists indexed by the graph's integer node index,
+        # so score updates and closed checks avoid string hashing
+        node_ids = self.graph.node_ids()
+        index = self.graph.node_index()
+        indptr, indices, weights = self.graph.csr_lists()
+        columns = self.graph.coordinate_lists()
+        lon, lat, alt, _ = columns
+        n = len(node_ids)
+        start_idx = index[start_node]
+        goal_idx = index[goal_node]
+        
+        # Heuristic for every node in one vectorized pass, so pushes only index a list
+        h_scale = self.heuristic_weight * self._heuristic_scale()
+        heuristic = (h_scale * self._goal_distances(goal_idx)).tolist()
+        
+        # Loop-invariant attribute lookups, bound once for the whole search
+        cost_model = self.cost_model
+        calculate_cost = cost_model.calculate_cost if cost_model else None
+        max_speed = cost_model.drone.max_speed if cost_model else 0.0
+        distance_idx = self._distance_idx
+        direct_cost_idx = self._direct_cost_idx
+        line_of_sight_idx = self._line_of_sight_idx
+        speed_after = self._estimated_speed
+        
+        # Priority queue: (f_score, node index)
         open_set = []
-        heapq.heappush(open_set, (0, start_node))
+        heapq.heappush(open_set, (0, start_idx))
         
-        # Maps node -> came_from node
-        came_from: Dict[str, Optional[str]] = {start_node: None}
+        # came_from: -1 for the start and for unvisited nodes
+        came_from = [-1] * n
         
         # g_score: cost from start to node
-        g_score: Dict[str, float] = {start_node: 0.0}
+        g_score = [math.inf] * n
+        g_score[start_idx] = 0.0
         
-        # f_score: g_score + heuristic
-        f_score: Dict[str, float] = {start_node: self._heuristic(start_node, goal_node)}
+        # Track speed at each node for inertia calculation (start from rest)
+        node_speed = [0.0] * n
         
-        # Track speed at each node for inertia calculation
-        node_speed: Dict[str, float] = {start_node: 0.0}  # Start from rest
+        closed = bytearray(n)
         
-        closed_set: Set[str] = set()
+        # Lazy Theta*: a parent shortcut is taken on relaxation after the cheap distance check
+        # only; the no-fly-zone part of line-of-sight runs when the node is expanded
+        unverified = bytearray(n)
+        
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        heapreplace = heapq.heapreplace
         
         while open_set:
-            # Get node with lowest f_score
-            current_f, current = heapq.heappop(open_set)
+            # Get node with lowest f_score. Its entry stays at the heap root while the node
+            # is expanded, so the first push can replace it (one sift instead of pop + push)
+            current_f, current_idx = open_set[0]
             
-            if current in closed_set:
+            if closed[current_idx]:
+                heappop(open_set)
                 continue
             
-            closed_set.add(current)
+            # Verify the assumed shortcut; if the parent is not visible, re-parent to the
+            # cheapest already expanded neighbor over its graph edge
+            if unverified[current_idx]:
+                parent_idx = came_from[current_idx]
+                parent_distance = distance_idx(parent_idx, current_idx, columns)
+                if not line_of_sight_idx(parent_idx, current_idx, parent_distance, columns):
+                    best_idx = -1
+                    best_g = math.inf
+                    for e in range(indptr[current_idx], indptr[current_idx + 1]):
+                        candidate_idx = indices[e]
+                        if not closed[candidate_idx]:
+                            continue
+                        candidate_speed = node_speed[candidate_idx]
+                        if cost_model and candidate_speed > 0:
+                            edge_weight = calculate_cost(
+                                lat[candidate_idx], lon[candidate_idx], alt[candidate_idx],
+                                lat[current_idx], lon[current_idx], alt[current_idx],
+                                candidate_speed  # current_speed
+                            )
+                        else:
+                            edge_weight = weights[e]
+                        candidate_g = g_score[candidate_idx] + edge_weight
+                        if candidate_g < best_g:
+                            best_g = candidate_g
+                            best_idx = candidate_idx
+                    if best_idx == -1:
+                        # No expanded neighbor reaches it over a finite edge: drop the entry
+                        # unexpanded and reset the node so a later relaxation can still open it
+                        heappop(open_set)
+                        came_from[current_idx] = -1
+                        g_score[current_idx] = math.inf
+                        unverified[current_idx] = 0
+                        continue
+                    came_from[current_idx] = best_idx
+                    g_score[current_idx] = best_g
+                    node_speed[current_idx] = speed_after(
+                        node_speed[best_idx], distance_idx(best_idx, current_idx, columns), max_speed
+                    )
+            
+            closed[current_idx] = 1
+            root_pending = True
             
-            # Check if we reached the goal
-            if current == goal_node:
+            # Check if we reached the goal; the search stops as soon as the goal is
+            # popped, without draining the rest of the open set
+            if current_idx == goal_idx:
                 # Reconstruct path
                 path = []
-                node = current
-                while node is not None:
-                    path.append(node)
+                node = current_idx
+                while node != -1:
+                    path.append(node_ids[node])
                     node = came_from[node]
                 path.reverse()
                 return path
             
-            # Get parent of current node
-            parent = came_from[current]
+            # Get parent of current node (and its own row-invariant state)
+            parent_idx = came_from[current_idx]
+            current_g = g_score[current_idx]
+            current_speed_at_node = node_speed[current_idx]
+            current_lat = lat[current_idx]
+            current_lon = lon[current_idx]
+            current_alt = alt[current_idx]
             
-            # Explore neighbors
-            for neighbor in self.graph.get_neighbors(current):
-                if neighbor in closed_set:
+            # Explore neighbors (CSR row of the current node)
+            for e in range(indptr[current_idx], indptr[current_idx + 1]):
+                neighbor_idx = indices[e]
+                if closed[neighbor_idx]:
                     continue
                 
-                # Theta*: Check line-of-sight from parent to neighbor
-                if parent is not None and self._line_of_sight(parent, neighbor):
+                # Theta*: route through the parent when it is within line-of-sight range
+                # (visibility itself is checked lazily, see unverified)
+                via_parent = False
+                if parent_idx != -1:
+                    parent_distance = distance_idx(parent_idx, neighbor_idx, columns)
+                    via_parent = parent_distance < 5000  # 5km max line-of-sight
+                
+                if via_parent and not cost_model:
+                    # Without a cost model the direct cost is the distance just computed and
+                    # speeds never change, so neither helper needs to run
+                    tentative_g = g_score[parent_idx] + parent_distance
+                    estimated_speed = node_speed[parent_idx]
+                elif via_parent:
                     # Path through parent - use speed at parent for inertia calculation
-                    parent_speed = node_speed.get(parent, 0.0)
-                    tentative_g = g_score[parent] + self._direct_cost(parent, neighbor, parent_speed)
+                    parent_speed = node_speed[parent_idx]
+                    tentative_g = g_score[parent_idx] + direct_cost_idx(
+                        parent_idx, neighbor_idx, parent_speed, columns
+                    )
                     
                     # Estimate speed at neighbor after traveling from parent
-                    if self.cost_model:
-                        parent_pos = self.graph.get_node_position(parent)
-                        neighbor_pos = self.graph.get_node_position(neighbor)
-                        distance = self._euclidean_distance_3d(parent_pos, neighbor_pos)
-                        max_speed = self.cost_model.drone.max_speed
-                        acceleration = max_speed / 5.0
-                        time_to_travel = distance / max_speed if max_speed > 0 else 0
-                        
-                        if time_to_travel > 0:
-                            speed_gain = min(acceleration * time_to_travel, max_speed - parent_speed)
-                            estimated_speed = min(max_speed, parent_speed + speed_gain)
-                        else:
-                            estimated_speed = parent_speed
-                    else:
-                        estimated_speed = parent_speed
+                    estimated_speed = speed_after(parent_speed, parent_distance, max_speed)
                 else:
                     # Path through current node - use current speed for inertia
-                    current_speed_at_node = node_speed.get(current, 0.0)
-                    tentative_g = g_score[current] + self.graph.get_edge_weight(current, neighbor, current_speed=current_speed_at_node)
+                    if cost_model and current_speed_at_node > 0:
+                        # Dynamic cost with current speed (same as graph.get_edge_weight)
+                        edge_weight = calculate_cost(
+                            current_lat, current_lon, current_alt,
+                            lat[neighbor_idx], lon[neighbor_idx], alt[neighbor_idx],
+                            current_speed_at_node  # current_speed
+                        )
+                    else:
+                        edge_weight = weights[e]
+                    tentative_g = current_g + edge_weight
                     
                     # Estimate speed at neighbor after traveling from current
-                    if self.cost_model:
-                        current_pos = self.graph.get_node_position(current)
-                        neighbor_pos = self.graph.get_node_position(neighbor)
-                        distance = self._euclidean_distance_3d(current_pos, neighbor_pos)
-                        max_speed = self.cost_model.drone.max_speed
-                        acceleration = max_speed / 5.0
-                        time_to_travel = distance / max_speed if max_speed > 0 else 0
-                        
-                        if time_to_travel > 0:
-                            speed_gain = min(acceleration * time_to_travel, max_speed - current_speed_at_node)
-                            estimated_speed = min(max_speed, current_speed_at_node + speed_gain)
-                        else:
-                            estimated_speed = current_speed_at_node
+                    if cost_model:
+                        distance = distance_idx(current_idx, neighbor_idx, columns)
+                        estimated_speed = speed_after(current_speed_at_node, distance, max_speed)
                     else:
                         estimated_speed = current_speed_at_node
                 
                 # If this path to neighbor is better
-                if neighbor not in g_score or tentative_g < g_score[neighbor]:
-                    came_from[neighbor] = parent if (parent is not None and self._line_of_sight(parent, neighbor)) else current
-                    g_score[neighbor] = tentative_g
-                    f_score[neighbor] = tentative_g + self._heuristic(neighbor, goal_node)
-                    node_speed[neighbor] = estimated_speed  # Store estimated speed for this node
-                    heapq.heappush(open_set, (f_score[neighbor], neighbor))
+                if tentative_g < g_score[neighbor_idx]:
+                    came_from[neighbor_idx] = parent_idx if via_parent else current_idx
+                    # Without a cost model line-of-sight is just the distance limit, already checked
+                    unverified[neighbor_idx] = via_parent and cost_model is not None
+                    g_score[neighbor_idx] = tentative_g
+                    node_speed[neighbor_idx] = estimated_speed  # Store estimated speed for this node
+                    f_score = tentative_g + heuristic[neighbor_idx]
+                    if root_pending:
+                        heapreplace(open_set, (f_score, neighbor_idx))
+                        root_pending = False
+                    else:
+                        heappush(open_set, (f_score, neighbor_idx))
+            
+            if root_pending:
+                heappop(open_set)
         
         # No path found
         return None
     
+    @staticmethod
+    def _estimated_speed(speed: float, distance: float, max_speed: float) -> float:
+        """Estimate the speed after flying distance meters from speed, accelerating toward max speed.
+        
+        Args:
+            speed: Speed at the segment start (m/s)
+            distance: Segment length in meters
+            max_speed: Drone max speed (0 without a cost model, which leaves speed unchanged)
+        
+        Returns:
+            Estimated speed at the segment end
+        """
+        acceleration = max_speed / 5.0
+        time_to_travel = distance / max_speed if max_speed > 0 else 0
+        
+        if time_to_travel > 0:
+            speed_gain = min(acceleration * time_to_travel, max_speed - speed)
+            return min(max_speed, speed + speed_gain)
+        return speed
+    
+    def _find_path_csr(self, start_node: str, goal_node: str) -> Optional[List[str]]:
+        """Find path with the Numba Theta* kernel over the graph's CSR arrays.
+        
+        Only valid for static edge weights; inertia- and no-fly-zone-dependent costs
+        need the cost model and are handled by the Python loop in find_path.
+        
+        Args:
+            start_node: Start node ID
+            goal_node: Goal node ID
+        
+        Returns:
+            List of node IDs representing the path, or None if no path found
+        """
+        index = self.graph.node_index()
+        bound = self.graph.cached('kernel:thetastar_core', self._bind_kernel)
+        
+        path_idx = bound(self.heuristic_weight * self._heuristic_scale(), index[start_node], index[goal_node])
+        if len(path_idx) == 0:
+            return None
+        node_ids = self.graph.node_ids()
+        return [node_ids[i] for i in path_idx.tolist()]
+    
+    def _bind_kernel(self) -> Callable[[float, int, int], np.ndarray]:
+        """Pre-bind the Theta* kernel to this graph's CSR and coordinate arrays.
+        
+        Cached on the graph until it changes, so repeated searches only pass the
+        heuristic factor (it differs between ThetaStar instances) and endpoints.
+        """
+        indptr, indices, weights = self.graph.to_csr()
+        lon, lat, alt = self.graph.position_columns()
+        coslat = self.graph.cos_latitudes()
+        return partial(thetastar_core, indptr, indices, weights, lon, lat, alt, coslat)
+    
     def find_path_to_waypoints(self, start_node: str, waypoint_nodes: List[str]) -> Optional[List[str]]:
         """Find path visiting multiple waypoints in order.
         
@@ -177,27 +370,26 @@ class ThetaStar:
         Returns:
             List of Waypoint objects with smooth curves
         """
-        if not path_nodes or len(path_nodes) < 2:
-            return [self.graph.get_node_waypoint(node_id) for node_id in path_nodes]
+        # One table-backed conversion for the whole path instead of a graph lookup per node
+        path_waypoints = self.graph.get_node_waypoints_bulk(path_nodes)
+        if len(path_waypoints) < 2:
+            return path_waypoints
+        
+        waypoints = [path_waypoints[0]]
+        index = self.graph.node_index()
+        path_idx = [index[node_id] for node_id in path_nodes]
+        columns = self.graph.coordinate_lists()
         
-        waypoints = []
+        # Drone min altitude from the graph's cost model, if available (None disables the clamp)
+        cost_model = getattr(self.graph, 'cost_model', None)
+        min_alt = cost_model.drone.min_altitude if cost_model else None
         
         for i in range(len(path_nodes) - 1):
-            node1 = path_nodes[i]
-            node2 = path_nodes[i + 1]
-            
-            wp1 = self.graph.get_node_waypoint(node1)
-            wp2 = self.graph.get_node_waypoint(node2)
-            
-            # Add first waypoint
-            if i == 0:
-                waypoints.append(wp1)
+            wp1 = path_waypoints[i]
+            wp2 = path_waypoints[i + 1]
             
             # Calculate distance between waypoints
-            distance = self._euclidean_distance_3d(
-                self.graph.get_node_position(node1),
-                self.graph.get_node_position(node2)
-            )
+            distance = self._distance_idx(path_idx[i], path_idx[i + 1], columns)
             
             # If distance is large, add intermediate waypoints for smooth curves
             # Optimized: only add points for longer segments to avoid too many waypoints
@@ -207,26 +399,23 @@ class ThetaStar:
                 segment_length = 250.0  # meters per segment
                 num_intermediate = max(1, min(5, int(distance / segment_length)))  # 1-5 points max
                 
-                for j in range(1, num_intermediate + 1):
-                    t = j / (num_intermediate + 1)
-                    
-                    # Use smooth interpolation (ease-in-out curve for natural motion)
-                    smooth_t = t * t * (3 - 2 * t)  # Smoothstep function
-                    
+                # Ensure intermediate waypoints respect minimum altitude, unless wp1 or wp2
+                # is a ground point (depot/finish)
+                clamp_altitude = (min_alt is not None and
+                                  wp1.waypoint_type not in ["depot", "finish"] and
+                                  wp2.waypoint_type not in ["depot", "finish"])
+                delta_lat = wp2.latitude - wp1.latitude
+                delta_lon = wp2.longitude - wp1.longitude
+                delta_alt = wp2.altitude - wp1.altitude
+                
+                # Use smooth interpolation (ease-in-out curve for natural motion)
+                for smooth_t in _SMOOTHSTEP_FRACTIONS[num_intermediate]:
                     # Interpolate position
-                    lat = wp1.latitude + (wp2.latitude - wp1.latitude) * smooth_t
-                    lon = wp1.longitude + (wp2.longitude - wp1.longitude) * smooth_t
-                    alt = wp1.altitude + (wp2.altitude - wp1.altitude) * smooth_t
-                    
-                    # Ensure intermediate waypoints respect minimum altitude
-                    # Skip this check if wp1 or wp2 are ground points (depot/finish)
-                    if (wp1.waypoint_type not in ["depot", "finish"] and 
-                        wp2.waypoint_type not in ["depot", "finish"]):
-                        # Both are flight waypoints, ensure intermediate respects min altitude
-                        # Get drone min altitude from graph if available
-                        if hasattr(self.graph, 'cost_model') and self.graph.cost_model:
-                            min_alt = self.graph.cost_model.drone.min_altitude
-                            alt = max(alt, min_alt)
+                    lat = wp1.latitude + delta_lat * smooth_t
+                    lon = wp1.longitude + delta_lon * smooth_t
+                    alt = wp1.altitude + delta_alt * smooth_t
+                    if clamp_altitude:
+                        alt = max(alt, min_alt)
                     
                     # Create intermediate waypoint
                     intermediate_wp = Waypoint(
@@ -255,12 +444,13 @@ class ThetaStar:
         Returns:
             True if line-of-sight exists
         """
-        pos1 = self.graph.get_node_position(node1)
-        pos2 = self.graph.get_node_position(node2)
-        
-        # Calculate distance
-        distance = self._euclidean_distance_3d(pos1, pos2)
-        
+        index = self.graph.node_index()
+        i, j = index[node1], index[node2]
+        columns = self.graph.coordinate_lists()
+        return self._line_of_sight_idx(i, j, self._distance_idx(i, j, columns), columns)
+    
+    def _line_of_sight_idx(self, i: int, j: int, distance: float, columns: PositionLists) -> bool:
+        """_line_of_sight between node indices i and j, given their _distance_idx."""
         # If nodes are very close, assume line-of-sight
         if distance < 100:  # 100 meters
             return True
@@ -271,21 +461,45 @@ class ThetaStar:
         
         # Check if edge is valid (includes no-fly zone checks)
         if self.cost_model:
-            lat1, lon1, alt1 = pos1[1], pos1[0], pos1[2]  # pos is (lon, lat, alt)
-            lat2, lon2, alt2 = pos2[1], pos2[0], pos2[2]
-            
-            # Check if this edge would be valid (includes no-fly zone intersection check)
-            is_valid, _ = self.cost_model.is_valid_edge(
-                lat1, lon1, alt1,
-                lat2, lon2, alt2,
-                is_start_ground=False,  # We don't know if these are ground points, but this is for waypoint graph
-                is_end_ground=False
-            )
+            # Results depend only on the two nodes and the graph's cost model (including its
+            # weather), so they are kept per graph and weather version and shared by every
+            # search (and segment) on this graph. The check is symmetric in its endpoints,
+            # so both directions share one entry
+            validity = self._memo('line_of_sight', self.cost_model.weather_version())
+            key = (i, j) if i < j else (j, i)
+            is_valid = validity.get(key)
+            if is_valid is None:
+                lon, lat, alt, _ = columns
+                
+                # Check if this edge would be valid (includes no-fly zone intersection check)
+                is_valid, _ = self.cost_model.is_valid_edge(
+                    lat[i], lon[i], alt[i],
+                    lat[j], lon[j], alt[j],
+                    is_start_ground=False,  # We don't know if these are ground points, but this is for waypoint graph
+                    is_end_ground=False
+                )
+                validity[key] = is_valid
             if not is_valid:
                 return False
         
         return True
     
+    def _memo(self, name: str, weather_version: int) -> dict:
+        """Get a memo dict kept per graph version and emptied when weather_version moves.
+        
+        Args:
+            name: Graph cache key of the memo
+            weather_version: Current CostModel.weather_version (0 without a cost model)
+        
+        Returns:
+            Memo dict for the current graph and weather
+        """
+        entry = self.graph.cached(name, lambda: [weather_version, {}])
+        if entry[0] != weather_version:
+            entry[0] = weather_version
+            entry[1] = {}
+        return entry[1]
+    
     def _direct_cost(self, node1: str, node2: str, current_speed: float = 0.0) -> float:
         """Calculate direct cost between two nodes using CostModel (includes inertia and wind).
         
@@ -300,57 +514,74 @@ class ThetaStar:
         Returns:
             Direct cost (includes inertia and wind effects)
         """
-        pos1 = self.graph.get_node_position(node1)
-        pos2 = self.graph.get_node_position(node2)
-        
+        index = self.graph.node_index()
+        return self._direct_cost_idx(index[node1], index[node2], current_speed, self.graph.coordinate_lists())
+    
+    def _direct_cost_idx(self, i: int, j: int, current_speed: float, columns: PositionLists) -> float:
+        """_direct_cost between node indices i and j over (lon, lat, alt, cos_lat) columns."""
         # Use CostModel if available (includes inertia and wind)
         if self.cost_model:
-            # pos format: (lon, lat, alt)
+            lon, lat, alt, _ = columns
             return self.cost_model.calculate_cost(
-                pos1[1], pos1[0], pos1[2],  # lat1, lon1, alt1
-                pos2[1], pos2[0], pos2[2],  # lat2, lon2, alt2
-                current_speed=current_speed
+                lat[i], lon[i], alt[i],
+                lat[j], lon[j], alt[j],
+                current_speed
             )
         else:
             # Fallback to simple Euclidean distance
-            return self._euclidean_distance_3d(pos1, pos2)
+            return self._distance_idx(i, j, columns)
     
     def _heuristic(self, node1: str, node2: str) -> float:
-        """Heuristic function (Euclidean distance in 3D space).
+        """Heuristic function (Euclidean distance in 3D space, tie-broken).
         
         Args:
             node1: First node ID
             node2: Second node ID
         
         Returns:
-            Estimated distance between nodes
+            Estimated distance between nodes, scaled by _heuristic_scale
         """
-        pos1 = self.graph.get_node_position(node1)
-        pos2 = self.graph.get_node_position(node2)
-        return self._euclidean_distance_3d(pos1, pos2)
+        index = self.graph.node_index()
+        return self._heuristic_scale() * self._distance_idx(index[node1], index[node2], self.graph.coordinate_lists())
     
-    @staticmethod
-    def _euclidean_distance_3d(pos1: Tuple[float, float, float], 
-                                pos2: Tuple[float, float, float]) -> float:
-        """Calculate 3D Euclidean distance.
-        
-        Args:
-            pos1: (lon, lat, alt) tuple
-            pos2: (lon, lat, alt) tuple
+    def _heuristic_scale(self) -> float:
+        """Tie-breaking factor 1 + 1/D for the heuristic, D the diagonal of the graph's bounding box.
         
-        Returns:
-            Distance in meters
+        Nodes with equal f are then expanded nearest-to-goal first instead of fanning out
+        across the tie, while the heuristic exceeds the plain distance by at most h/D
+        (about a meter), so found paths stay within that of the unscaled search.
         """
-        # Convert lat/lon to meters (approximate)
-        lat1, lon1, alt1 = pos1[1], pos1[0], pos1[2]
-        lat2, lon2, alt2 = pos2[1], pos2[0], pos2[2]
-        
-        # Horizontal distance
-        lat_m = (lat2 - lat1) * 111320.0
-        lon_m = (lon2 - lon1) * 111320.0 * abs(math.cos(math.radians(lat1)))
-        
-        # Vertical distance
-        alt_m = alt2 - alt1
+        return self.graph.cached('heuristic_scale', self._bounding_box_scale)
+    
+    def _bounding_box_scale(self) -> float:
+        """Compute _heuristic_scale from the graph's coordinate columns."""
+        lon, lat, alt = self.graph.position_columns()
+        if len(lon) < 2:
+            return 1.0
+        lat_m = (lat.max() - lat.min()) * 111320.0
+        lon_m = (lon.max() - lon.min()) * 111320.0 * self.graph.cos_latitudes().max()
+        alt_m = alt.max() - alt.min()
+        diameter = math.sqrt(lat_m * lat_m + lon_m * lon_m + alt_m * alt_m)
+        return 1.0 + 1.0 / diameter if diameter > 0 else 1.0
+    
+    def _goal_distances(self, goal_idx: int) -> np.ndarray:
+        """_distance_idx from every node to goal_idx as an (N,) array, in index order."""
+        lon, lat, alt = self.graph.position_columns()
+        lat_m = (lat[goal_idx] - lat) * 111320.0
+        lon_m = (lon[goal_idx] - lon) * 111320.0 * self.graph.cos_latitudes()
+        alt_m = alt[goal_idx] - alt
+        return np.sqrt(lat_m * lat_m + lon_m * lon_m + alt_m * alt_m)
+    
+    @staticmethod
+    def _distance_idx(i: int, j: int, columns: PositionLists) -> float:
+        """3D distance in meters between node indices i and j.
         
-        return math.sqrt(lat_m ** 2 + lon_m ** 2 + alt_m ** 2)
-
+        cos(lat) comes from the graph's per-node table (NavigationGraph.cos_latitudes), and
+        squares are plain products (cheaper than ** 2 and the same arithmetic as the CSR
+        kernel), so no trig or pow runs.
+        """
+        lon, lat, alt, coslat = columns
+        lat_m = (lat[j] - lat[i]) * 111320.0
+        lon_m = (lon[j] - lon[i]) * 111320.0 * coslat[i]
+        alt_m = alt[j] - alt[i]
+        return math.sqrt(lat_m * lat_m + lon_m * lon_m + alt_m * alt_m)
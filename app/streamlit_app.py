@@ -22,6 +22,15 @@ import streamlit as st
 import folium
 from streamlit_folium import st_folium
 import json
+import numpy as np
+import pandas as pd
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import io
+import pickle
+import time
+from itertools import count
 from app.domain.mission import Mission
 from app.domain.drone import Drone
 from app.domain.waypoint import Waypoint
@@ -51,6 +60,8 @@ if "use_weather" not in st.session_state:
     st.session_state.use_weather = False
 if "orchestrator" not in st.session_state:
     st.session_state.orchestrator = None
+if "weather_version" not in st.session_state:
+    st.session_state.weather_version = 0
 if "db_connected" not in st.session_state:
     st.session_state.db_connected = None  # None = not checked, True = connected, False = not connected
 if "db_error" not in st.session_state:
@@ -61,6 +72,11 @@ if "mission_to_delete" not in st.session_state:
     st.session_state.mission_to_delete = None
 
 
+# st.fragment (st.experimental_fragment before 1.37) reruns only the decorated block on
+# widget interaction; older Streamlit releases fall back to full-script reruns
+route_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+
 def create_default_drone() -> Drone:
     """Create a default drone."""
     return Drone(
@@ -73,7 +89,326 @@ def create_default_drone() -> Drone:
     )
 
 
+def state_digest(*state) -> str:
+    """SHA-256 of the pickled state, for cache keys over unhashable domain objects."""
+    return hashlib.sha256(pickle.dumps(state)).hexdigest()
+
+
+# Source of weather_version stamps. Module-level, so a stamp is never reused within the
+# process (the same scheme as Mission._version)
+_WEATHER_VERSIONS = count(1)
+
+
+def set_weather_state(**state):
+    """Assign weather_data and/or orchestrator in session_state and bump weather_version.
+    
+    The weather the caches read always comes from one of these two entries, so every
+    assignment gets a fresh weather_version instead of the caches inspecting the dicts.
+    """
+    for name, value in state.items():
+        st.session_state[name] = value
+    st.session_state.weather_version = next(_WEATHER_VERSIONS)
+
+
+def mission_state_stamp(mission: Mission, weather_data) -> tuple:
+    """Cheap identity of the current mission/weather state.
+    
+    Mission._version changes on every mission edit and weather_version on every weather
+    assignment (see set_weather_state), so the stamp changes whenever anything the
+    caches read does.
+    """
+    return mission._version, st.session_state.weather_version if weather_data else 0
+
+
+def memoized_mission_key(name: str, build, mission: Mission, weather_data) -> str:
+    """Return build(mission, weather_data), recomputed only when mission_state_stamp changes."""
+    stamp = mission_state_stamp(mission, weather_data)
+    memo = st.session_state.setdefault("mission_keys", {})
+    entry = memo.get(name)
+    if entry is None or entry[0] != stamp:
+        entry = memo[name] = (stamp, build(mission, weather_data))
+    return entry[1]
+
+
+def mission_render_key(mission: Mission, weather_data) -> str:
+    """Digest of everything MapRenderer.render_mission draws, used as the map cache key."""
+    return state_digest(
+        mission.depot,
+        mission.finish_point,
+        mission.target_points,
+        mission.landing_mode,
+        mission.constraints.no_fly_zones if mission.constraints else None,
+        mission.routes,
+        sorted(weather_data.items()) if weather_data else None,
+    )
+
+
+def mission_plan_key(mission: Mission, weather_data) -> str:
+    """Digest of the mission inputs route planning reads (everything except its routes)."""
+    return state_digest(
+        mission.drones,
+        mission.depot,
+        mission.finish_point,
+        mission.finish_point_type,
+        mission.target_points,
+        mission.landing_mode,
+        mission.constraints,
+        sorted(weather_data.items()) if weather_data else None,
+    )
+
+
+@st.cache_resource
+def get_weather_provider() -> WeatherProvider:
+    """Shared WeatherProvider (and its pooled HTTP session) for all reruns and sessions."""
+    return WeatherProvider()
+
+
+@st.cache_data(ttl=900, max_entries=1024, show_spinner=False)
+def fetch_weather_cached(latitude: float, longitude: float, altitude: float, hour_iso: str) -> WeatherConditions:
+    """Fetch weather for a rounded location and hour, shared across reruns for 15 minutes.
+    
+    Raises LookupError when the fetch fails, so failures are retried instead of cached.
+    """
+    weather = get_weather_provider().get_weather(latitude, longitude, altitude, datetime.fromisoformat(hour_iso))
+    if weather is None:
+        raise LookupError(f"No weather data for ({latitude}, {longitude})")
+    return weather
+
+
+def weather_site(latitude: float, longitude: float, altitude: float) -> tuple:
+    """Round a location to the ~100 m / 1 m grid fetch_weather caches forecasts on."""
+    return round(latitude, 3), round(longitude, 3), round(altitude)
+
+
+def fetch_weather(latitude: float, longitude: float, altitude: float, when: datetime) -> Optional[WeatherConditions]:
+    """Get weather via fetch_weather_cached on a ~100 m grid and hourly buckets (None if the fetch fails).
+    
+    The provider only resolves forecasts to the hour, so bucketing the time loses nothing.
+    """
+    try:
+        return fetch_weather_cached(
+            *weather_site(latitude, longitude, altitude),
+            when.replace(minute=0, second=0, microsecond=0).isoformat()
+        )
+    except LookupError:
+        return None
+
+
+@st.cache_data(persist="disk", max_entries=64, show_spinner=False)
+def import_waypoints_cached(sha1: str, size: int, suffix: str, _raw: bytes) -> list:
+    """Parse an uploaded waypoint file once per distinct content, persisted across restarts.
+    
+    Streamlit skips hashing _raw; the SHA-1 and size of the upload identify it instead.
+    """
+    return DataImporter.import_waypoints_stream(io.BytesIO(_raw), suffix)
+
+
+@st.cache_resource(show_spinner="Compiling route planning kernels...")
+def warmup_planning_kernels() -> bool:
+    """Compile the Numba planning kernels once per server process.
+    
+    Without this the first Plan Route click pays the JIT compile time.
+    """
+    return MissionOrchestrator.warmup_jit()
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def render_mission_map(render_key: str, _mission: Mission, _weather_data) -> folium.Map:
+    """Render the mission map once per distinct mission/weather state.
+    
+    Streamlit skips hashing the underscored arguments; render_key (see mission_render_key)
+    identifies them instead. Reruns that leave the mission unchanged reuse the built map.
+    The cache stores the map pickled, so every caller gets its own copy and no session
+    shares a mutable folium.Map or keeps the mission it was rendered from alive.
+    """
+    return MapRenderer().render_mission(_mission, weather_data=_weather_data)
+
+
+# Plan cache limits (per session; see plan_mission_cached)
+PLAN_CACHE_TTL = 900  # seconds, so weather-based plans pick up fresh forecasts
+PLAN_CACHE_MAX_ENTRIES = 32
+
+
+def plan_mission_cached(plan_key: str, mission: Mission, weather_data, use_weather: bool,
+                        algorithm: str, optimization_algorithm, optimization_metric: str):
+    """Plan a mission once per distinct mission state and planning options.
+    
+    plan_key (see mission_plan_key) identifies the mission and weather. Plans hold live
+    objects (the orchestrator keeps its Mission, routes are mutable), so they are kept
+    in this session's st.session_state rather than a cache shared between sessions.
+    
+    Returns:
+        (orchestrator, routes, error_message)
+    """
+    cache = st.session_state.setdefault("plan_cache", {})
+    key = (plan_key, use_weather, algorithm, optimization_algorithm, optimization_metric)
+    now = time.monotonic()
+    entry = cache.pop(key, None)
+    if entry is None or now - entry[0] > PLAN_CACHE_TTL:
+        # The orchestrator adds the weather it fetches to its dict; give it a copy so the
+        # session's weather only changes through set_weather_state
+        orchestrator = MissionOrchestrator(
+            mission,
+            weather_data=dict(weather_data) if weather_data else None,
+            use_weather=use_weather
+        )
+        routes, error_message = orchestrator.plan_mission(
+            use_weather=use_weather,
+            algorithm=algorithm,
+            optimization_algorithm=optimization_algorithm,
+            optimization_metric=optimization_metric,
+            landing_mode=getattr(mission, 'landing_mode', 'vertical'),
+            finish_point_type=mission.finish_point_type,
+            finish_point=mission.finish_point
+        )
+        entry = (now, (orchestrator, routes, error_message))
+    
+    # Re-insert as most recently used, then drop the least recently used beyond the limit
+    cache[key] = entry
+    while len(cache) > PLAN_CACHE_MAX_ENTRIES:
+        del cache[next(iter(cache))]
+    return entry[1]
+
+
+@route_fragment
+def _routes_panel(mission: Mission, routes, mission_name: str):
+    """Show per-drone route details and export buttons.
+    
+    Runs as a fragment, so clicking an export button reruns only this panel instead of
+    the whole script (sidebar widgets and the mission map stay untouched).
+    """
+    route_count = len(routes)
+    st.subheader(f"Planned Routes ({route_count} drone{'s' if route_count > 1 else ''})")
+    for drone_name, route in routes.items():
+        with st.expander(f"Route for {drone_name}"):
+            if route.metrics:
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric("Distance", f"{route.metrics.total_distance/1000:.2f} km")
+                with col2:
+                    st.metric("Time", f"{route.metrics.total_time/60:.1f} min")
+                with col3:
+                    st.metric("Energy", f"{route.metrics.total_energy:.2f} Wh")
+                with col4:
+                    st.metric("Waypoints", route.metrics.waypoint_count)
+                
+                # Additional metrics row
+                col5, col6, col7, col8 = st.columns(4)
+                with col5:
+                    st.metric("Avg Speed", f"{route.metrics.avg_speed:.1f} m/s")
+                with col6:
+                    # Risk score with color coding
+                    risk_value = route.metrics.risk_score
+                    risk_color = "🟢" if risk_value < 0.3 else "🟡" if risk_value < 0.6 else "🔴"
+                    st.metric("Risk Score", f"{risk_color} {risk_value:.2f}")
+                with col7:
+                    st.metric("Max Altitude", f"{route.metrics.max_altitude:.0f} m")
+                with col8:
+                    st.metric("Min Altitude", f"{route.metrics.min_altitude:.0f} m")
+            
+            # Validation results
+            if route.validation_result:
+                # Handle both ValidationResult object and dict
+                if isinstance(route.validation_result, dict):
+                    is_valid = route.validation_result.get("is_valid", True)
+                    violations = route.validation_result.get("violations", [])
+                    warnings = route.validation_result.get("warnings", [])
+                else:
+                    # ValidationResult object
+                    is_valid = route.validation_result.is_valid
+                    violations = route.validation_result.violations
+                    warnings = getattr(route.validation_result, 'warnings', [])
+                
+                if is_valid:
+                    st.success("✓ Route is valid")
+                else:
+                    st.error("✗ Route has violations")
+                    for violation in violations:
+                        if isinstance(violation, dict):
+                            st.error(f"- {violation.get('message', 'Unknown violation')}")
+                        else:
+                            st.error(f"- {violation}")
+                
+                if warnings:
+                    st.warning("⚠️ **Warnings:**")
+                    for warning in warnings:
+                        if isinstance(warning, dict):
+                            st.warning(f"- {warning.get('message', 'Unknown warning')}")
+                        else:
+                            st.warning(f"- {warning}")
+            
+            # Export buttons (contents are built in memory, so downloads need no extra click)
+            col1, col2 = st.columns(2)
+            with col1:
+                # Find drone for this route
+                drone = next((d for d in mission.drones if d.name == drone_name), None)
+                st.download_button(
+                    "Download .plan file",
+                    PlanExporter.dumps(route, drone=drone, mission=mission),
+                    file_name=f"{mission_name}_{drone_name}.plan",
+                    mime="application/octet-stream",
+                    key=f"download_plan_{drone_name}"
+                )
+            
+            with col2:
+                st.download_button(
+                    "Download JSON file",
+                    JSONExporter.dumps(route),
+                    file_name=f"{mission_name}_{drone_name}.json",
+                    mime="application/json",
+                    key=f"download_json_{drone_name}"
+                )
+    
+    # Batch export for all drones (multi-drone missions)
+    if routes and len(routes) > 1:
+        st.subheader("Batch Export (All Drones)")
+        st.info(f"Export routes for all {len(routes)} drones at once")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Export All .plan Files", key="export_all_plan"):
+                import zipfile
+                import io
+                
+                zip_buffer = io.BytesIO()
+                with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+                    for drone_name, route in routes.items():
+                        # Find drone for this route
+                        drone = next((d for d in mission.drones if d.name == drone_name), None)
+                        zip_file.writestr(f"{mission_name}_{drone_name}.plan",
+                                          PlanExporter.dumps(route, drone=drone, mission=mission))
+                
+                zip_buffer.seek(0)
+                st.download_button(
+                    "Download All .plan Files (ZIP)",
+                    zip_buffer.read(),
+                    file_name=f"{mission_name}_all_drones.plan.zip",
+                    mime="application/zip",
+                    key="download_all_plan"
+                )
+        
+        with col2:
+            if st.button("Export All JSON Files", key="export_all_json"):
+                import zipfile
+                import io
+                
+                zip_buffer = io.BytesIO()
+                with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+                    for drone_name, route in routes.items():
+                        zip_file.writestr(f"{mission_name}_{drone_name}.json", JSONExporter.dumps(route))
+                
+                zip_buffer.seek(0)
+                st.download_button(
+                    "Download All JSON Files (ZIP)",
+                    zip_buffer.read(),
+                    file_name=f"{mission_name}_all_drones.json.zip",
+                    mime="application/json",
+                    key="download_all_json"
+                )
+
+
 st.title("🚁 Drone Route Builder System")
+warmup_planning_kernels()
 
 # Function to check database connection
 def check_database_connection():
@@ -117,8 +452,7 @@ with st.sidebar:
                 if st.button("✅ Confirm Close", type="primary", use_container_width=True, key="confirm_close"):
                     st.session_state.mission = None
                     st.session_state.routes = {}
-                    st.session_state.weather_data = None
-                    st.session_state.orchestrator = None
+                    set_weather_state(weather_data=None, orchestrator=None)
                     st.session_state.show_close_warning = False
                     st.success("Mission closed")
                     st.rerun()
@@ -165,20 +499,23 @@ with st.sidebar:
         st.write(f"**{len(st.session_state.drone_list)} drone(s) configured:**")
         for idx, drone_config in enumerate(st.session_state.drone_list):
             with st.expander(f"Drone {idx + 1}: {drone_config['name']}", expanded=idx == 0):
-                drone_config["name"] = st.text_input("Drone Name", value=drone_config["name"], key=f"drone_name_{idx}")
-                col1, col2 = st.columns(2)
-                with col1:
-                    drone_config["max_speed"] = st.number_input("Max Speed (m/s)", min_value=1.0, max_value=50.0, 
-                                                               value=drone_config["max_speed"], key=f"max_speed_{idx}")
-                    drone_config["max_altitude"] = st.number_input("Max Altitude (m)", min_value=10.0, max_value=500.0, 
-                                                                   value=drone_config["max_altitude"], key=f"max_alt_{idx}")
-                    drone_config["min_altitude"] = st.number_input("Min Altitude (m)", min_value=0.0, max_value=100.0, 
-                                                                   value=drone_config["min_altitude"], key=f"min_alt_{idx}")
-                with col2:
-                    drone_config["battery_capacity"] = st.number_input("Battery Capacity (Wh)", min_value=10.0, max_value=500.0, 
-                                                                       value=drone_config["battery_capacity"], key=f"battery_{idx}")
-                    drone_config["power_consumption"] = st.number_input("Power Consumption (W)", min_value=10.0, max_value=200.0, 
-                                                                        value=drone_config["power_consumption"], key=f"power_{idx}")
+                # Buttons are not allowed inside forms, so Remove stays below the form
+                with st.form(f"drone_cfg_{idx}"):
+                    drone_config["name"] = st.text_input("Drone Name", value=drone_config["name"], key=f"drone_name_{idx}")
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        drone_config["max_speed"] = st.number_input("Max Speed (m/s)", min_value=1.0, max_value=50.0, 
+                                                                   value=drone_config["max_speed"], key=f"max_speed_{idx}")
+                        drone_config["max_altitude"] = st.number_input("Max Altitude (m)", min_value=10.0, max_value=500.0, 
+                                                                       value=drone_config["max_altitude"], key=f"max_alt_{idx}")
+                        drone_config["min_altitude"] = st.number_input("Min Altitude (m)", min_value=0.0, max_value=100.0, 
+                                                                       value=drone_config["min_altitude"], key=f"min_alt_{idx}")
+                    with col2:
+                        drone_config["battery_capacity"] = st.number_input("Battery Capacity (Wh)", min_value=10.0, max_value=500.0, 
+                                                                           value=drone_config["battery_capacity"], key=f"battery_{idx}")
+                        drone_config["power_consumption"] = st.number_input("Power Consumption (W)", min_value=10.0, max_value=200.0, 
+                                                                            value=drone_config["power_consumption"], key=f"power_{idx}")
+                    st.form_submit_button("Apply Drone Config")
                 
                 if st.button("🗑️ Remove", key=f"remove_drone_{idx}"):
                     st.session_state.drone_list.pop(idx)
@@ -221,18 +558,21 @@ with st.sidebar:
         
         drone = drones[0] if drones else create_default_drone()
     else:
-        # Single drone: simple configuration
-        drone_name = st.text_input("Drone Name", value="Drone 1")
-        max_speed = st.number_input("Max Speed (m/s)", min_value=1.0, max_value=50.0, value=15.0)
-        max_altitude = st.number_input("Max Altitude (m)", min_value=10.0, max_value=500.0, value=120.0)
-        min_altitude = st.number_input("Min Altitude (m)", min_value=0.0, max_value=100.0, value=10.0)
-        battery_capacity = st.number_input("Battery Capacity (Wh)", min_value=10.0, max_value=500.0, value=100.0)
-        power_consumption = st.number_input("Power Consumption (W)", min_value=10.0, max_value=200.0, value=50.0)
-        
-        # Dubins parameters for single drone
-        turn_radius = st.number_input("Turn Radius (m)", min_value=10.0, max_value=200.0, value=50.0, key="single_turn_radius")
-        climb_rate = st.number_input("Climb Rate (m/s)", min_value=1.0, max_value=20.0, value=5.0, key="single_climb_rate")
-        descent_rate = st.number_input("Descent Rate (m/s)", min_value=1.0, max_value=20.0, value=5.0, key="single_descent_rate")
+        # Single drone: simple configuration. Inside a form, edits only rerun the
+        # script on submit; until then the widgets return the last applied values
+        with st.form("drone_cfg"):
+            drone_name = st.text_input("Drone Name", value="Drone 1")
+            max_speed = st.number_input("Max Speed (m/s)", min_value=1.0, max_value=50.0, value=15.0)
+            max_altitude = st.number_input("Max Altitude (m)", min_value=10.0, max_value=500.0, value=120.0)
+            min_altitude = st.number_input("Min Altitude (m)", min_value=0.0, max_value=100.0, value=10.0)
+            battery_capacity = st.number_input("Battery Capacity (Wh)", min_value=10.0, max_value=500.0, value=100.0)
+            power_consumption = st.number_input("Power Consumption (W)", min_value=10.0, max_value=200.0, value=50.0)
+            
+            # Dubins parameters for single drone
+            turn_radius = st.number_input("Turn Radius (m)", min_value=10.0, max_value=200.0, value=50.0, key="single_turn_radius")
+            climb_rate = st.number_input("Climb Rate (m/s)", min_value=1.0, max_value=20.0, value=5.0, key="single_climb_rate")
+            descent_rate = st.number_input("Descent Rate (m/s)", min_value=1.0, max_value=20.0, value=5.0, key="single_descent_rate")
+            st.form_submit_button("Apply Drone Config")
         
         drone = Drone(
             name=drone_name,
@@ -287,14 +627,10 @@ with st.sidebar:
         uploaded_file = st.file_uploader("Upload CSV or GeoJSON", type=["csv", "geojson", "json"])
         if uploaded_file:
             try:
-                # Save to temp file
-                import tempfile
-                with tempfile.NamedTemporaryFile(delete=False, suffix=uploaded_file.name) as tmp:
-                    tmp.write(uploaded_file.read())
-                    tmp_path = tmp.name
-                
-                importer = DataImporter()
-                waypoints = importer.import_waypoints(tmp_path)
+                raw = uploaded_file.getvalue()
+                waypoints = import_waypoints_cached(
+                    hashlib.sha1(raw).hexdigest(), len(raw), Path(uploaded_file.name).suffix.lower(), raw
+                )
                 
                 if st.session_state.mission is None:
                     st.session_state.mission = Mission(
@@ -308,8 +644,7 @@ with st.sidebar:
                     st.session_state.mission.name = mission_name
                     st.session_state.mission.drones = drones
                 
-                for wp in waypoints:
-                    st.session_state.mission.add_target_point(wp)
+                st.session_state.mission.extend_target_points(waypoints)
                 
                 st.success(f"Imported {len(waypoints)} waypoints")
                 st.rerun()
@@ -320,9 +655,11 @@ with st.sidebar:
     st.subheader("Depot (Start Point)")
     use_depot = st.checkbox("Use Depot", value=True)
     if use_depot:
-        depot_lat = st.number_input("Depot Latitude", value=50.0, format="%.6f", key="depot_lat")
-        depot_lon = st.number_input("Depot Longitude", value=30.0, format="%.6f", key="depot_lon")
-        depot_alt = st.number_input("Depot Altitude (m)", value=0.0, key="depot_alt")
+        with st.form("depot_cfg"):
+            depot_lat = st.number_input("Depot Latitude", value=50.0, format="%.6f", key="depot_lat")
+            depot_lon = st.number_input("Depot Longitude", value=30.0, format="%.6f", key="depot_lon")
+            depot_alt = st.number_input("Depot Altitude (m)", value=0.0, key="depot_alt")
+            st.form_submit_button("Apply Depot")
         
         if st.session_state.mission:
             depot = Waypoint(
@@ -411,36 +748,38 @@ with st.sidebar:
             if st.session_state.mission and (st.session_state.mission.target_points or st.session_state.mission.depot):
                 with st.spinner("Fetching weather data from Open Meteo..."):
                     try:
-                        weather_provider = WeatherProvider()
-                        weather_data = {}
+                        # Unique (lat, lon) locations, depot first
+                        mission = st.session_state.mission
+                        points = {}
+                        for wp in ([mission.depot] if mission.depot else []) + mission.target_points:
+                            points.setdefault((wp.latitude, wp.longitude), wp.altitude)
                         
-                        # Get weather for depot
-                        if st.session_state.mission.depot:
-                            weather = weather_provider.get_weather(
-                                st.session_state.mission.depot.latitude,
-                                st.session_state.mission.depot.longitude,
-                                st.session_state.mission.depot.altitude,
-                                weather_time
-                            )
-                            if weather:
-                                key = (st.session_state.mission.depot.latitude, st.session_state.mission.depot.longitude)
-                                weather_data[key] = weather
+                        # Nearby points share a forecast site; fetch each site once, since
+                        # concurrent misses for the same site would all reach the API
+                        sites = {key: weather_site(key[0], key[1], alt) for key, alt in points.items()}
+                        unique_sites = list(dict.fromkeys(sites.values()))
                         
-                        # Get weather for target points
-                        for target in st.session_state.mission.target_points:
-                            key = (target.latitude, target.longitude)
-                            if key not in weather_data:
-                                weather = weather_provider.get_weather(
-                                    target.latitude,
-                                    target.longitude,
-                                    target.altitude,
-                                    weather_time
-                                )
-                                if weather:
-                                    weather_data[key] = weather
+                        # Requests are I/O-bound, so overlapping them in threads cuts the wait
+                        # to roughly the slowest batch instead of one round-trip per point
+                        with ThreadPoolExecutor(max_workers=min(16, len(unique_sites))) as executor:
+                            results = executor.map(lambda site: fetch_weather(*site, weather_time), unique_sites)
+                            site_weather = dict(zip(unique_sites, results))
+                        weather_data = {key: site_weather[site] for key, site in sites.items() if site_weather[site]}
                         
-                        st.session_state.weather_data = weather_data
+                        # Routes planned with D* are replanned incrementally for the new weather
+                        orchestrator = st.session_state.orchestrator
+                        replanned = orchestrator.update_weather(weather_data) if orchestrator and weather_data else {}
+                        if replanned:
+                            st.session_state.routes = {**st.session_state.routes, **replanned}
+                            # The cached plan this orchestrator came from no longer matches its weather
+                            plan_cache = st.session_state.get("plan_cache", {})
+                            for key in [key for key, entry in plan_cache.items() if entry[1][0] is orchestrator]:
+                                del plan_cache[key]
+                        
+                        set_weather_state(weather_data=weather_data)
                         st.success(f"Fetched weather data for {len(weather_data)} locations")
+                        if replanned:
+                            st.info(f"Replanned {len(replanned)} D* route(s) for the new weather")
                         
                         # Display weather summary
                         if weather_data:
@@ -453,7 +792,7 @@ with st.sidebar:
                                     st.write(f"- Cloud Cover: {weather.cloud_cover:.0f}%")
                     except Exception as e:
                         st.error(f"Error fetching weather data: {str(e)}")
-                        st.session_state.weather_data = None
+                        set_weather_state(weather_data=None)
             else:
                 st.warning("Please add target points or depot first")
     
@@ -509,6 +848,7 @@ with st.sidebar:
                     
                     if st.button(f"Remove Zone {idx + 1}", key=f"remove_zone_{idx}"):
                         st.session_state.mission.constraints.no_fly_zones.pop(idx)
+                        st.session_state.mission.mark_modified()
                         st.rerun()
         
         # Add new zone
@@ -701,6 +1041,7 @@ with st.sidebar:
                         )
                         
                         st.session_state.mission.constraints.add_no_fly_zone(zone)
+                        st.session_state.mission.mark_modified()
                         st.success(f"Added no-fly zone: {zone_name or 'Unnamed'} ({shape_type})")
                         # Clear pending geometry after adding
                         st.session_state.pending_zone_geometry = None
@@ -733,6 +1074,7 @@ with st.sidebar:
                     zones = load_no_fly_zones_from_geojson(tmp_path)
                     for zone in zones:
                         st.session_state.mission.constraints.add_no_fly_zone(zone)
+                        st.session_state.mission.mark_modified()
                     
                     os.unlink(tmp_path)
                     st.success(f"Loaded {len(zones)} no-fly zone(s) from GeoJSON")
@@ -782,34 +1124,27 @@ with st.sidebar:
             with st.spinner("Planning route..."):
                 # Pass initial weather data as cache, but weather will be fetched during planning
                 weather_data = st.session_state.weather_data if st.session_state.use_weather else None
-                orchestrator = MissionOrchestrator(
-                    st.session_state.mission, 
-                    weather_data=weather_data,
-                    use_weather=st.session_state.use_weather
-                )
-                # Get route options from mission
-                landing_mode = getattr(st.session_state.mission, 'landing_mode', 'vertical')
-                finish_point_type = st.session_state.mission.finish_point_type
-                finish_point = st.session_state.mission.finish_point
-                
-                routes, error_message = orchestrator.plan_mission(
-                    use_weather=st.session_state.use_weather,
-                    algorithm=algorithm,
-                    optimization_algorithm=optimization_algorithm if optimization_algorithm != "None" else None,
-                    optimization_metric=optimization_metric,
-                    landing_mode=landing_mode,
-                    finish_point_type=finish_point_type,
-                    finish_point=finish_point
+                # Identical inputs (same mission, weather and options) reuse the cached plan
+                orchestrator, routes, error_message = plan_mission_cached(
+                    memoized_mission_key("plan", mission_plan_key, st.session_state.mission, weather_data),
+                    st.session_state.mission,
+                    weather_data,
+                    st.session_state.use_weather,
+                    algorithm,
+                    optimization_algorithm if optimization_algorithm != "None" else None,
+                    optimization_metric
                 )
                 
                 if error_message:
                     st.error(error_message)
                 elif routes:
                     st.session_state.routes = routes
-                    st.session_state.orchestrator = orchestrator  # Store for grid visualization
-                    # Update weather_data from orchestrator (includes weather fetched during planning)
+                    # Store for grid visualization, and update weather_data from orchestrator
+                    # (includes weather fetched during planning)
                     if hasattr(orchestrator, 'weather_data') and orchestrator.weather_data:
-                        st.session_state.weather_data = orchestrator.weather_data
+                        set_weather_state(orchestrator=orchestrator, weather_data=orchestrator.weather_data)
+                    else:
+                        set_weather_state(orchestrator=orchestrator)
                     if len(routes) > 1:
                         st.success(f"Routes planned successfully for {len(routes)} drones!")
                     else:
@@ -821,6 +1156,9 @@ with st.sidebar:
                            "- No-fly zones block all possible paths\n"
                            "- Constraints are too restrictive\n"
                            "- Try adjusting target points or no-fly zones")
+    
+    if st.button("Clear Plan Cache", help="Forget cached plans so the next Plan Route recomputes them"):
+        st.session_state.pop("plan_cache", None)
 
 # Main area
 if st.session_state.mission:
@@ -842,7 +1180,6 @@ if st.session_state.mission:
     # Map visualization
     st.subheader("Mission Map")
     
-    renderer = MapRenderer()
     # Get weather data from orchestrator if available (includes weather fetched during planning)
     weather_data = None
     if st.session_state.use_weather:
@@ -856,10 +1193,16 @@ if st.session_state.mission:
     if st.session_state.routes:
         mission.routes = st.session_state.routes
     
-    map_obj = renderer.render_mission(
-        mission, 
-        weather_data=weather_data
-    )
+    # Reuse the previous run's map while nothing changed, before any key or cache lookup
+    map_stamp = mission_state_stamp(mission, weather_data)
+    last_map = st.session_state.get("last_map")
+    if last_map is not None and last_map[0] == map_stamp:
+        map_obj = last_map[1]
+    else:
+        map_obj = render_mission_map(
+            memoized_mission_key("render", mission_render_key, mission, weather_data), mission, weather_data
+        )
+        st.session_state.last_map = (map_stamp, map_obj)
     
     # Display map with coordinate tracking
     # Use a key based on mission state to force map refresh when waypoints change
@@ -908,159 +1251,32 @@ if st.session_state.mission:
     
     # Display routes
     if st.session_state.routes:
-        route_count = len(st.session_state.routes)
-        st.subheader(f"Planned Routes ({route_count} drone{'s' if route_count > 1 else ''})")
-        for drone_name, route in st.session_state.routes.items():
-            with st.expander(f"Route for {drone_name}"):
-                if route.metrics:
-                    col1, col2, col3, col4 = st.columns(4)
-                    with col1:
-                        st.metric("Distance", f"{route.metrics.total_distance/1000:.2f} km")
-                    with col2:
-                        st.metric("Time", f"{route.metrics.total_time/60:.1f} min")
-                    with col3:
-                        st.metric("Energy", f"{route.metrics.total_energy:.2f} Wh")
-                    with col4:
-                        st.metric("Waypoints", route.metrics.waypoint_count)
-                    
-                    # Additional metrics row
-                    col5, col6, col7, col8 = st.columns(4)
-                    with col5:
-                        st.metric("Avg Speed", f"{route.metrics.avg_speed:.1f} m/s")
-                    with col6:
-                        # Risk score with color coding
-                        risk_value = route.metrics.risk_score
-                        risk_color = "🟢" if risk_value < 0.3 else "🟡" if risk_value < 0.6 else "🔴"
-                        st.metric("Risk Score", f"{risk_color} {risk_value:.2f}")
-                    with col7:
-                        st.metric("Max Altitude", f"{route.metrics.max_altitude:.0f} m")
-                    with col8:
-                        st.metric("Min Altitude", f"{route.metrics.min_altitude:.0f} m")
-                
-                # Validation results
-                if route.validation_result:
-                    # Handle both ValidationResult object and dict
-                    if isinstance(route.validation_result, dict):
-                        is_valid = route.validation_result.get("is_valid", True)
-                        violations = route.validation_result.get("violations", [])
-                        warnings = route.validation_result.get("warnings", [])
-                    else:
-                        # ValidationResult object
-                        is_valid = route.validation_result.is_valid
-                        violations = route.validation_result.violations
-                        warnings = getattr(route.validation_result, 'warnings', [])
-                    
-                    if is_valid:
-                        st.success("✓ Route is valid")
-                    else:
-                        st.error("✗ Route has violations")
-                        for violation in violations:
-                            if isinstance(violation, dict):
-                                st.error(f"- {violation.get('message', 'Unknown violation')}")
-                            else:
-                                st.error(f"- {violation}")
-                    
-                    if warnings:
-                        st.warning("⚠️ **Warnings:**")
-                        for warning in warnings:
-                            if isinstance(warning, dict):
-                                st.warning(f"- {warning.get('message', 'Unknown warning')}")
-                            else:
-                                st.warning(f"- {warning}")
-                
-                # Export buttons
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.button(f"Export .plan", key=f"plan_{drone_name}"):
-                        with tempfile.NamedTemporaryFile(delete=False, suffix='.plan') as tmp:
-                            # Find drone for this route
-                            drone = next((d for d in mission.drones if d.name == drone_name), None)
-                            PlanExporter.export_route(route, tmp.name, drone=drone, mission=mission)
-                            with open(tmp.name, 'rb') as f:
-                                st.download_button(
-                                    "Download .plan file",
-                                    f.read(),
-                                    file_name=f"{mission_name}_{drone_name}.plan",
-                                    mime="application/octet-stream",
-                                    key=f"download_plan_{drone_name}"
-                                )
-                
-                with col2:
-                    if st.button(f"Export JSON", key=f"json_{drone_name}"):
-                        with tempfile.NamedTemporaryFile(delete=False, suffix='.json') as tmp:
-                            JSONExporter.export_route(route, tmp.name)
-                            with open(tmp.name, 'rb') as f:
-                                st.download_button(
-                                    "Download JSON file",
-                                    f.read(),
-                                    file_name=f"{mission_name}_{drone_name}.json",
-                                    mime="application/json",
-                                    key=f"download_json_{drone_name}"
-                                )
-        
-        # Batch export for all drones (multi-drone missions)
-        if st.session_state.routes and len(st.session_state.routes) > 1:
-            st.subheader("Batch Export (All Drones)")
-            st.info(f"Export routes for all {len(st.session_state.routes)} drones at once")
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.button("Export All .plan Files", key="export_all_plan"):
-                    import zipfile
-                    import io
-                    
-                    zip_buffer = io.BytesIO()
-                    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                        for drone_name, route in st.session_state.routes.items():
-                            with tempfile.NamedTemporaryFile(delete=False, suffix='.plan') as tmp:
-                                # Find drone for this route
-                                drone = next((d for d in mission.drones if d.name == drone_name), None)
-                                PlanExporter.export_route(route, tmp.name, drone=drone, mission=mission)
-                                zip_file.write(tmp.name, f"{mission_name}_{drone_name}.plan")
-                    
-                    zip_buffer.seek(0)
-                    st.download_button(
-                        "Download All .plan Files (ZIP)",
-                        zip_buffer.read(),
-                        file_name=f"{mission_name}_all_drones.plan.zip",
-                        mime="application/zip",
-                        key="download_all_plan"
-                    )
-            
-            with col2:
-                if st.button("Export All JSON Files", key="export_all_json"):
-                    import zipfile
-                    import io
-                    
-                    zip_buffer = io.BytesIO()
-                    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                        for drone_name, route in st.session_state.routes.items():
-                            with tempfile.NamedTemporaryFile(delete=False, suffix='.json') as tmp:
-                                JSONExporter.export_route(route, tmp.name)
-                                zip_file.write(tmp.name, f"{mission_name}_{drone_name}.json")
-                    
-                    zip_buffer.seek(0)
-                    st.download_button(
-                        "Download All JSON Files (ZIP)",
-                        zip_buffer.read(),
-                        file_name=f"{mission_name}_all_drones.json.zip",
-                        mime="application/json",
-                        key="download_all_json"
-                    )
+        _routes_panel(mission, st.session_state.routes, mission_name)
     
     # Waypoint list
     if mission.target_points:
         st.subheader("Target Points")
-        waypoint_data = []
-        for idx, wp in enumerate(mission.target_points):
-            waypoint_data.append({
-                "Index": idx + 1,
-                "Name": wp.name or f"Target {idx+1}",
-                "Latitude": f"{wp.latitude:.6f}",
-                "Longitude": f"{wp.longitude:.6f}",
-                "Altitude (m)": f"{wp.altitude:.1f}"
-            })
-        st.dataframe(waypoint_data, use_container_width=True)
+        # Build the table column by column; numeric columns go to Arrow as-is and the
+        # display precision comes from column_config instead of per-cell strings
+        targets = mission.target_points
+        n = len(targets)
+        waypoint_data = pd.DataFrame({
+            "Index": np.arange(1, n + 1),
+            "Name": [wp.name or f"Target {idx+1}" for idx, wp in enumerate(targets)],
+            "Latitude": np.fromiter((wp.latitude for wp in targets), dtype=np.float64, count=n),
+            "Longitude": np.fromiter((wp.longitude for wp in targets), dtype=np.float64, count=n),
+            "Altitude (m)": np.fromiter((wp.altitude for wp in targets), dtype=np.float64, count=n)
+        })
+        st.dataframe(
+            waypoint_data,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Latitude": st.column_config.NumberColumn(format="%.6f"),
+                "Longitude": st.column_config.NumberColumn(format="%.6f"),
+                "Altitude (m)": st.column_config.NumberColumn(format="%.1f")
+            }
+        )
         
         if st.button("Clear All Waypoints"):
             st.session_state.mission.target_points = []
@@ -4,6 +4,7 @@ from datetime import datetime
 from app.weather.weather_provider import WeatherProvider, WeatherConditions
 from app.domain.waypoint import Waypoint
 import math
+import numpy as np
 
 
 class WeatherManager:
@@ -33,15 +34,24 @@ class WeatherManager:
             use_weather: Whether to fetch weather data (if False, returns None for all requests)
         """
         self.weather_provider = weather_provider or WeatherProvider()
+        # Read freely; write through set_weather() (or the fetch path) so _version moves
         self.weather_cache: Dict[tuple[float, float], WeatherConditions] = {}
         self.use_weather = use_weather
         
+        # Bumped on every weather_cache write, so derived views and memos can tell the
+        # cached weather changed (see _cache_columns, CostModel.weather_version)
+        self._version = 0
+        
         # Initialize cache with provided data
         if initial_weather_data:
             self.weather_cache.update(initial_weather_data)
         
         # Track which points we've fetched weather for (to avoid duplicate requests)
         self.fetched_points: Set[tuple[float, float]] = set()
+        
+        # Column view of weather_cache keys for vectorized nearby lookups (see _cache_columns)
+        self._columns: Optional[Tuple[List[tuple[float, float]], np.ndarray, np.ndarray]] = None
+        self._columns_version = -1
     
     def get_weather_for_point(self, latitude: float, longitude: float, 
                              altitude: float = 0.0,
@@ -83,12 +93,22 @@ class WeatherManager:
             weather = self.weather_provider.get_weather(latitude, longitude, altitude, timestamp)
             if weather:
                 self.weather_cache[grid_key] = weather
+                self._version += 1
                 self.fetched_points.add(grid_key)
                 return weather
         
         # If we've already tried to fetch but failed, return None
         return None
     
+    def set_weather(self, weather_data: Dict[tuple[float, float], WeatherConditions]):
+        """Add or replace cached weather entries.
+        
+        Args:
+            weather_data: Dictionary mapping grid (lat, lon) keys to WeatherConditions
+        """
+        self.weather_cache.update(weather_data)
+        self._version += 1
+    
     def get_weather_for_waypoints(self, waypoints: List[Waypoint],
                                   timestamp: Optional[datetime] = None) -> Dict[tuple[float, float], WeatherConditions]:
         """Get weather for multiple waypoints efficiently.
@@ -181,16 +201,31 @@ class WeatherManager:
         Returns:
             WeatherConditions if found nearby, None otherwise
         """
-        min_distance = float('inf')
-        closest_weather = None
+        keys, lats, lons = self._cache_columns()
+        if not keys:
+            return None
         
-        for (lat, lon), weather in self.weather_cache.items():
-            distance = self._haversine_distance(latitude, longitude, lat, lon)
-            if distance < min_distance and distance < self.MIN_WEATHER_DISTANCE:
-                min_distance = distance
-                closest_weather = weather
+        distances = self._haversine_distance_bulk(latitude, longitude, lats, lons)
+        closest = int(np.argmin(distances))
+        if distances[closest] < self.MIN_WEATHER_DISTANCE:
+            return self.weather_cache[keys[closest]]
+        return None
+    
+    def _cache_columns(self) -> Tuple[List[tuple[float, float]], np.ndarray, np.ndarray]:
+        """Split weather_cache keys into latitude and longitude arrays.
+        
+        The columns are rebuilt whenever _version has moved since they were built, i.e.
+        after any write through set_weather() or a fetch.
         
-        return closest_weather
+        Returns:
+            (keys, latitudes, longitudes) in cache insertion order
+        """
+        if self._columns is None or self._columns_version != self._version:
+            keys = list(self.weather_cache)
+            coords = np.array(keys, dtype=np.float64).reshape(-1, 2)
+            self._columns = (keys, coords[:, 0], coords[:, 1])
+            self._columns_version = self._version
+        return self._columns
     
     def _round_to_grid(self, latitude: float, longitude: float) -> tuple[float, float]:
         """Round coordinates to weather grid for caching.
@@ -211,6 +246,20 @@ class WeatherManager:
         
         return (lat_grid, lon_grid)
     
+    def round_to_grid_bulk(self, latitudes: np.ndarray, longitudes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorized _round_to_grid over arrays of coordinates.
+        
+        Args:
+            latitudes: Latitudes
+            longitudes: Longitudes
+            
+        Returns:
+            (lat_grid, lon_grid) arrays
+        """
+        lat_step = self.WEATHER_GRID_RESOLUTION * (1.0 / 111320.0)
+        lon_step = self.WEATHER_GRID_RESOLUTION * (1.0 / (111320.0 * np.cos(np.radians(latitudes))))
+        return np.round(latitudes / lat_step) * lat_step, np.round(longitudes / lon_step) * lon_step
+    
     @staticmethod
     def _haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Calculate distance between two points using Haversine formula.
@@ -234,6 +283,21 @@ class WeatherManager:
         
         return R * c
     
+    @staticmethod
+    def _haversine_distance_bulk(lat1: float, lon1: float, lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+        """Vectorized _haversine_distance from one point to arrays of points."""
+        R = 6371000  # Earth radius in meters
+        
+        lat1_rad = math.radians(lat1)
+        lat2_rad = np.radians(lat2)
+        delta_lat = np.radians(lat2 - lat1)
+        delta_lon = np.radians(lon2 - lon1)
+        
+        a = np.sin(delta_lat / 2) ** 2 + math.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(delta_lon / 2) ** 2
+        c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+        
+        return R * c
+    
     def get_all_weather_data(self) -> Dict[tuple[float, float], WeatherConditions]:
         """Get all cached weather data.
         
@@ -123,6 +123,8 @@ class WeatherProvider:
             base_url: Base URL for Open Meteo API (default: public API)
         """
         self.base_url = base_url or self.BASE_URL
+        # One pooled session per provider, so repeated fetches reuse TCP/TLS connections
+        self.session = requests.Session()
     
     def get_weather(self, latitude: float, longitude: float,
                    altitude: float = 0.0,
@@ -157,7 +159,7 @@ class WeatherProvider:
                 params["elevation"] = altitude
             
             # Make request
-            response = requests.get(self.BASE_URL, params=params, timeout=10)
+            response = self.session.get(self.BASE_URL, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
             
@@ -193,7 +195,7 @@ class WeatherProvider:
             params_80m = params.copy()
             params_80m["hourly"] = "windspeed_80m,winddirection_80m"
             try:
-                response_80m = requests.get(self.BASE_URL, params=params_80m, timeout=10)
+                response_80m = self.session.get(self.BASE_URL, params=params_80m, timeout=10)
                 response_80m.raise_for_status()
                 data_80m = response_80m.json()
                 hourly_80m = data_80m.get("hourly", {})
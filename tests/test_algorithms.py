@@ -4,7 +4,19 @@ from app.environment.navigation_graph import NavigationGraph
 from app.planning.a_star import AStar
 from app.planning.theta_star import ThetaStar
 from app.planning.d_star import DStar
+from app.planning.route_planner import RoutePlanner
+from app.environment.cost_model import CostModel
 from app.domain.waypoint import Waypoint
+from app.domain.drone import Drone
+from app.domain.constraints import MissionConstraints, NoFlyZone
+from app.domain.mission import Mission
+from app.weather.weather_provider import WeatherConditions
+from app.weather.weather_manager import WeatherManager
+from shapely.geometry import Polygon
+from datetime import datetime
+import itertools
+import math
+import numpy as np
 
 
 class TestAlgorithms(unittest.TestCase):
@@ -68,6 +80,28 @@ class TestAlgorithms(unittest.TestCase):
                     f"Path should have edge between {path[i]} and {path[i+1]}"
                 )
     
+    def test_astar_static_weights_optimal(self):
+        """Test A* without a cost model returns the cheapest path, not the shortest hop count."""
+        graph = NavigationGraph()
+        graph.add_node("s", 50.0, 30.0, 50.0)
+        graph.add_node("m1", 50.0, 30.001, 50.0)
+        graph.add_node("m2", 50.0, 30.002, 50.0)
+        graph.add_node("t", 50.0, 30.003, 50.0)
+        graph.add_node("u", 50.001, 30.0015, 50.0)
+        # Weights are at least the straight-line distance in meters (admissible heuristic)
+        graph.add_edge("s", "m1", 100.0)
+        graph.add_edge("m1", "m2", 100.0)
+        graph.add_edge("m2", "t", 100.0)
+        graph.add_edge("s", "t", 1000.0)
+        graph.add_edge("s", "u", 150.0)
+        graph.add_edge("u", "t", 200.0)
+        
+        path = AStar(graph).find_path("s", "t")
+        
+        self.assertEqual(path, ["s", "m1", "m2", "t"])
+        cost = sum(graph.get_edge_weight(path[i], path[i+1]) for i in range(len(path) - 1))
+        self.assertAlmostEqual(cost, 300.0)
+    
     def test_thetastar_finds_path(self):
         """Test Theta* finds path."""
         theta_star = ThetaStar(self.graph)
@@ -77,6 +111,96 @@ class TestAlgorithms(unittest.TestCase):
         self.assertEqual(path[0], "n0", "Path should start at start node")
         self.assertEqual(path[-1], "n8", "Path should end at goal node")
     
+    def test_thetastar_weighted_heuristic(self):
+        """Test bounded-relaxation Theta* still reaches the goal and rejects weights below 1."""
+        path = ThetaStar(self.graph, heuristic_weight=1.5).find_path("n0", "n8")
+        
+        self.assertIsNotNone(path)
+        self.assertEqual(path[0], "n0")
+        self.assertEqual(path[-1], "n8")
+        with self.assertRaises(ValueError):
+            ThetaStar(self.graph, heuristic_weight=0.5)
+    
+    def test_thetastar_csr_kernel(self):
+        """Test CSR Theta* kernel shortcuts through line-of-sight on static weights."""
+        graph = NavigationGraph()
+        # Same 3x3 grid, ~11 m spacing so every pair of nodes is within line-of-sight
+        for i in range(9):
+            graph.add_node(f"n{i}", 50.0 + 0.0001 * (i // 3), 30.0 + 0.0001 * (i % 3), 0.0)
+        for n1, n2 in [(0, 1), (1, 2), (0, 3), (1, 4), (2, 5), (3, 4), (4, 5),
+                       (3, 6), (4, 7), (5, 8), (6, 7), (7, 8)]:
+            graph.add_edge(f"n{n1}", f"n{n2}", 11.0)
+        
+        path = ThetaStar(graph)._find_path_csr("n0", "n8")
+        
+        self.assertEqual(path, ["n0", "n8"], "Start should see the goal directly")
+    
+    def test_thetastar_lazy_line_of_sight_repair(self):
+        """Test Lazy Theta* drops an assumed shortcut that crosses a no-fly zone."""
+        drone = Drone(name="D", max_speed=15.0, max_altitude=120.0, min_altitude=10.0,
+                      battery_capacity=100.0, power_consumption=50.0)
+        # Zone sits inside the triangle a-b-c, blocking only the a-c shortcut
+        zone = NoFlyZone(Polygon([(30.0012, 50.0008), (30.0018, 50.0008),
+                                  (30.0018, 50.0012), (30.0012, 50.0012)]), 0, 500, "Z")
+        cost_model = CostModel(drone, MissionConstraints(no_fly_zones=[zone]))
+        graph = NavigationGraph(cost_model=cost_model)
+        graph.add_node("a", 50.0, 30.0, 50.0)
+        graph.add_node("b", 50.002, 30.0, 50.0)
+        graph.add_node("c", 50.002, 30.003, 50.0)
+        graph.add_edge("a", "b", 222.6)
+        graph.add_edge("b", "c", 214.6)
+        
+        path = ThetaStar(graph).find_path("a", "c")
+        
+        self.assertEqual(path, ["a", "b", "c"])
+    
+    def test_zone_bounds_follow_list_edits(self):
+        """Test no-fly zone boxes are rebuilt when a zone is swapped in place."""
+        drone = Drone(name="D", max_speed=15.0, max_altitude=120.0, min_altitude=10.0,
+                      battery_capacity=100.0, power_consumption=50.0)
+        far = NoFlyZone(Polygon([(31.0, 51.0), (31.1, 51.0), (31.1, 51.1), (31.0, 51.1)]), 0, 500, "far")
+        near = NoFlyZone(Polygon([(30.0004, 50.0004), (30.0006, 50.0004),
+                                  (30.0006, 50.0006), (30.0004, 50.0006)]), 0, 500, "near")
+        constraints = MissionConstraints(no_fly_zones=[far])
+        cost_model = CostModel(drone, constraints)
+        self.assertTrue(cost_model.is_valid_edge(50.0, 30.0, 50.0, 50.001, 30.001, 50.0)[0])
+        
+        # Same list, same length: only the zone objects differ
+        constraints.no_fly_zones.pop()
+        constraints.add_no_fly_zone(near)
+        
+        self.assertFalse(cost_model.is_valid_edge(50.0, 30.0, 50.0, 50.001, 30.001, 50.0)[0])
+    
+    def test_thetastar_memo_follows_weather(self):
+        """Test memoized Theta* paths are dropped when the cost model's weather changes."""
+        def conditions(wind_speed):
+            return WeatherConditions(50.0, 30.0, 0.0, datetime(2024, 1, 1), wind_speed, 90.0, 15.0)
+        
+        drone = Drone(name="D", max_speed=15.0, max_altitude=120.0, min_altitude=10.0,
+                      battery_capacity=100.0, power_consumption=50.0)
+        # One cell near all nodes, so every lookup uses it and nothing is fetched
+        manager = WeatherManager(use_weather=True)
+        cell = manager._round_to_grid(50.0, 30.0)
+        manager.set_weather({cell: conditions(3.0)})
+        graph = NavigationGraph(cost_model=CostModel(drone, weather_manager=manager))
+        graph.add_node("a", 50.0, 30.0, 50.0)
+        graph.add_node("b", 50.002, 30.0, 50.0)
+        graph.add_node("c", 50.002, 30.003, 50.0)
+        graph.add_edge("a", "b", 222.6)
+        graph.add_edge("b", "c", 214.6)
+        self.assertEqual(ThetaStar(graph).find_path("a", "c"), ["a", "c"])
+        
+        # Unsafe wind invalidates the a-c shortcut; the graph itself is unchanged
+        manager.set_weather({cell: conditions(25.0)})
+        
+        self.assertEqual(ThetaStar(graph).find_path("a", "c"), ["a", "b", "c"])
+    
+    def test_thetastar_disconnected_goal(self):
+        """Test Theta* rejects a goal in another connected component."""
+        self.graph.add_node("island", 5.0, 5.0, 0.0)
+        
+        self.assertIsNone(ThetaStar(self.graph).find_path("n0", "island"))
+    
     def test_dstar_finds_path(self):
         """Test D* finds path."""
         d_star = DStar(self.graph)
@@ -86,6 +210,25 @@ class TestAlgorithms(unittest.TestCase):
         self.assertEqual(path[0], "n0", "Path should start at start node")
         self.assertEqual(path[-1], "n8", "Path should end at goal node")
     
+    def test_dstar_replan_after_move(self):
+        """Test D* replans from a new start around edges that became expensive."""
+        # Same 3x3 layout with weights in meters so the heuristic is consistent
+        graph = NavigationGraph()
+        for i in range(9):
+            graph.add_node(f"n{i}", (i // 3) * 0.001, (i % 3) * 0.001, 0)
+        for n1, n2 in [(0, 1), (1, 2), (0, 3), (1, 4), (2, 5), (3, 4),
+                       (4, 5), (3, 6), (4, 7), (5, 8), (6, 7), (7, 8)]:
+            graph.add_edge(f"n{n1}", f"n{n2}", 111.32)
+        
+        d_star = DStar(graph)
+        self.assertIsNotNone(d_star.find_path("n0", "n8"))
+        
+        path = d_star.replan([("n1", "n2", 1000.0), ("n4", "n5", 1000.0)], new_start="n1")
+        
+        self.assertEqual(path, ["n1", "n4", "n7", "n8"])
+        self.assertEqual(d_star.km, d_star._heuristic("n0", "n1"))
+        self.assertEqual(graph.get_edge_weight("n1", "n2"), 1000.0)
+    
     def test_algorithms_find_same_goal(self):
         """Test all algorithms find path to same goal."""
         start = "n0"
@@ -119,6 +262,93 @@ class TestAlgorithms(unittest.TestCase):
         # Check that waypoints are visited
         waypoint_indices = [path.index(wp) for wp in waypoints if wp in path]
         self.assertEqual(len(waypoint_indices), len(waypoints), "Should visit all waypoints")
+    
+    def test_bulk_waypoints_are_independent(self):
+        """Test bulk waypoint fetch matches per-node lookup and returns fresh objects."""
+        nodes = ["n0", "n4", "n0"]
+        bulk = self.graph.get_node_waypoints_bulk(nodes)
+        
+        self.assertEqual(bulk, [self.graph.get_node_waypoint(n) for n in nodes])
+        bulk[0].waypoint_type = "depot"
+        self.assertEqual(bulk[2].waypoint_type, "target", "Repeated nodes must not share objects")
+    
+    def test_waypoint_order_is_optimal(self):
+        """Test Held-Karp and 2-opt ordering against brute force on asymmetric costs."""
+        rng = np.random.default_rng(0)
+        costs = rng.uniform(1.0, 10.0, (7, 7))
+        
+        def path_cost(order):
+            path = [0] + list(order)
+            return sum(costs[a, b] for a, b in zip(path, path[1:]))
+        
+        optimum = min(path_cost(order) for order in itertools.permutations(range(1, 7)))
+        self.assertAlmostEqual(path_cost(RoutePlanner._held_karp_order(costs)), optimum)
+        
+        greedy = RoutePlanner._greedy_order(costs)
+        improved = RoutePlanner._two_opt(costs, greedy)
+        self.assertEqual(sorted(improved), list(range(1, 7)))
+        self.assertLessEqual(path_cost(improved), path_cost(greedy))
+    
+    def test_update_weather_replans_dstar(self):
+        """Test a storm cell blocks edges that only reach it via the nearest-cell fallback."""
+        def conditions(lat, lon, wind_speed):
+            return WeatherConditions(lat, lon, 0.0, datetime(2024, 1, 1), wind_speed, 90.0, 15.0)
+        
+        drone = Drone(name="d0", max_speed=15.0, max_altitude=120.0, min_altitude=10.0,
+                      battery_capacity=500.0, power_consumption=50.0)
+        depot = Waypoint(50.0, 30.0, 0.0, "Depot", waypoint_type="depot")
+        targets = [Waypoint(50.03, 30.0, 50.0, "A"), Waypoint(50.03, 30.04, 50.0, "B"),
+                   Waypoint(50.0, 30.04, 50.0, "C")]
+        mission = Mission(name="m", drones=[drone], target_points=targets, depot=depot)
+        
+        # Weather only at the waypoint cells, so edge midpoints use the nearest one
+        round_to_grid = WeatherManager(use_weather=False)._round_to_grid
+        cells = {round_to_grid(wp.latitude, wp.longitude): conditions(wp.latitude, wp.longitude, 3.0)
+                 for wp in [depot] + targets}
+        planner = RoutePlanner(mission, weather_data=cells, use_weather=True,
+                               weather_timestamp=datetime(2024, 1, 1))
+        self.assertIsNotNone(planner.plan_single_drone_route(drone, algorithm="dstar"))
+        legs = planner._dstar_routes["d0"][2]
+        graph = legs[0].graph
+        # One kept search per leg: depot -> three targets -> back to the depot
+        self.assertEqual(len(legs), 4)
+        self.assertEqual((legs[0].start_node, legs[-1].goal_node), ("wp_0", "wp_0"))
+        
+        # A storm over target A also covers the A-depot midpoint, whose own cell is unchanged
+        storm_cell = round_to_grid(50.03, 30.0)
+        replanned = planner.update_weather({storm_cell: conditions(*storm_cell, 25.0)})
+        
+        self.assertEqual(graph.graph["wp_0"]["wp_1"]["weight"], math.inf)
+        self.assertFalse(any(cached is graph for cached in planner.graph_cache.values()),
+                         "Patched graphs must leave the graph cache")
+        
+        # The whole route is rebuilt, and every leg matches a fresh search on a graph
+        # built with the new weather
+        fresh_graph = planner.build_graph(drone, [depot] + targets)
+        self.assertIsNot(fresh_graph, graph)
+        fresh_path = RoutePlanner._join_legs([DStar(fresh_graph).find_path(leg.start_node, leg.goal_node)
+                                              for leg in legs])
+        self.assertNotIn({"wp_0", "wp_1"}, [set(fresh_path[i:i + 2]) for i in range(len(fresh_path) - 1)])
+        expected = planner._build_route(legs[0], fresh_path, drone, mission)
+        self.assertEqual([(wp.latitude, wp.longitude, wp.altitude, wp.waypoint_type)
+                          for wp in replanned["d0"].waypoints],
+                         [(wp.latitude, wp.longitude, wp.altitude, wp.waypoint_type)
+                          for wp in expected.waypoints])
+    
+    def test_weather_lookup_after_cell_swap(self):
+        """Test nearby weather lookups see a cell replaced without changing the cache size."""
+        manager = WeatherManager(use_weather=True)
+        old_cell, new_cell = (50.0, 30.0), (51.0, 31.0)
+        old = WeatherConditions(*old_cell, 0.0, datetime(2024, 1, 1), 3.0, 90.0, 15.0)
+        new = WeatherConditions(*new_cell, 0.0, datetime(2024, 1, 1), 5.0, 90.0, 15.0)
+        manager.set_weather({old_cell: old})
+        self.assertIs(manager._find_nearby_weather(50.001, 30.001), old)
+        
+        del manager.weather_cache[old_cell]
+        manager.set_weather({new_cell: new})
+        
+        self.assertIs(manager._find_nearby_weather(51.001, 31.001), new)
+        self.assertIsNone(manager._find_nearby_weather(50.001, 30.001))
 
 
 if __name__ == '__main__':